@@ -2,9 +2,13 @@ import google.generativeai as genai
 from PIL import Image, ImageDraw, ImageFont
 import os
 import json
+import hashlib
 from io import BytesIO
 import requests # To load image from URL
 
+# Shared LLM gateway (rate limits, retries, coalescing); `pip install -e .` at the repository root
+from llm_gateway import IMAGE_TOKENS, LLMGateway, estimate_tokens, prompt_key
+
 # --- Configuration ---
 # Securely load your API key (recommended: use environment variables)
 # For Google AI Studio:
@@ -18,6 +22,9 @@ genai.configure(api_key=GOOGLE_API_KEY)
 # Options: 'gemini-pro-vision' (older), 'gemini-1.5-flash-latest', 'gemini-1.5-pro-latest'
 MODEL_NAME = "gemini-1.5-flash-latest" # Flash is faster and cost-effective
 
+# All Gemini calls from this process share one gateway (limits via LLM_GATEWAY_RPM / _TPM etc.)
+gateway = LLMGateway.from_env(name="bbox")
+
 # --- Helper Functions ---
 
 def load_image_from_path(image_path: str) -> Image.Image:
@@ -100,9 +107,17 @@ def get_bounding_boxes_from_gemini(image: Image.Image) -> list:
     """
 
     print("Sending request to Gemini API...")
+    response = None
+    cleaned_response_text = ""
     try:
-        # The gemini-1.5-flash-latest model directly accepts PIL Images
-        response = model.generate_content([prompt_text, image])
+        # The gemini-1.5-flash-latest model directly accepts PIL Images.
+        # Retried on 429/5xx with backoff; the same image in flight twice is sent once.
+        image_digest = hashlib.sha256(image.tobytes()).hexdigest()
+        response = gateway.call(
+            lambda: model.generate_content([prompt_text, image]),
+            tokens=estimate_tokens(prompt_text) + IMAGE_TOKENS,
+            key=prompt_key(MODEL_NAME, prompt_text, image.size, image_digest),
+        )
 
         # Clean the response: Gemini might wrap JSON in ```json ... ```
         cleaned_response_text = response.text.strip()
@@ -0,0 +1,19 @@
+# llm_gateway/__init__.py
+"""
+Shared client-side traffic control for the Gemini calls made by the backend,
+quizr and bbox: adaptive rate limiting, jittered retries, a circuit breaker
+and single-flight coalescing. See gateway.LLMGateway.
+"""
+from llm_gateway.breaker import CircuitBreaker
+from llm_gateway.errors import CircuitOpenError, GatewayError, RateLimitTimeout
+from llm_gateway.gateway import IMAGE_TOKENS, LLMGateway, estimate_tokens, prompt_key
+from llm_gateway.rate_limit import RateLimiter, TokenBucket
+from llm_gateway.retry import RetryPolicy, is_retryable, is_throttled
+from llm_gateway.singleflight import SingleFlight
+
+__all__ = [
+    "LLMGateway", "estimate_tokens", "prompt_key", "IMAGE_TOKENS",
+    "RateLimiter", "TokenBucket", "RetryPolicy", "is_retryable", "is_throttled",
+    "CircuitBreaker", "SingleFlight",
+    "GatewayError", "CircuitOpenError", "RateLimitTimeout",
+]
@@ -0,0 +1,61 @@
+# llm_gateway/breaker.py
+import threading
+import time
+from typing import Callable
+
+from llm_gateway.errors import CircuitOpenError
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the upstream is down instead of queueing more doomed calls.
+
+    closed -> open after `failure_threshold` consecutive failures; open rejects
+    every call for `reset_timeout` seconds; then half-open lets `half_open_max`
+    trial calls through: a success closes the circuit, a failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_total = 0
+        self._opened_at = 0.0
+        self._trials = 0
+
+    def before_call(self, name: str = "llm") -> None:
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - self._clock()
+                if remaining > 0:
+                    raise CircuitOpenError(name, remaining)
+                self.state, self._trials = HALF_OPEN, 0
+            if self.state == HALF_OPEN:
+                if self._trials >= self.half_open_max:
+                    raise CircuitOpenError(name, 0.0)
+                self._trials += 1
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.state, self.failures = CLOSED, 0
+
+    def on_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened_total += 1
+                self.state, self._opened_at = OPEN, self._clock()
+
+    def release_trial(self) -> None:
+        """A half-open trial ended without telling us anything (e.g. a client error); free its slot."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._trials:
+                self._trials -= 1
@@ -0,0 +1,21 @@
+# llm_gateway/errors.py
+
+
+class GatewayError(Exception):
+    """Raised by the gateway itself (as opposed to errors from the wrapped LLM call)."""
+
+
+class CircuitOpenError(GatewayError):
+    """The upstream has been failing; calls are rejected until the breaker's reset timeout passes."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name}: circuit open, upstream is failing (retry in {retry_in:.1f}s)")
+        self.retry_in = retry_in
+
+
+class RateLimitTimeout(GatewayError):
+    """Waiting for rate limit capacity would take longer than the caller allows."""
+
+    def __init__(self, name: str, wait: float):
+        super().__init__(f"{name}: rate limited, next slot in {wait:.1f}s")
+        self.wait = wait
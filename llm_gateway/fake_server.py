@@ -0,0 +1,177 @@
+# llm_gateway/fake_server.py
+"""
+A local stand-in for a throttling LLM API, to exercise the gateway without
+quota or network access.
+
+The server answers POST /generate {"prompt": ...} after `latency` seconds and
+enforces its own requests-per-second token bucket: over the limit it answers
+429 with a Retry-After header, and `--error-rate` adds random 503s.
+
+    python -m llm_gateway.fake_server                 # demo: raw burst vs. the same burst through the gateway
+    python -m llm_gateway.fake_server --serve --port 8765
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from llm_gateway.gateway import LLMGateway, estimate_tokens, prompt_key
+from llm_gateway.rate_limit import TokenBucket
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256 # the demo bursts connect all at once
+
+    def __init__(self, port: int = 0, rps: float = 5.0, burst: Optional[float] = None, latency: float = 0.05, error_rate: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.bucket = TokenBucket(rps, burst or rps)
+        self.bucket_lock = threading.Lock()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.served = 0
+        self.throttled = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def admit(self) -> Optional[float]:
+        """None if the request may proceed, else seconds until it would be admitted."""
+        with self.bucket_lock:
+            wait = self.bucket.wait_time(1)
+            if wait > 0:
+                self.throttled += 1
+                return wait
+            self.bucket.take(1)
+            self.served += 1
+            return None
+
+    def start(self) -> "FakeLLMServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeLLMServer
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        wait = self.server.admit()
+        if wait is not None:
+            self._reply(429, {"error": "rate limit exceeded"}, {"Retry-After": f"{wait:.2f}"})
+            return
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._reply(503, {"error": "overloaded"})
+            return
+        time.sleep(self.server.latency)
+        self._reply(200, {"text": f"echo: {body.get('prompt', '')}"})
+
+    def _reply(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLLMError(Exception):
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"fake LLM returned {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class FakeLLMClient:
+    """Minimal SDK-like client: errors carry `status_code` and `retry_after` like the real ones."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def generate(self, prompt: str) -> str:
+        request = urllib.request.Request(
+            self.url + "/generate", data=json.dumps({"prompt": prompt}).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())["text"]
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get("Retry-After")
+            raise FakeLLMError(e.code, float(retry_after) if retry_after else None) from None
+
+
+def burst(call, prompts) -> int:
+    """Calls `call(prompt)` for every prompt at once, one thread each; returns how many failed."""
+    with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+        return sum(result is None for result in pool.map(lambda p: _safe(call, p), prompts))
+
+
+def _burst(label: str, call, prompts) -> None:
+    started = time.perf_counter()
+    failures = burst(call, prompts)
+    print(f"{label:<28} {len(prompts):>5} calls {failures:>4} failed {time.perf_counter() - started:>7.2f}s")
+
+
+def _safe(call, prompt):
+    try:
+        return call(prompt)
+    except Exception:
+        return None
+
+
+def demo(calls: int, rps: float, error_rate: float) -> None:
+    server = FakeLLMServer(rps=rps, error_rate=error_rate).start()
+    client = FakeLLMClient(server.url)
+    prompts = [f"question {i}" for i in range(calls)]
+    print(f"fake upstream: {rps:g} req/s, {error_rate:.0%} random 503s")
+
+    _burst("raw", client.generate, prompts)
+    served, throttled = server.served, server.throttled
+
+    # Deliberately configured at 4x what the upstream accepts: the limiter adapts on the 429s
+    gateway = LLMGateway.from_limits(requests_per_minute=rps * 60 * 4, max_attempts=8, base_delay=0.2, max_delay=5.0)
+    _burst("gateway", lambda p: gateway.call(lambda: client.generate(p), tokens=estimate_tokens(p)), prompts)
+    print(f"  upstream saw {server.served - served} served, {server.throttled - throttled} throttled; gateway {gateway.stats()}")
+
+    # Identical prompts in flight at the same time share one upstream call
+    served = server.served
+    same = ["what is a token bucket?"] * calls
+    _burst("gateway, identical prompts", lambda p: gateway.call(lambda: client.generate(p), key=prompt_key("fake", p)), same)
+    print(f"  upstream served {server.served - served} call(s) for {calls} callers; coalesced {gateway.singleflight.coalesced}")
+    server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serve", action="store_true", help="just run the server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rps", type=float, default=5.0, help="requests per second the fake upstream accepts")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of admitted requests answered with 503")
+    parser.add_argument("--calls", type=int, default=40, help="concurrent calls in the demo bursts")
+    args = parser.parse_args()
+
+    if args.serve:
+        server = FakeLLMServer(args.port, rps=args.rps, latency=args.latency, error_rate=args.error_rate)
+        print(f"fake LLM on {server.url} ({args.rps:g} req/s)")
+        server.serve_forever()
+    else:
+        demo(args.calls, args.rps, args.error_rate)
+
+
+if __name__ == "__main__":
+    main()
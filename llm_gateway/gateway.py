@@ -0,0 +1,259 @@
+# llm_gateway/gateway.py
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional
+
+from llm_gateway.breaker import CircuitBreaker
+from llm_gateway.errors import GatewayError
+from llm_gateway.rate_limit import RateLimiter
+from llm_gateway.retry import RetryPolicy, is_retryable, is_throttled, retry_after_of
+from llm_gateway.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt size for the tokens-per-minute bucket: ~4 characters per token for
+# English text, plus a flat allowance for the reply. Gemini bills an image as 258 tokens.
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 512
+IMAGE_TOKENS = 258
+
+
+def estimate_tokens(text: str, completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> int:
+    return len(text) // CHARS_PER_TOKEN + completion_tokens
+
+
+def prompt_key(*parts: Any) -> str:
+    """Single-flight key for a prompt: identical model + prompt parts -> identical key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMGateway:
+    """
+    Client-side traffic control for one upstream LLM API, shared by every
+    caller in the process (thread-safe; sync and async entry points):
+
+    - rate limiting: adaptive token buckets for requests and tokens per minute
+    - retries with jittered exponential backoff (honouring Retry-After) for
+      throttling, overload and transient errors; other errors propagate at once
+    - a circuit breaker that fails fast while the upstream keeps failing
+    - single-flight: identical in-flight calls (same `key`) share one upstream call
+
+        gateway = LLMGateway.from_env(name="quizr")
+        result = gateway.call(lambda: chain.invoke(inputs), tokens=estimate_tokens(text), key=prompt_key(model, text))
+
+    The limits are per process; with several worker processes give each its share.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        coalesce: bool = True,
+        acquire_timeout: Optional[float] = 60.0,
+        name: str = "llm"
+    ):
+        self.limiter = limiter
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker
+        self.singleflight = SingleFlight() if coalesce else None
+        self.acquire_timeout = acquire_timeout
+        self.name = name
+        self._counts = {"calls": 0, "attempts": 0, "retries": 0, "throttled": 0, "failures": 0}
+        self._counts_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str = "llm", prefix: str = "LLM_GATEWAY_") -> "LLMGateway":
+        """
+        Configuration for the standalone tools (quizr, bbox) from environment variables:
+        LLM_GATEWAY_RPM, _TPM (0 = no token limit), _MAX_ATTEMPTS, _BASE_DELAY, _MAX_DELAY,
+        _BREAKER_FAILURES, _BREAKER_RESET_SECONDS, _ACQUIRE_TIMEOUT, _COALESCE.
+        """
+        def env(key: str, default: str) -> str:
+            return os.environ.get(prefix + key, default)
+
+        return cls.from_limits(
+            requests_per_minute=float(env("RPM", "60")),
+            tokens_per_minute=float(env("TPM", "1000000")),
+            max_attempts=int(env("MAX_ATTEMPTS", "4")),
+            base_delay=float(env("BASE_DELAY", "0.5")),
+            max_delay=float(env("MAX_DELAY", "20")),
+            breaker_failures=int(env("BREAKER_FAILURES", "5")),
+            breaker_reset=float(env("BREAKER_RESET_SECONDS", "30")),
+            acquire_timeout=float(env("ACQUIRE_TIMEOUT", "60")),
+            coalesce=env("COALESCE", "true").lower() in ("1", "true", "yes"),
+            name=name,
+        )
+
+    @classmethod
+    def from_limits(
+        cls,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        breaker_failures: int = 5,
+        breaker_reset: float = 30.0,
+        acquire_timeout: Optional[float] = 60.0,
+        coalesce: bool = True,
+        name: str = "llm"
+    ) -> "LLMGateway":
+        return cls(
+            limiter=RateLimiter(requests_per_minute, tokens_per_minute or None) if requests_per_minute > 0 else None,
+            retry=RetryPolicy(max_attempts=max_attempts, base_delay=base_delay, max_delay=max_delay),
+            breaker=CircuitBreaker(failure_threshold=breaker_failures, reset_timeout=breaker_reset) if breaker_failures > 0 else None,
+            coalesce=coalesce,
+            acquire_timeout=acquire_timeout,
+            name=name,
+        )
+
+    def _count(self, key: str) -> None:
+        with self._counts_lock:
+            self._counts[key] += 1
+
+    # --- one attempt's bookkeeping, shared by the sync and async paths ---
+
+    def _on_success(self) -> None:
+        if self.breaker is not None:
+            self.breaker.on_success()
+        if self.limiter is not None:
+            self.limiter.on_success()
+
+    def _on_error(self, exc: BaseException, attempt: int) -> Optional[float]:
+        """Records a failed attempt. Returns the delay before retrying, or None to re-raise."""
+        if not is_retryable(exc):
+            if self.breaker is not None:
+                self.breaker.release_trial()
+            return None
+        retry_after = retry_after_of(exc)
+        if is_throttled(exc):
+            # The upstream is up, we're just over its quota: slow down, don't trip the breaker
+            self._count("throttled")
+            if self.limiter is not None:
+                self.limiter.on_throttled(retry_after)
+            if self.breaker is not None:
+                self.breaker.release_trial()
+        elif self.breaker is not None:
+            self.breaker.on_failure()
+        if attempt >= self.retry.max_attempts:
+            self._count("failures")
+            logger.warning("%s: giving up after %d attempts: %s", self.name, attempt, exc)
+            return None
+        self._count("retries")
+        delay = self.retry.delay(attempt, retry_after)
+        logger.info("%s: attempt %d failed (%s), retrying in %.2fs", self.name, attempt, exc, delay)
+        return delay
+
+    def _before_attempt(self) -> None:
+        if self.breaker is not None:
+            self.breaker.before_call(self.name)
+        self._count("attempts")
+
+    # --- sync ---
+
+    def call(self, fn: Callable[[], Any], tokens: float = 0, key: Optional[Hashable] = None) -> Any:
+        """Runs `fn` (one upstream call) under the gateway's limits; blocks while throttled."""
+        self._count("calls")
+        if key is not None and self.singleflight is not None:
+            return self.singleflight.do(key, lambda: self._call(fn, tokens))
+        return self._call(fn, tokens)
+
+    def _call(self, fn: Callable[[], Any], tokens: float) -> Any:
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            try:
+                if self.limiter is not None:
+                    self.limiter.acquire(tokens, self.acquire_timeout, self.name)
+                result = fn()
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    # --- async ---
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], tokens: float = 0, key: Optional[Hashable] = None) -> Any:
+        """Async `call`: `fn` returns a fresh awaitable per attempt."""
+        self._count("calls")
+        if key is not None and self.singleflight is not None:
+            return await self.singleflight.ado(key, lambda: self._acall(fn, tokens))
+        return await self._acall(fn, tokens)
+
+    async def _acall(self, fn: Callable[[], Awaitable[Any]], tokens: float) -> Any:
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            try:
+                if self.limiter is not None:
+                    await self.limiter.aacquire(tokens, self.acquire_timeout, self.name)
+                result = await fn()
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    async def astream(self, fn: Callable[[], AsyncIterator[Any]], tokens: float = 0) -> AsyncIterator[Any]:
+        """
+        Streams `fn()`'s chunks. Failures before the first chunk are retried like
+        acall; once chunks have been passed on, an error propagates (a retry
+        would repeat text the caller already has). Streams are never coalesced.
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            attempt += 1
+            self._before_attempt()
+            started = False
+            try:
+                if self.limiter is not None:
+                    await self.limiter.aacquire(tokens, self.acquire_timeout, self.name)
+                async for chunk in fn():
+                    if not started:
+                        started = True
+                        self._on_success()
+                    yield chunk
+            except Exception as e:
+                if started:
+                    raise
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            if not started:
+                self._on_success() # empty but successful stream
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counts_lock:
+            stats: Dict[str, Any] = dict(self._counts)
+        stats["coalesced"] = self.singleflight.coalesced if self.singleflight is not None else 0
+        if self.limiter is not None:
+            stats["rate_scale"] = round(self.limiter.scale, 3)
+        if self.breaker is not None:
+            stats["breaker_state"] = self.breaker.state
+            stats["breaker_opened"] = self.breaker.opened_total
+        return stats
+
+
+__all__ = ["LLMGateway", "GatewayError", "estimate_tokens", "prompt_key", "IMAGE_TOKENS"]
@@ -0,0 +1,127 @@
+# llm_gateway/rate_limit.py
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+
+from llm_gateway.errors import RateLimitTimeout
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled continuously at `rate` tokens/second. Not thread-safe on its own."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, n: float) -> float:
+        """Seconds until `n` tokens are available (0 if they are now)."""
+        self._refill()
+        n = min(n, self.capacity) # a request bigger than the bucket would otherwise wait forever
+        return 0.0 if self._tokens >= n else (n - self._tokens) / self.rate
+
+    def take(self, n: float) -> None:
+        self._tokens -= min(n, self.capacity)
+
+    def drain(self) -> None:
+        """Drops any saved-up burst."""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimiter:
+    """
+    Client-side limits on requests per minute and tokens per minute, one token
+    bucket each (bursts up to a minute's worth).
+
+    Adaptive (AIMD): a throttling response (429) halves the effective rate,
+    down to `min_fraction` of the configured one, and pauses all callers for
+    the server's Retry-After; every successful call gives back `recovery_step`
+    of the configured rate. So a limit set too high converges on what the
+    upstream actually accepts instead of producing a storm of 429s.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: Optional[float] = None,
+        min_fraction: float = 0.1,
+        recovery_step: float = 0.05,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.min_fraction = min_fraction
+        self.recovery_step = recovery_step
+        self.scale = 1.0
+        self._clock = clock
+        self._requests = TokenBucket(requests_per_minute / 60.0, requests_per_minute, clock)
+        self._tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute, clock) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock() # shared by threads (quizr, bbox) and the event loop (backend)
+
+    def _apply_scale(self) -> None:
+        self._requests.rate = self.requests_per_minute / 60.0 * self.scale
+        self._requests.capacity = max(1.0, self.requests_per_minute * self.scale)
+        if self._tokens is not None:
+            self._tokens.rate = self.tokens_per_minute / 60.0 * self.scale
+            self._tokens.capacity = max(1.0, self.tokens_per_minute * self.scale)
+
+    def reserve(self, tokens: float = 0) -> float:
+        """Takes a slot (and `tokens`) if available and returns 0, else returns the seconds to wait and takes nothing."""
+        with self._lock:
+            wait = max(0.0, self._paused_until - self._clock())
+            wait = max(wait, self._requests.wait_time(1))
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.wait_time(tokens))
+            if wait == 0.0:
+                self._requests.take(1)
+                if self._tokens is not None and tokens:
+                    self._tokens.take(tokens)
+            return wait
+
+    def acquire(self, tokens: float = 0, timeout: Optional[float] = None, name: str = "llm") -> None:
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.reserve(tokens)
+            if wait == 0.0:
+                return
+            if deadline is not None and self._clock() + wait > deadline:
+                raise RateLimitTimeout(name, wait)
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: float = 0, timeout: Optional[float] = None, name: str = "llm") -> None:
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.reserve(tokens)
+            if wait == 0.0:
+                return
+            if deadline is not None and self._clock() + wait > deadline:
+                raise RateLimitTimeout(name, wait)
+            await asyncio.sleep(wait)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.scale = max(self.min_fraction, self.scale / 2)
+            self._apply_scale()
+            # The saved-up burst is evidently more than the upstream takes: pace from now on
+            self._requests.drain()
+            if self._tokens is not None:
+                self._tokens.drain()
+            if retry_after:
+                self._paused_until = max(self._paused_until, self._clock() + retry_after)
+
+    def on_success(self) -> None:
+        if self.scale >= 1.0:
+            return
+        with self._lock:
+            self.scale = min(1.0, self.scale + self.recovery_step)
+            self._apply_scale()
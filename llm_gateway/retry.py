@@ -0,0 +1,71 @@
+# llm_gateway/retry.py
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+# Upstream errors worth retrying: throttling, overload, transient server errors, timeouts.
+# Matched by HTTP status where the exception carries one and by class name otherwise,
+# so no SDK has to be imported here (google.api_core, httpx, requests, the fake server).
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+THROTTLED_STATUS = {429}
+RETRYABLE_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "TimeoutError", "ReadTimeout", "ConnectTimeout",
+    "ConnectionError", "ConnectError", "RemoteDisconnected",
+}
+THROTTLED_NAMES = {"ResourceExhausted", "TooManyRequests"}
+
+
+def status_of(exc: BaseException) -> Optional[int]:
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        value = getattr(value, "value", value) # HTTPStatus / enum codes
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return type(exc).__name__ in RETRYABLE_NAMES or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+def is_throttled(exc: BaseException) -> bool:
+    status = status_of(exc)
+    if status is not None:
+        return status in THROTTLED_STATUS
+    return type(exc).__name__ in THROTTLED_NAMES
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """Server-suggested delay (Retry-After) if the exception exposes one."""
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or getattr(exc, "headers", None)
+        if headers is not None:
+            value = headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None # HTTP-date form; fall back to our own backoff
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter (sleep uniformly in [0, min(max_delay, base_delay * 2^attempt)])."""
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Sleep before retry number `attempt` (1-based)."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            # Never earlier than the server asked; jitter on top so waiters don't all return at once
+            delay = min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        return delay
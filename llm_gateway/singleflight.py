@@ -0,0 +1,60 @@
+# llm_gateway/singleflight.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while a call for `key` is running,
+    other callers with the same key wait for its result instead of issuing
+    their own. Nothing is cached once the call finishes.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self._calls: Dict[Hashable, "_Call"] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: one caller giving up (client disconnect) must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
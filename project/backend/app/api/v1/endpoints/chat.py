@@ -1,12 +1,23 @@
 # backend/app/api/v1/endpoints/chat.py
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Any
+from typing import List, Any, Optional
+import json
 
 from backend.app import schemas
 from backend.app.db import crud # For direct DB access if needed, though service handles most
-from backend.app.db.database import get_db
+from backend.app.db.database import get_db, AsyncSessionLocal
+from backend.app.db.write_behind import UnknownSessionError
+from backend.app.core.lifecycle import generation_tracker
 from backend.app.services.chat_service import ChatService, get_chat_service # Import service
+from backend.app.services.llm_pool import LLMClientPool, get_llm_pool
+from backend.app.services.summarizer import SessionCompactor, get_session_compactor
+from backend.app.services.response_cache import ResponseCache, get_response_cache
+from backend.app.rag.retriever import Retriever, get_retriever
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -36,14 +47,14 @@ router = APIRouter()
 # backend/app/api/v1/endpoints/chat.py
 # ...
 @router.post("/sessions/{session_id}/messages", response_model=schemas.message.ChatMessage)
-def send_message_to_session(
+async def send_message_to_session(
     *,
     session_id: int,
     message_in: schemas.message.ChatMessageCreate,
+    use_cache: bool = True, # ?use_cache=false forces a fresh LLM reply
     chat_service: ChatService = Depends(get_chat_service)
 ) -> Any:
-    print(f"[ENDPOINT_CHAT] Received POST to /sessions/{session_id}/messages") # DEBUG
-    print(f"[ENDPOINT_CHAT] Message content from user: '{message_in.content}'") # DEBUG
+    logger.debug("Received POST to /sessions/%s/messages, content: %.100r", session_id, message_in.content)
     
     # Optional: Verify session exists here if you suspect session_id issues
     # from backend.app.db.database import SessionLocal # Temp for direct check
@@ -56,17 +67,73 @@ def send_message_to_session(
     #     raise HTTPException(status_code=404, detail="Session not found from endpoint check")
 
     try:
-        ai_response_message = chat_service.process_user_message(
-            session_id=session_id,
-            user_message_content=message_in.content
-        )
-        print(f"[ENDPOINT_CHAT] AI response generated: {ai_response_message.content[:50] if ai_response_message else 'None'}") # DEBUG
+        with generation_tracker.track():
+            ai_response_message = await chat_service.process_user_message(
+                session_id=session_id,
+                user_message_content=message_in.content,
+                use_cache=use_cache
+            )
+        logger.debug("AI response generated: %.50r", ai_response_message.content if ai_response_message else None)
         return ai_response_message
+    except UnknownSessionError:
+        raise HTTPException(status_code=404, detail="Session not found")
     except Exception as e:
-        print(f"[ENDPOINT_CHAT] Error during chat_service.process_user_message: {e}") # DEBUG
+        logger.exception("Error during chat_service.process_user_message: %s", e)
         # Consider raising an HTTPException here to inform the client
         raise HTTPException(status_code=500, detail=f"Internal server error processing message: {str(e)}")
-    
+
+
+@router.post("/sessions/{session_id}/messages/stream")
+async def stream_message_to_session(
+    *,
+    session_id: int,
+    message_in: schemas.message.ChatMessageCreate,
+    use_cache: bool = True,
+    llm_pool: LLMClientPool = Depends(get_llm_pool),
+    compactor: Optional[SessionCompactor] = Depends(get_session_compactor),
+    retriever: Optional[Retriever] = Depends(get_retriever),
+    response_cache: Optional[ResponseCache] = Depends(get_response_cache)
+) -> StreamingResponse:
+    """
+    Same as POST /sessions/{session_id}/messages, but streams the AI reply as
+    newline-delimited JSON: one {"type": "token"} line per chunk, then a final
+    {"type": "message"} line with the saved ChatMessage (or {"type": "error"}).
+    """
+    async def event_stream():
+        # The body is consumed after this endpoint returns, so the stream owns its DB session
+        async with AsyncSessionLocal() as db:
+            try:
+                chat_service = ChatService(
+                    db=db, llm_pool=llm_pool, compactor=compactor, retriever=retriever, response_cache=response_cache
+                )
+                with generation_tracker.track():
+                    async for event in chat_service.stream_user_message(
+                        session_id=session_id,
+                        user_message_content=message_in.content,
+                        use_cache=use_cache
+                    ):
+                        yield json.dumps(event) + "\n"
+            except UnknownSessionError:
+                yield json.dumps({"type": "error", "detail": "Session not found"}) + "\n"
+            except Exception as e:
+                logger.exception("Error during chat_service.stream_user_message: %s", e)
+                yield json.dumps({"type": "error", "detail": f"Internal server error processing message: {str(e)}"}) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+@router.get("/response-cache/stats")
+def get_response_cache_stats(
+    response_cache: Optional[ResponseCache] = Depends(get_response_cache)
+) -> Any:
+    """
+    Hit/miss counters for the LLM response cache.
+    """
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
+
 
 @router.get("/sessions/{session_id}/messages", response_model=List[schemas.message.ChatMessage])
 def get_session_messages(
@@ -74,15 +141,28 @@ def get_session_messages(
     db: Session = Depends(get_db),
     session_id: int,
     skip: int = 0,
-    limit: int = 100 # Client can request more if pagination is implemented
+    limit: int = 100, # Client can request more if pagination is implemented
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    since_id: Optional[int] = None
 ) -> Any:
     """
-    Retrieve all messages for a specific chat session.
+    Retrieve messages for a specific chat session, oldest first.
+
+    - after_id / before_id: keyset pagination, pass the last / first id of the current page
+    - since_id: incremental mode, only messages newer than the last one the client already has
     """
+    if since_id is not None:
+        if after_id is not None or before_id is not None:
+            raise HTTPException(status_code=400, detail="since_id can't be combined with after_id/before_id")
+        after_id = since_id
+
     # Verify session exists
     session = crud.get_session(db, session_id=session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    messages = crud.get_messages_by_session(db, session_id=session_id, skip=skip, limit=limit)
-    return messages
\ No newline at end of file
+    messages = crud.get_messages_by_session(
+        db, session_id=session_id, skip=skip, limit=limit, after_id=after_id, before_id=before_id
+    )
+    return messages
@@ -0,0 +1,52 @@
+# backend/app/api/v1/endpoints/documents.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Optional
+
+from backend.app.schemas import document as document_schemas
+from backend.app.rag.retriever import Retriever, get_retriever
+
+router = APIRouter()
+
+
+def _require_retriever(retriever: Optional[Retriever]) -> Retriever:
+    if retriever is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Retrieval is disabled (RAG_ENABLED=false)")
+    return retriever
+
+
+@router.post("/documents", response_model=document_schemas.DocumentIngestResult, status_code=status.HTTP_201_CREATED)
+def ingest_document(
+    *,
+    document_in: document_schemas.DocumentCreate,
+    retriever: Optional[Retriever] = Depends(get_retriever)
+) -> Any:
+    """
+    Chunk, embed and index a document so chat turns can retrieve from it.
+    Posting the same source again replaces it. The index is saved before the
+    response, so a 201 means the document survives a restart.
+
+    With an in-process index (VECTOR_BACKEND=numpy / ivf) only this worker
+    serves the document until the others restart; use pgvector when running
+    several workers.
+    """
+    retriever = _require_retriever(retriever)
+    if not retriever.persistent:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The retrieval index isn't persisted: set VECTOR_INDEX_PATH or use VECTOR_BACKEND=pgvector"
+        )
+    chunks = retriever.ingest(document_in.text, source=document_in.source, metadata=document_in.metadata)
+    retriever.save()
+    return {"source": document_in.source, "chunks": chunks}
+
+
+@router.post("/documents/search", response_model=document_schemas.RetrievalResult)
+def search_documents(
+    *,
+    query_in: document_schemas.RetrievalQuery,
+    retriever: Optional[Retriever] = Depends(get_retriever)
+) -> Any:
+    """
+    Return the chunks the chat service would inject for this query.
+    """
+    return {"chunks": _require_retriever(retriever).retrieve(query_in.query, k=query_in.k)}
@@ -6,6 +6,7 @@ from typing import List, Any
 from backend.app import schemas
 from backend.app.db import crud
 from backend.app.db.database import get_db
+from backend.app.services.session_cache import user_session_cache
 
 router = APIRouter()
 
@@ -21,14 +22,11 @@ def create_new_session(
     The user_id is taken from the path.
     session_in can optionally provide a session_name.
     """
-    # Verify user exists (optional, but good practice)
-    user = crud.get_user(db, user_id=user_id)
-    if not user:
+    # The user check is part of the INSERT (INSERT ... SELECT WHERE EXISTS), no separate lookup
+    db_session = crud.create_chat_session_if_user_exists(db=db, session_create=session_in, user_id=user_id)
+    if db_session is None:
         raise HTTPException(status_code=404, detail=f"User with id {user_id} not found")
-
-    # The session_in schema (ChatSessionCreate) now only needs 'session_name' (optional)
-    # The 'user_id' for the session is taken from the path parameter.
-    return crud.create_chat_session(db=db, session_create=session_in, user_id=user_id)
+    return user_session_cache.add_session(db_session) # write-through to the cached session list
 
 
 @router.get("/users/{user_id}/sessions", response_model=List[schemas.session.ChatSession])
@@ -40,15 +38,24 @@ def list_user_sessions(
     limit: int = 100
 ) -> Any:
     """
-    Retrieve all chat sessions for a specific user.
+    Retrieve a page of a user's chat sessions, newest first.
     """
-    # Verify user exists (optional)
-    user = crud.get_user(db, user_id=user_id)
-    if not user:
+    sessions = user_session_cache.get_sessions(user_id, skip=skip, limit=limit)
+    if sessions is not None:
+        return sessions
+    cached_prefix = user_session_cache.sessions_per_user
+    if skip + limit > cached_prefix:
+        # Past what the cache holds: read just this page
+        db_sessions = crud.get_sessions_if_user_exists(db, user_id=user_id, skip=skip, limit=limit)
+        if db_sessions is None:
+            raise HTTPException(status_code=404, detail=f"User with id {user_id} not found")
+        return db_sessions
+    # Sessions + user existence in one query; one extra row tells whether the prefix is the whole list
+    read_token = user_session_cache.read_token()
+    db_sessions = crud.get_sessions_if_user_exists(db, user_id=user_id, limit=cached_prefix + 1)
+    if db_sessions is None:
         raise HTTPException(status_code=404, detail=f"User with id {user_id} not found")
-
-    sessions = crud.get_sessions_by_user(db, user_id=user_id, skip=skip, limit=limit)
-    return sessions
+    return user_session_cache.put_sessions(user_id, db_sessions, read_token)[skip:skip + limit]
 
 @router.get("/{session_id}", response_model=schemas.session.ChatSession)
 def get_session_details( # Renamed for clarity from original get_session
@@ -67,15 +74,3 @@ def get_session_details( # Renamed for clarity from original get_session
 # Optional: Add delete endpoint later if needed
 # @router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 # def delete_session(...):
-
-@router.post("/users/{user_id}/sessions", response_model=schemas.session.ChatSession, status_code=status.HTTP_201_CREATED)
-def create_new_session_for_user(
-    *,
-    db: Session = Depends(get_db),
-    user_id: int,  # user_id from path
-    session_in: schemas.session.ChatSessionCreate # Request body
-) -> Any:
-    user = crud.get_user(db, user_id=user_id)
-    if not user:
-        raise HTTPException(status_code=404, detail=f"User with id {user_id} not found")
-    return crud.create_chat_session(db=db, session_create=session_in, user_id=user_id) # user_id passed to CRUD
\ No newline at end of file
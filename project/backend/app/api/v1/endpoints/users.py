@@ -6,6 +6,7 @@ from typing import Any
 from backend.app import schemas       # This imports the 'schemas' package
 from backend.app.db import crud       # This imports the 'crud.py' module from 'db'
 from backend.app.db.database import get_db # This imports 'get_db' from 'database.py'
+from backend.app.services.session_cache import user_session_cache
 
 router = APIRouter()
 
@@ -15,10 +16,12 @@ def login_or_create_user(
     db: Session = Depends(get_db), # <--- get_db is used here as a dependency
     user_in: schemas.user.UserCreate
 ) -> Any:
-    user = crud.get_user_by_name_and_topic(db, name=user_in.name, topic=user_in.topic_of_interest) # crud functions use the 'db' session
-    if not user:
-        user = crud.create_user(db=db, user=user_in) # crud functions use the 'db' session
-    return user
+    user = user_session_cache.get_user_by_login(user_in.name, user_in.topic_of_interest)
+    if user is not None:
+        return user
+    # One upsert statement; concurrent first logins for the same pair all get the same user
+    user = crud.get_or_create_user(db, user=user_in)
+    return user_session_cache.put_user(user)
 
 @router.get("/{user_id}", response_model=schemas.user.User) # Access User schema via schemas.user
 def read_user(
@@ -29,7 +32,10 @@ def read_user(
     """
     Get user by ID.
     """
+    user = user_session_cache.get_user(user_id)
+    if user is not None:
+        return user
     user = crud.get_user(db, user_id=user_id) # Call functions directly from 'crud' module
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
\ No newline at end of file
+    return user_session_cache.put_user(user)
\ No newline at end of file
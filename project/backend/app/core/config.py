@@ -1,6 +1,7 @@
 # backend/app/core/config.py
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
+from typing import Optional
 import os
 
 # Load .env file from the project root
@@ -12,6 +13,103 @@ load_dotenv(dotenv_path=dotenv_path) # Load the .env file
 class Settings(BaseSettings):
     GOOGLE_API_KEY: str
     DATABASE_URL: str
+    # The schema is managed by Alembic (`alembic upgrade head` from project/). Set this to
+    # create missing tables with create_all at startup instead, for throwaway local databases.
+    DB_CREATE_TABLES_ON_STARTUP: bool = False
+    # Async driver URL for the chat path. Derived from DATABASE_URL when not set
+    # (postgresql:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://)
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # LLM client pool (see services/llm_pool.py)
+    LLM_MODEL_NAME: str = "gemini-2.0-flash"
+    LLM_POOL_SIZE: int = 1
+    LLM_MAX_CONCURRENCY: int = 64
+    LLM_WARMUP: bool = False # one ping per client in the background after startup
+    # Build the LLM clients (and import the Gemini SDK) in a worker thread after startup instead of before it
+    LLM_LAZY_INIT: bool = True
+    # "module:callable" returning a BaseChatModel, used instead of Gemini (e.g. benchmarks.fake_llm:fake_client_factory)
+    LLM_CLIENT_FACTORY: Optional[str] = None
+    # Client-side traffic control in front of the LLM (llm_gateway/ at the repo root): rate limits,
+    # jittered retries, circuit breaker, coalescing of identical in-flight prompts.
+    # The limits are per worker process; divide the API quota by the number of workers.
+    LLM_GATEWAY_ENABLED: bool = True
+    LLM_REQUESTS_PER_MINUTE: float = 1000 # 0 = no client-side rate limit
+    LLM_TOKENS_PER_MINUTE: float = 1000000 # 0 = no token limit
+    LLM_MAX_ATTEMPTS: int = 4
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 20
+    LLM_BREAKER_FAILURES: int = 5 # consecutive failures that open the circuit, 0 = no breaker
+    LLM_BREAKER_RESET_SECONDS: float = 30
+    LLM_ACQUIRE_TIMEOUT: float = 30 # longest a request waits for rate limit capacity before failing
+    LLM_COALESCE: bool = True
+
+    # Per-session conversation memory cache (see services/memory_cache.py)
+    MEMORY_CACHE_MAX_SESSIONS: int = 1000
+    MEMORY_CACHE_TTL_SECONDS: float = 900
+    MEMORY_MAX_MESSAGES: int = 50
+    MEMORY_TOKEN_BUDGET: int = 3000
+
+    # Rolling summary compaction (see services/summarizer.py)
+    SUMMARY_ENABLED: bool = True
+    SUMMARY_KEEP_RECENT_MESSAGES: int = 12
+    SUMMARY_BATCH_MESSAGES: int = 10
+
+    # Retrieval (see rag/). EMBEDDER: "google" | "hashing"; VECTOR_BACKEND: "numpy" | "ivf" | "pgvector"
+    RAG_ENABLED: bool = True
+    EMBEDDER: str = "google"
+    EMBEDDING_MODEL: str = "models/text-embedding-004"
+    EMBEDDING_DIM: int = 768
+    VECTOR_BACKEND: str = "numpy"
+    RAG_CHUNK_SIZE: int = 800
+    RAG_CHUNK_OVERLAP: int = 100
+    RAG_TOP_K: int = 4
+    RAG_MIN_SCORE: float = 0.2
+    IVF_NPROBE: int = 8
+    IVF_TRAIN_THRESHOLD: int = 50000
+    # Where the numpy/ivf index is persisted by the ingestion CLI and loaded at startup
+    VECTOR_INDEX_PATH: Optional[str] = None
+    INGEST_EMBED_BATCH_SIZE: int = 64
+
+    # Logging / instrumentation (core/logging_config.py, core/instrumentation.py)
+    LOG_LEVEL: str = "INFO"
+    # Per-request cProfile dumps: send the PROFILE_HEADER header, or sample a fraction of requests.
+    # Off by default, a profiled request is noticeably slower.
+    PROFILING_ENABLED: bool = False
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_DIR: str = "profiles"
+
+    # Per-process cache of user records and per-user session lists (services/session_cache.py)
+    USER_CACHE_MAX_USERS: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60 # bounds staleness for sessions created through other workers
+    USER_CACHE_SESSIONS_PER_USER: int = 100 # newest sessions cached per user; deeper pages go to the DB
+
+    # SQLAlchemy connection pools (sync and async engines each get their own pool with these settings)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800 # seconds, -1 to never recycle
+
+    # Shutdown / readiness (core/lifecycle.py, /readyz). gunicorn.conf.py has the process-level timeouts.
+    SHUTDOWN_DRAIN_SECONDS: float = 30 # wait this long for in-flight chat generations before closing pools
+    READINESS_DB_TIMEOUT_SECONDS: float = 2
+
+    # Write-behind chat message log with group commit (db/write_behind.py).
+    # On SQLite ids are allocated in-process, so only enable it with a single worker there.
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_MAX_QUEUE: int = 10000 # turns; submit() waits when full
+    WRITE_BEHIND_BATCH_SIZE: int = 500 # messages per INSERT/commit
+    WRITE_BEHIND_FLUSH_INTERVAL_SECONDS: float = 0.02
+    WRITE_BEHIND_MAX_BACKOFF_SECONDS: float = 5 # between retries while the database is unreachable
+
+    # LLM response cache (see services/response_cache.py); the semantic tier reuses the RAG embedder
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAXSIZE: int = 2048
+    RESPONSE_CACHE_TTL_SECONDS: float = 3600
+    RESPONSE_CACHE_SEMANTIC: bool = False
+    RESPONSE_CACHE_SEMANTIC_THRESHOLD: float = 0.95
+    RESPONSE_CACHE_SEMANTIC_MAXSIZE: int = 1024
 
     class Config:
         env_file = ".env" # Though load_dotenv already did the job, this is good practice
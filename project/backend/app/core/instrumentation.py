@@ -0,0 +1,157 @@
+# backend/app/core/instrumentation.py
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.app.core.config import settings
+from backend.app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_seconds", "Request latency per endpoint (until the response body is done)", ("method", "route", "status")
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "app_stage_seconds", "Time spent in each hot-path stage (history_load, llm_call, db_write, ...)", ("stage",)
+)
+
+# Spans recorded during the current request, for the Server-Timing header and the access log line
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Times a block: feeds app_stage_seconds{stage=...} and the request's Server-Timing header."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile of single requests, dumped as .prof files (open with snakeviz / pstats).
+    Triggered by the PROFILE_HEADER request header, or randomly with PROFILE_SAMPLE_RATE.
+    cProfile hooks the whole event loop thread, so other requests running at the same
+    time show up in the dump too; only one request is profiled at a time.
+    """
+
+    def __init__(self, output_dir: str, header: str = "X-Profile", sample_rate: float = 0.0):
+        self.output_dir = output_dir
+        self.header = header.lower()
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "RequestProfiler":
+        return cls(output_dir=settings.PROFILE_DIR, header=settings.PROFILE_HEADER, sample_rate=settings.PROFILE_SAMPLE_RATE)
+
+    def wanted(self, scope: Scope) -> bool:
+        if Headers(scope=scope).get(self.header) not in (None, "", "0"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, scope: Scope) -> Optional[Tuple[cProfile.Profile, str]]:
+        if not self._lock.acquire(blocking=False):
+            return None # Another request is being profiled
+        route = scope["path"].strip("/").replace("/", "_") or "root"
+        path = os.path.join(self.output_dir, f"{int(time.time() * 1000)}-{route}.prof")
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError: # another profiler (e.g. a debugger) is already active
+            self._lock.release()
+            return None
+        return profile, path
+
+    def stop(self, profile: cProfile.Profile, path: str) -> None:
+        try:
+            profile.disable()
+            os.makedirs(self.output_dir, exist_ok=True)
+            profile.dump_stats(path)
+            logger.info("Wrote request profile %s", path)
+        finally:
+            self._lock.release()
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the matched route with its router prefixes, e.g. /api/v1/sessions/{session_id}/messages.
+    Templates rather than raw paths keep the metrics' label cardinality bounded.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # Nested routers only know their own part of the path; recover the prefix from the concrete path
+    try:
+        concrete = getattr(route, "path_format", template).format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    if path.endswith(concrete):
+        return path[:len(path) - len(concrete)] + template
+    return template
+
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware (doesn't buffer streaming responses):
+    - records http_request_seconds per method / route template / status
+    - adds a Server-Timing header with the spans finished before the response started
+    - optionally profiles the request (see RequestProfiler)
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        profiling = self.profiler.start(scope) if self.profiler is not None and self.profiler.wanted(scope) else None
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                timings = [f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in spans]
+                timings.append(f"app;dur={(time.perf_counter() - started) * 1000:.1f}")
+                headers.append("Server-Timing", ", ".join(timings))
+                if profiling is not None:
+                    headers.append("X-Profile-File", os.path.basename(profiling[1]))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiling is not None:
+                self.profiler.stop(*profiling)
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route_template(scope), status=str(status_code))
+            logger.debug(
+                "%s %s -> %s in %.1fms (%s)", scope["method"], scope["path"], status_code, elapsed * 1000,
+                ", ".join(f"{stage}={ms * 1000:.1f}ms" for stage, ms in spans) or "no spans"
+            )
+            _request_spans.reset(token)
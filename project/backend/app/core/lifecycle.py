@@ -0,0 +1,57 @@
+# backend/app/core/lifecycle.py
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from backend.app.core.metrics import REGISTRY
+
+# Process lifecycle helpers shared by the launchers (gunicorn.conf.py, run_backend.py)
+# and the app's shutdown / readiness code. Keep this import-light: gunicorn.conf.py
+# loads it in the master before DATABASE_URL & co are needed.
+
+
+def available_cores() -> int:
+    """CPUs this process may run on (respects taskset/cpusets, unlike os.cpu_count())."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    return int(os.environ.get("WEB_CONCURRENCY", 0)) or available_cores()
+
+
+class GenerationTracker:
+    """
+    Counts chat generations (LLM call + saving the turn) in progress in this
+    worker. Shutdown waits for them before closing the LLM pool and the
+    write-behind log, and /readyz reports the count and the draining state.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.draining = False
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    async def drain(self, timeout: float) -> int:
+        """Waits up to `timeout` seconds for in-flight generations. Returns how many were still running."""
+        self.draining = True
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self.in_flight
+
+
+generation_tracker = GenerationTracker()
+
+CHAT_GENERATIONS_IN_FLIGHT = REGISTRY.gauge("chat_generations_in_flight", "Chat turns being generated in this worker")
+CHAT_GENERATIONS_IN_FLIGHT.set_function(lambda: generation_tracker.in_flight)
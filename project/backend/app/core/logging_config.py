@@ -0,0 +1,67 @@
+# backend/app/core/logging_config.py
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Optional
+
+from backend.app.core.config import settings
+
+# Handlers write to stderr from a QueueListener thread, so a log call on the
+# request path only does a queue.put() instead of a blocking stream write.
+
+LOG_FORMAT = "%(asctime)s %(levelname)-5s [%(name)s] %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.Handler] = None
+_hooks_registered = False
+
+
+def setup_logging(level: Optional[str] = None) -> None:
+    """Routes the `backend` logger tree through a non-blocking queue. Safe to call more than once."""
+    global _listener, _handler, _hooks_registered
+    logger = logging.getLogger("backend")
+    logger.setLevel((level or settings.LOG_LEVEL).upper())
+    if _listener is not None:
+        return
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    if not _hooks_registered:
+        atexit.register(shutdown_logging)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+        _hooks_registered = True
+
+    _handler = logging.handlers.QueueHandler(log_queue)
+    logger.addHandler(_handler)
+    logger.propagate = False # uvicorn configures the root logger; don't print everything twice
+
+
+def _restart_after_fork() -> None:
+    # A forked child (gunicorn preload workers) inherits the handler but not the listener thread,
+    # so records would pile up in the queue unwritten. Give the child its own queue and listener.
+    global _listener, _handler
+    if _listener is None:
+        return
+    logging.getLogger("backend").removeHandler(_handler)
+    _listener, _handler = None, None
+    setup_logging(logging.getLevelName(logging.getLogger("backend").level))
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and stops the listener thread."""
+    global _listener, _handler
+    logger = logging.getLogger("backend")
+    if _handler is not None:
+        logger.removeHandler(_handler)
+        logger.propagate = True
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
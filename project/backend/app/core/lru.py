@@ -0,0 +1,76 @@
+# backend/app/core/lru.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU map with an optional per-entry TTL (seconds).
+    Used for the in-process caches in services/ (conversation memory, etc.).
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError("LRUCache maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of the live (unexpired) entries, least recently used first. Doesn't touch recency."""
+        with self._lock:
+            now = time.monotonic()
+            return [
+                (key, value) for key, (stored_at, value) in self._data.items()
+                if self.ttl is None or now - stored_at <= self.ttl
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
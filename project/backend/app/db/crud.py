@@ -1,5 +1,10 @@
 # backend/app/db/crud.py
+import logging
+from sqlalchemy import func, select, update, insert, literal, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
 from . import models
 from ..schemas import user as user_schemas
 from ..schemas import session as session_schemas
@@ -7,6 +12,31 @@ from ..schemas import message as message_schemas # Will use later
 
 from backend.app.db import models
 from backend.app import schemas
+from backend.app.db.write_behind import get_active_write_behind
+
+logger = logging.getLogger(__name__)
+
+
+def _pending_snapshot(session_id: int):
+    # Messages still queued in the write-behind log (if enabled). Take the snapshot *before*
+    # querying: a batch flushed in between then shows up in one of the two, and duplicates
+    # are dropped by id in _merge_pending.
+    write_behind = get_active_write_behind()
+    return write_behind.pending_for_session(session_id) if write_behind is not None else []
+
+
+def _merge_pending(db_rows, pending, after_id: Optional[int] = None, before_id: Optional[int] = None):
+    """db_rows + matching pending messages, in id order."""
+    if not pending:
+        return list(db_rows)
+    seen = {row.id for row in db_rows}
+    extra = [
+        row for row in pending
+        if row.id not in seen
+        and (after_id is None or row.id > after_id)
+        and (before_id is None or row.id < before_id)
+    ]
+    return sorted([*db_rows, *extra], key=lambda row: row.id)
 
 # --- User CRUD ---
 def get_user(db: Session, user_id: int):
@@ -22,20 +52,59 @@ def create_user(db: Session, user: user_schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
+def get_or_create_user(db: Session, user: user_schemas.UserCreate):
+    """
+    Login upsert: returns the (name, topic) user, creating it if needed, in one
+    statement that is safe against concurrent logins for the same pair.
+
+    - Postgres: WITH ins AS (INSERT ... ON CONFLICT DO NOTHING RETURNING ...)
+      SELECT FROM ins UNION ALL SELECT the existing row
+    - SQLite: INSERT ... ON CONFLICT DO UPDATE (no-op) RETURNING, since SQLite
+      has no INSERT in CTEs. Writers are serialized there, so nothing can race.
+    - anything else: SELECT, then INSERT, re-reading on a unique violation
+    """
+    columns = (models.User.id, models.User.name, models.User.topic_of_interest, models.User.created_at)
+    values = {"name": user.name, "topic_of_interest": user.topic_of_interest}
+    conflict_columns = ["name", "topic_of_interest"] # _user_name_topic_uc
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        inserted = pg_insert(models.User).values(**values)\
+            .on_conflict_do_nothing(index_elements=conflict_columns)\
+            .returning(*columns)\
+            .cte("inserted")
+        existing = select(*columns).where(models.User.name == user.name, models.User.topic_of_interest == user.topic_of_interest)
+        row = db.execute(select(inserted).union_all(existing).limit(1)).first()
+        db.commit()
+        if row is None:
+            # The conflicting row was committed by a concurrent login after this statement's
+            # snapshot was taken: DO NOTHING skipped it and the SELECT couldn't see it yet
+            row = get_user_by_name_and_topic(db, name=user.name, topic=user.topic_of_interest)
+        return row
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(models.User).values(**values)
+        stmt = stmt.on_conflict_do_update(index_elements=conflict_columns, set_={"name": stmt.excluded.name})\
+            .returning(*columns)
+        row = db.execute(stmt).first()
+        db.commit()
+        return row
+
+    existing = get_user_by_name_and_topic(db, name=user.name, topic=user.topic_of_interest)
+    if existing is not None:
+        return existing
+    try:
+        return create_user(db, user=user)
+    except IntegrityError:
+        db.rollback()
+        return get_user_by_name_and_topic(db, name=user.name, topic=user.topic_of_interest)
+
 # --- ChatSession CRUD (Basic stubs for now) ---
 def get_session(db: Session, session_id: int):
     return db.query(models.ChatSession).filter(models.ChatSession.id == session_id).first()
 
-def get_sessions_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.ChatSession).filter(models.ChatSession.user_id == user_id).offset(skip).limit(limit).all()
-
-def create_chat_session(db: Session, session: schemas.session.ChatSessionCreate, user_id: int):
-    db_session = models.ChatSession(**session.model_dump(), user_id=user_id)
-    db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
-    return db_session
-
 # --- ChatMessage CRUD (Basic stubs for now) ---
 # def create_chat_message(db: Session, message: schemas.message.ChatMessageCreateInternal):
 #     db_message = models.ChatMessage(
@@ -50,7 +119,7 @@ def create_chat_session(db: Session, session: schemas.session.ChatSessionCreate,
 # backend/app/db/crud.py
 # ...
 def create_chat_message(db: Session, message: schemas.message.ChatMessageCreateInternal) -> models.ChatMessage:
-    print(f"[CRUD] create_chat_message called. Session ID: {message.session_id}, Sender: {message.sender_type}, Content: {message.content[:50]}") # DEBUG
+    logger.debug("create_chat_message called. Session ID: %s, Sender: %s, Content: %.50s", message.session_id, message.sender_type, message.content)
     try:
         db_message = models.ChatMessage(
             session_id=message.session_id,
@@ -60,20 +129,44 @@ def create_chat_message(db: Session, message: schemas.message.ChatMessageCreateI
         db.add(db_message)
         db.commit()
         db.refresh(db_message)
-        print(f"[CRUD] Message committed to DB. ID: {db_message.id}") # DEBUG
+        logger.debug("Message committed to DB. ID: %s", db_message.id)
         return db_message
     except Exception as e:
-        print(f"[CRUD] ERROR during DB commit for chat message: {e}") # DEBUG
+        logger.error("ERROR during DB commit for chat message: %s", e)
         db.rollback() # Rollback on error
         raise # Re-raise
 
-def get_messages_by_session(db: Session, session_id: int, skip: int = 0, limit: int = 1000):
-    return db.query(models.ChatMessage)\
-             .filter(models.ChatMessage.session_id == session_id)\
-             .order_by(models.ChatMessage.timestamp.asc())\
-             .offset(skip)\
-             .limit(limit)\
-             .all()
+def get_messages_by_session(
+    db: Session,
+    session_id: int,
+    skip: int = 0,
+    limit: int = 1000,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None
+):
+    """
+    Messages of a session in id (= insertion) order.
+    after_id / before_id are keyset cursors served by the (session_id, id) index,
+    so a page costs O(limit) no matter how deep into the history it is.
+    With before_id the page is the `limit` messages just before it (scrolling back).
+    skip is the old OFFSET pagination, kept for existing clients.
+    """
+    pending = _pending_snapshot(session_id) if skip == 0 else [] # the overlay can't honour an offset
+    query = db.query(models.ChatMessage).filter(models.ChatMessage.session_id == session_id)
+    if after_id is not None:
+        query = query.filter(models.ChatMessage.id > after_id)
+    if before_id is not None:
+        messages = query.filter(models.ChatMessage.id < before_id)\
+                        .order_by(models.ChatMessage.id.desc())\
+                        .offset(skip)\
+                        .limit(limit)\
+                        .all()
+        return _merge_pending(list(reversed(messages)), pending, after_id, before_id)[-limit:]
+    messages = query.order_by(models.ChatMessage.id.asc())\
+                    .offset(skip)\
+                    .limit(limit)\
+                    .all()
+    return _merge_pending(messages, pending, after_id, before_id)[:limit]
 
 # backend/app/db/crud.py
 def create_chat_session(db: Session, session_create: schemas.session.ChatSessionCreate, user_id: int):
@@ -93,4 +186,156 @@ def get_sessions_by_user(db: Session, user_id: int, skip: int = 0, limit: int =
              .order_by(models.ChatSession.created_at.desc())\
              .offset(skip)\
              .limit(limit)\
-             .all()
\ No newline at end of file
+             .all()
+
+def get_sessions_if_user_exists(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> Optional[List[models.ChatSession]]:
+    """
+    A page of a user's sessions, newest first, or None if the user doesn't exist.
+    One round trip: users LEFT JOIN chat_sessions, so the existence check rides along with the list.
+    Only a page past the end (skip > 0, no rows) needs a second lookup to tell the two apart.
+    """
+    rows = db.query(models.User.id, models.ChatSession)\
+             .outerjoin(models.ChatSession, models.ChatSession.user_id == models.User.id)\
+             .filter(models.User.id == user_id)\
+             .order_by(models.ChatSession.created_at.desc(), models.ChatSession.id.desc())\
+             .offset(skip)\
+             .limit(limit)\
+             .all()
+    if not rows:
+        return [] if skip and get_user(db, user_id=user_id) is not None else None
+    return [chat_session for _, chat_session in rows if chat_session is not None]
+
+def create_chat_session_if_user_exists(db: Session, session_create: schemas.session.ChatSessionCreate, user_id: int) -> Optional[models.ChatSession]:
+    """
+    INSERT ... SELECT ... WHERE EXISTS (user) RETURNING: creates the session and checks the
+    user in one statement. Returns None (nothing inserted) if the user doesn't exist.
+    """
+    user_exists = select(models.User.id).where(models.User.id == user_id).exists()
+    result = db.execute(
+        insert(models.ChatSession)
+        .from_select(
+            ["user_id", "session_name"],
+            select(literal(user_id), literal(session_create.session_name)).where(user_exists)
+        )
+        .returning(models.ChatSession)
+    )
+    db_session = result.scalars().first()
+    db.commit()
+    return db_session
+
+# --- Async variants (used by the chat path) ---
+async def get_session_async(db: AsyncSession, session_id: int):
+    result = await db.execute(select(models.ChatSession).where(models.ChatSession.id == session_id))
+    return result.scalars().first()
+
+async def get_session_head_async(db: AsyncSession, session_id: int) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """
+    (summary_upto_message_id, newest message id) of a session, or None if it doesn't exist.
+    One primary-key lookup plus a max() on the (session_id, id) index.
+    """
+    pending = _pending_snapshot(session_id)
+    newest_id = (
+        select(func.max(models.ChatMessage.id))
+        .where(models.ChatMessage.session_id == session_id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(models.ChatSession.summary_upto_message_id, newest_id).where(models.ChatSession.id == session_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    summary_upto_id, newest = row
+    if pending:
+        newest = max(newest or 0, pending[-1].id)
+    return summary_upto_id, newest
+
+async def create_chat_message_async(db: AsyncSession, message: schemas.message.ChatMessageCreateInternal) -> models.ChatMessage:
+    write_behind = get_active_write_behind()
+    if write_behind is not None:
+        return (await write_behind.submit([message]))[0]
+    try:
+        db_message = models.ChatMessage(
+            session_id=message.session_id,
+            sender_type=message.sender_type,
+            content=message.content
+        )
+        db.add(db_message)
+        await db.commit()
+        await db.refresh(db_message)
+        return db_message
+    except Exception as e:
+        logger.error("ERROR during DB commit for chat message: %s", e)
+        await db.rollback() # Rollback on error
+        raise # Re-raise
+
+async def create_chat_turn_async(db: AsyncSession, messages: List[schemas.message.ChatMessageCreateInternal]) -> List[models.ChatMessage]:
+    """
+    Inserts all messages of a chat turn (user + AI) in one multi-row
+    INSERT ... RETURNING and commits once, instead of add/commit/refresh per message.
+    Returned rows are in the same order as `messages`.
+    With write-behind enabled the rows are queued for a group commit instead
+    (see db/write_behind.py) and returned as ChatMessage schemas with their final ids.
+    """
+    write_behind = get_active_write_behind()
+    if write_behind is not None:
+        return await write_behind.submit(messages)
+    try:
+        result = await db.execute(
+            insert(models.ChatMessage).returning(models.ChatMessage, sort_by_parameter_order=True),
+            [
+                {"session_id": message.session_id, "sender_type": message.sender_type, "content": message.content}
+                for message in messages
+            ]
+        )
+        db_messages = list(result.scalars().all())
+        await db.commit()
+        return db_messages
+    except Exception as e:
+        logger.error("ERROR during DB commit for chat turn: %s", e)
+        await db.rollback() # Rollback on error
+        raise # Re-raise
+
+async def get_messages_by_session_async(db: AsyncSession, session_id: int, skip: int = 0, limit: int = 1000):
+    pending = _pending_snapshot(session_id) if skip == 0 else []
+    result = await db.execute(
+        select(models.ChatMessage)
+        .where(models.ChatMessage.session_id == session_id)
+        .order_by(models.ChatMessage.id.asc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return _merge_pending(result.scalars().all(), pending)[:limit]
+
+async def get_recent_messages_async(db: AsyncSession, session_id: int, after_id: Optional[int] = None, limit: int = 50):
+    """Newest `limit` messages of a session (optionally only those after `after_id`), oldest first."""
+    pending = _pending_snapshot(session_id)
+    query = select(models.ChatMessage).where(models.ChatMessage.session_id == session_id)
+    if after_id is not None:
+        query = query.where(models.ChatMessage.id > after_id)
+    result = await db.execute(query.order_by(models.ChatMessage.id.desc()).limit(limit))
+    return _merge_pending(list(reversed(result.scalars().all())), pending, after_id)[-limit:]
+
+async def get_messages_after_async(db: AsyncSession, session_id: int, after_id: Optional[int] = None):
+    pending = _pending_snapshot(session_id)
+    query = select(models.ChatMessage).where(models.ChatMessage.session_id == session_id)
+    if after_id is not None:
+        query = query.where(models.ChatMessage.id > after_id)
+    result = await db.execute(query.order_by(models.ChatMessage.id.asc()))
+    return _merge_pending(result.scalars().all(), pending, after_id)
+
+async def update_session_summary_async(db: AsyncSession, session_id: int, summary: str, upto_message_id: int) -> bool:
+    """Stores a new rolling summary unless a newer one is already there. Returns whether it was written."""
+    result = await db.execute(
+        update(models.ChatSession)
+        .where(
+            models.ChatSession.id == session_id,
+            or_(
+                models.ChatSession.summary_upto_message_id.is_(None),
+                models.ChatSession.summary_upto_message_id < upto_message_id
+            )
+        )
+        .values(summary=summary, summary_upto_message_id=upto_message_id)
+    )
+    await db.commit()
+    return result.rowcount > 0
@@ -1,18 +1,56 @@
 # backend/app/db/database.py
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from backend.app.core.config import settings
+from backend.app.db.pool import (
+    InstrumentedAsyncAdaptedQueuePool, InstrumentedQueuePool, pool_kwargs, register_pool_gauges, register_query_counter
+)
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+# Async drivers used for each sync backend when ASYNC_DATABASE_URL is not given
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+def _async_database_url(url: str) -> str:
+    url_obj = make_url(url)
+    backend = url_obj.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{backend}', set ASYNC_DATABASE_URL explicitly")
+    return url_obj.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL or _async_database_url(SQLALCHEMY_DATABASE_URL)
+
+_connect_args = {}
+if make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "sqlite":
+    _connect_args["check_same_thread"] = False # Only needed for SQLite (local runs / benchmarks)
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL
-    # connect_args={"check_same_thread": False} # Only needed for SQLite, not for PostgreSQL
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=_connect_args,
+    **pool_kwargs(SQLALCHEMY_DATABASE_URL, InstrumentedQueuePool)
 )
+register_pool_gauges(engine, "sync")
+register_query_counter(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the chat path, so a request waiting on the LLM doesn't hold a threadpool worker
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **pool_kwargs(ASYNC_SQLALCHEMY_DATABASE_URL, InstrumentedAsyncAdaptedQueuePool)
+)
+register_pool_gauges(async_engine.sync_engine, "async")
+register_query_counter(async_engine.sync_engine, "async")
+
+# expire_on_commit=False: committed objects are still read after the commit (e.g. for the response)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency to get DB session
@@ -23,7 +61,12 @@ def get_db():
     finally:
         db.close()
 
+# Async counterpart of get_db
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Function to create all tables in the database
 # This is for initial setup. In a production app, you'd use migrations (e.g., Alembic).
 def create_db_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
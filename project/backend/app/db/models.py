@@ -1,5 +1,5 @@
 # backend/app/db/models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base # We will create this Base in database.py
@@ -7,13 +7,14 @@ from .database import Base # We will create this Base in database.py
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True, nullable=False)
-    topic_of_interest = Column(String, index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    topic_of_interest = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     chat_sessions = relationship("ChatSession", back_populates="user")
 
+    # Login looks users up by (name, topic); the unique constraint's index serves that
     __table_args__ = (UniqueConstraint('name', 'topic_of_interest', name='_user_name_topic_uc'),)
 
     def __repr__(self):
@@ -23,14 +24,21 @@ class User(Base):
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    session_name = Column(String, index=True, default="New Chat") # Or generate one
+    session_name = Column(String, default="New Chat") # Or generate one
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Rolling summary of the conversation up to (and including) summary_upto_message_id,
+    # maintained off the request path by services/summarizer.py
+    summary = Column(Text, nullable=True)
+    summary_upto_message_id = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="chat_sessions")
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan")
 
+    # Session lists: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+    __table_args__ = (Index("ix_chat_sessions_user_id_created_at", "user_id", "created_at", "id"),)
+
     def __repr__(self):
         return f"<ChatSession(id={self.id}, user_id={self.user_id}, name='{self.session_name}')>"
 
@@ -38,7 +46,7 @@ class ChatSession(Base):
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False)
     sender_type = Column(String, nullable=False)  # "user" or "ai"
     content = Column(Text, nullable=False)
@@ -46,5 +54,8 @@ class ChatMessage(Base):
 
     session = relationship("ChatSession", back_populates="messages")
 
+    # Every message read is "messages of session X in id order", optionally after/before a cursor id
+    __table_args__ = (Index("ix_chat_messages_session_id_id", "session_id", "id"),)
+
     def __repr__(self):
         return f"<ChatMessage(id={self.id}, session_id={self.session_id}, sender='{self.sender_type}')>"
\ No newline at end of file
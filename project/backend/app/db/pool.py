@@ -0,0 +1,113 @@
+# backend/app/db/pool.py
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from backend.app.core.config import settings
+from backend.app.core.metrics import REGISTRY
+
+# Connection pool metrics, labelled by pool ("sync" = SessionLocal, "async" = AsyncSessionLocal).
+# checkout = the whole pool._do_get call (includes opening a new connection),
+# wait = only checkouts that found the pool and its overflow exhausted and had to block.
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+POOL_CHECKOUT_SECONDS = REGISTRY.histogram(
+    "db_pool_checkout_seconds", "Time to get a connection from the pool", ("pool",), CHECKOUT_BUCKETS
+)
+POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "db_pool_wait_seconds", "Time spent blocked on an exhausted pool", ("pool",), CHECKOUT_BUCKETS
+)
+POOL_OVERFLOW_TOTAL = REGISTRY.counter(
+    "db_pool_overflow_total", "Connections opened beyond pool_size (overflow)", ("pool",)
+)
+POOL_TIMEOUTS_TOTAL = REGISTRY.counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after pool_timeout", ("pool",)
+)
+DB_QUERIES_TOTAL = REGISTRY.counter("db_queries_total", "SQL statements executed", ("pool",))
+POOL_CHECKED_OUT = REGISTRY.gauge("db_pool_checked_out", "Connections currently checked out", ("pool",))
+POOL_SIZE = REGISTRY.gauge("db_pool_size", "Configured pool_size", ("pool",))
+POOL_OVERFLOW = REGISTRY.gauge("db_pool_overflow", "Current overflow (negative while below pool_size)", ("pool",))
+
+
+class _InstrumentedPoolMixin:
+    metrics_name = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        overflow_before = self._overflow
+        # Same condition QueuePool uses to decide it has to block on the queue
+        exhausted = self._pool.empty() and -1 < self._max_overflow <= self._overflow
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS_TOTAL.inc(pool=self.metrics_name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            POOL_CHECKOUT_SECONDS.observe(elapsed, pool=self.metrics_name)
+            if exhausted:
+                POOL_WAIT_SECONDS.observe(elapsed, pool=self.metrics_name)
+        if self._overflow > overflow_before and self._overflow > 0:
+            POOL_OVERFLOW_TOTAL.inc(pool=self.metrics_name)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics_name = "sync"
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+# SQLAlchemy names a pool's logger after its class (backend.app.db.pool.Instrumented...), which
+# would put checkout/return chatter under the app's "backend" logger. Keep it at SQLAlchemy's
+# usual level; set echo_pool on the engine to see it.
+for _pool_class in (InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool):
+    logging.getLogger(f"{_pool_class.__module__}.{_pool_class.__name__}").setLevel(logging.WARNING)
+
+
+def pool_kwargs(url: str, poolclass: type) -> Dict[str, Any]:
+    """create_engine() pool arguments from Settings. In-memory SQLite keeps SQLAlchemy's default pool."""
+    url_obj = make_url(url)
+    if url_obj.get_backend_name() == "sqlite" and url_obj.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def register_pool_gauges(engine: Engine, name: str) -> None:
+    # Read engine.pool at scrape time, dispose() swaps in a new pool object
+    def _read(attr: str) -> float:
+        pool = engine.pool
+        return getattr(pool, attr)() if hasattr(pool, attr) else 0
+
+    POOL_CHECKED_OUT.set_function(lambda: _read("checkedout"), pool=name)
+    POOL_SIZE.set_function(lambda: _read("size"), pool=name)
+    POOL_OVERFLOW.set_function(lambda: _read("overflow"), pool=name)
+
+
+def register_query_counter(engine: Engine, name: str) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(*args) -> None:
+        DB_QUERIES_TOTAL.inc(pool=name)
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Point-in-time pool counters for /readyz (pools without them, e.g. in-memory SQLite's, report only the class)."""
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    for attr in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, attr):
+            status[attr] = getattr(pool, attr)()
+    return status
@@ -0,0 +1,330 @@
+# backend/app/db/write_behind.py
+import logging
+import asyncio
+import datetime
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from backend.app.schemas import message as message_schemas
+from backend.app.core.config import settings
+from backend.app.core.lru import LRUCache
+from backend.app.core.metrics import REGISTRY
+from backend.app.db import models
+from backend.app.db.database import AsyncSessionLocal, async_engine
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_QUEUE_DEPTH = REGISTRY.gauge("write_behind_queue_depth", "Chat turns waiting to be flushed")
+WRITE_BEHIND_FLUSH_ROWS = REGISTRY.histogram(
+    "write_behind_flush_rows", "Messages per group commit", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+WRITE_BEHIND_FLUSH_SECONDS = REGISTRY.histogram("write_behind_flush_seconds", "Time to insert + commit one batch")
+WRITE_BEHIND_FLUSH_ERRORS = REGISTRY.counter("write_behind_flush_errors_total", "Failed flush attempts")
+WRITE_BEHIND_REJECTED = REGISTRY.counter(
+    "write_behind_rejected_messages_total", "Messages the database refused (constraint or data errors)"
+)
+WRITE_BEHIND_DROPPED = REGISTRY.counter(
+    "write_behind_dropped_messages_total", "Messages still unwritten when the shutdown deadline passed"
+)
+WRITE_BEHIND_BACKPRESSURE = REGISTRY.counter(
+    "write_behind_backpressure_total", "Submits that had to wait for room in the queue"
+)
+
+
+class UnknownSessionError(ValueError):
+    """Messages were sent to chat sessions that don't exist (raised by submit() and by the chat service)."""
+
+    def __init__(self, session_ids: List[int]):
+        super().__init__(f"Unknown chat session(s): {', '.join(map(str, session_ids))}")
+        self.session_ids = session_ids
+
+
+def _is_transient(error: Exception) -> bool:
+    # Connection trouble or a database that is down or restarting: the rows themselves are fine
+    if isinstance(error, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+class IdAllocator:
+    """Hands out final chat_messages ids before the rows are written, so replies and reads can use them right away."""
+
+    async def allocate(self, n: int) -> List[int]:
+        raise NotImplementedError
+
+
+class PostgresSequenceAllocator(IdAllocator):
+    # nextval() is not transactional and needs no commit: one cheap round trip per turn, and ids
+    # stay monotonic across worker processes (keyset pagination relies on id order)
+    def __init__(self, engine: AsyncEngine, table: str = "chat_messages", column: str = "id"):
+        self.engine = engine
+        self._sql = text(
+            f"SELECT nextval(pg_get_serial_sequence('{table}', '{column}')) FROM generate_series(1, :n)"
+        )
+
+    async def allocate(self, n: int) -> List[int]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(self._sql, {"n": n})
+            return [row[0] for row in result]
+
+
+class LocalIdAllocator(IdAllocator):
+    # SQLite has no sequence to share: count up from max(id) in this process.
+    # Only safe with a single writer process (local runs, benchmarks).
+    def __init__(self, session_factory: async_sessionmaker):
+        self.session_factory = session_factory
+        self._next: Optional[int] = None
+        self._lock = asyncio.Lock()
+
+    async def allocate(self, n: int) -> List[int]:
+        async with self._lock:
+            if self._next is None:
+                async with self.session_factory() as db:
+                    self._next = ((await db.execute(select(func.max(models.ChatMessage.id)))).scalar() or 0) + 1
+            ids = list(range(self._next, self._next + n))
+            self._next += n
+            return ids
+
+
+class MessageWriteBehind:
+    """
+    Write-behind log for chat messages.
+
+    submit() allocates ids, records the messages in an in-memory overlay and
+    queues them; it returns without waiting for the INSERT. A background task
+    drains the queue and writes everything that is ready (up to `batch_size`
+    rows, or whatever arrived within `flush_interval` seconds) with one
+    multi-row INSERT and one commit, so concurrent sessions share commits.
+
+    - reads: crud merges pending_for_session() into its results, so messages
+      are visible before they are flushed
+    - backpressure: the queue holds at most `max_queue` turns; submit() waits
+      for room instead of growing memory without bound
+    - validation: submit() raises UnknownSessionError for a session that
+      doesn't exist, so a bad row never reaches a shared batch
+    - errors: a batch the database refuses is split in halves until the
+      offending rows are isolated; only those are rejected. Transient errors
+      (database unreachable) are retried with backoff capped at `max_backoff`
+      seconds for as long as it takes, while the queue fills and submit()
+      applies backpressure
+    - shutdown: stop() flushes everything still queued, including turns
+      submitted while it drains; only rows still unwritten after its `timeout`
+      are dropped. submit() raises once stop() has returned
+    """
+
+    def __init__(
+        self,
+        allocator: IdAllocator,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.02,
+        max_backoff: float = 5.0,
+        known_sessions: int = 100000
+    ):
+        self.allocator = allocator
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        # Sessions are never deleted, so a session seen once stays valid
+        self._known_sessions = LRUCache(maxsize=known_sessions)
+        self._give_up_at: Optional[float] = None # loop time set by stop(timeout)
+        self._queue: "asyncio.Queue[Optional[List[message_schemas.ChatMessage]]]" = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._submitting = 0 # submit() calls that haven't queued their rows yet
+        self._stopped = False
+        # session_id -> {message id -> message}; read from sync endpoints' threadpool too, hence the lock
+        self._pending: Dict[int, Dict[int, message_schemas.ChatMessage]] = defaultdict(dict)
+        self._pending_lock = threading.Lock()
+        WRITE_BEHIND_QUEUE_DEPTH.set_function(self._queue.qsize)
+
+    @classmethod
+    def from_settings(cls) -> "MessageWriteBehind":
+        if async_engine.dialect.name == "postgresql":
+            allocator: IdAllocator = PostgresSequenceAllocator(async_engine)
+        else:
+            allocator = LocalIdAllocator(AsyncSessionLocal)
+        return cls(
+            allocator=allocator,
+            max_queue=settings.WRITE_BEHIND_MAX_QUEUE,
+            batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+            flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+            max_backoff=settings.WRITE_BEHIND_MAX_BACKOFF_SECONDS,
+        )
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Flushes the queue and stops; with `timeout`, rows still failing to write after that many seconds are dropped."""
+        if self._task is None:
+            return
+        if timeout is not None:
+            self._give_up_at = asyncio.get_running_loop().time() + timeout
+        await self._queue.put(None) # Sentinel: flush what's ahead of it and what is still being submitted, then exit
+        await self._task
+        self._task = None
+        self._stopped = True
+
+    async def _check_sessions(self, session_ids: Set[int]) -> None:
+        unchecked = [session_id for session_id in session_ids if self._known_sessions.get(session_id) is None]
+        if not unchecked:
+            return
+        async with self.session_factory() as db:
+            found = set((await db.execute(
+                select(models.ChatSession.id).where(models.ChatSession.id.in_(unchecked))
+            )).scalars())
+        for session_id in found:
+            self._known_sessions.set(session_id, True)
+        missing = sorted(set(unchecked) - found)
+        if missing:
+            raise UnknownSessionError(missing)
+
+    async def submit(self, messages: List[message_schemas.ChatMessageCreateInternal]) -> List[message_schemas.ChatMessage]:
+        if self._stopped:
+            raise RuntimeError("The write-behind log is stopped")
+        self._submitting += 1
+        try:
+            return await self._submit(messages)
+        finally:
+            self._submitting -= 1
+
+    async def _submit(self, messages: List[message_schemas.ChatMessageCreateInternal]) -> List[message_schemas.ChatMessage]:
+        await self._check_sessions({message.session_id for message in messages})
+        ids = await self.allocator.allocate(len(messages))
+        now = datetime.datetime.now(datetime.timezone.utc)
+        rows = [
+            message_schemas.ChatMessage(
+                id=message_id, session_id=message.session_id, sender_type=message.sender_type,
+                content=message.content, timestamp=now
+            )
+            for message_id, message in zip(ids, messages)
+        ]
+        with self._pending_lock:
+            for row in rows:
+                self._pending[row.session_id][row.id] = row
+        if self._queue.full():
+            WRITE_BEHIND_BACKPRESSURE.inc()
+        await self._queue.put(rows)
+        return rows
+
+    def pending_for_session(self, session_id: int) -> List[message_schemas.ChatMessage]:
+        with self._pending_lock:
+            pending = self._pending.get(session_id)
+            return sorted(pending.values(), key=lambda row: row.id) if pending else []
+
+    def _forget(self, rows: List[message_schemas.ChatMessage]) -> None:
+        with self._pending_lock:
+            for row in rows:
+                pending = self._pending.get(row.session_id)
+                if pending is None:
+                    continue
+                pending.pop(row.id, None)
+                if not pending:
+                    del self._pending[row.session_id]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = list(item)
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait() # Take whatever is already waiting first
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.extend(item)
+            await self._flush(batch)
+        # Turns that were still being submitted when stop() queued the sentinel
+        while self._submitting or not self._queue.empty():
+            if self._give_up_at is not None and loop.time() >= self._give_up_at:
+                logger.error("Shutting down with %d message submit(s) still in progress", self._submitting)
+                break
+            leftover = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    leftover.extend(item)
+            if leftover:
+                await self._flush(leftover)
+            else:
+                await asyncio.sleep(self.flush_interval)
+
+    async def _insert(self, rows: List[message_schemas.ChatMessage]) -> None:
+        async with self.session_factory() as db:
+            await db.execute(insert(models.ChatMessage), [row.model_dump() for row in rows])
+            await db.commit()
+
+    async def _flush(self, rows: List[message_schemas.ChatMessage]) -> None:
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                await self._insert(rows)
+                WRITE_BEHIND_FLUSH_SECONDS.observe(time.perf_counter() - started)
+                WRITE_BEHIND_FLUSH_ROWS.observe(len(rows))
+                self._forget(rows)
+                return
+            except Exception as e:
+                WRITE_BEHIND_FLUSH_ERRORS.inc()
+                if not _is_transient(e):
+                    error = e
+                    break
+                attempt += 1
+                delay = min(self.max_backoff, 0.1 * 2 ** attempt)
+                if self._give_up_at is not None:
+                    remaining = self._give_up_at - loop.time()
+                    if remaining <= 0:
+                        WRITE_BEHIND_DROPPED.inc(len(rows))
+                        logger.error("Shutting down: giving up on %d messages, ids %s: %s", len(rows), [row.id for row in rows], e)
+                        self._forget(rows)
+                        return
+                    delay = min(delay, remaining)
+                logger.warning("Flush of %d messages failed (attempt %d), retrying in %.1fs: %s", len(rows), attempt, delay, e)
+                await asyncio.sleep(delay)
+
+        # The database refused the batch (constraint, bad value): one bad row fails the whole
+        # INSERT, so split it until the bad rows are alone and write the rest
+        if len(rows) == 1:
+            WRITE_BEHIND_REJECTED.inc()
+            logger.error("Rejected message %d for session %d: %s", rows[0].id, rows[0].session_id, error)
+            self._forget(rows)
+            return
+        middle = len(rows) // 2
+        await self._flush(rows[:middle])
+        await self._flush(rows[middle:])
+
+
+# Set by main.py's lifespan when WRITE_BEHIND_ENABLED; crud routes turn inserts and reads through it
+_active: Optional[MessageWriteBehind] = None
+
+
+def get_active_write_behind() -> Optional[MessageWriteBehind]:
+    return _active
+
+
+def set_active_write_behind(write_behind: Optional[MessageWriteBehind]) -> None:
+    global _active
+    _active = write_behind
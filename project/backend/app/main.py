@@ -1,25 +1,112 @@
 # backend/app/main.py
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import text
 
 from .api.v1 import api as api_v1 # Import the v1 api router
-from .db.database import create_db_tables # Import the function to create tables
+from .db.database import async_engine, create_db_tables # Import the function to create tables
+from .db.pool import pool_status
 from .core.config import settings # To access settings if needed
+from .core.logging_config import setup_logging, shutdown_logging
+from .core.instrumentation import InstrumentationMiddleware, RequestProfiler
+from .core.metrics import REGISTRY, PROMETHEUS_CONTENT_TYPE
+from .core.lifecycle import generation_tracker
+from .services.llm_pool import LLMClientPool
+from .services.summarizer import SessionCompactor
+from .rag.retriever import Retriever
+from .services.response_cache import ResponseCache
+from .db.write_behind import MessageWriteBehind, set_active_write_behind
 
-# Call this function to create tables when the app starts
-# In a real app, you might run this once manually or use migrations.
-# For this project, creating them on startup if they don't exist is fine.
+logger = logging.getLogger(__name__)
+
+# Schema changes go through Alembic (backend/migrations), run before the app starts.
+# create_all at startup is only for throwaway local databases (DB_CREATE_TABLES_ON_STARTUP).
 def create_tables_on_startup():
-    print("Attempting to create database tables...")
+    logger.info("Attempting to create database tables...")
     try:
         create_db_tables()
-        print("Database tables checked/created successfully.")
+        logger.info("Database tables checked/created successfully.")
     except Exception as e:
-        print(f"Error creating database tables: {e}")
+        logger.error("Error creating database tables: %s", e)
         # Depending on the error, you might want to exit or handle it differently
         # For example, if the DB is not reachable, the app won't work anyway.
 
-app = FastAPI(title="Gemini Chatbot API")
+async def warm_up_in_background(app: FastAPI):
+    """One-time setup that used to delay startup: LLM clients, the embedding client, the optional LLM ping, a DB connection."""
+    started = time.perf_counter()
+    try:
+        await ping_database()
+        if settings.LLM_WARMUP:
+            await app.state.llm_pool.warm_up()
+        else:
+            await app.state.llm_pool.ensure_clients()
+        if app.state.retriever is not None:
+            await asyncio.to_thread(app.state.retriever.embedder.warm_up)
+        logger.info("Background warm-up finished in %.2fs.", time.perf_counter() - started)
+    except Exception as e:
+        # Requests retry the same setup on first use
+        logger.warning("Background warm-up failed: %s", e)
+
+async def ping_database() -> None:
+    # Also leaves an open connection in the async pool for the first request
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+# --- Lifespan ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("FastAPI application startup...")
+    if settings.DB_CREATE_TABLES_ON_STARTUP:
+        create_tables_on_startup()
+    # Optional write-behind log: chat turn inserts are group-committed by a background flusher
+    app.state.write_behind = None
+    if settings.WRITE_BEHIND_ENABLED:
+        app.state.write_behind = MessageWriteBehind.from_settings()
+        app.state.write_behind.start()
+        set_active_write_behind(app.state.write_behind)
+    # One shared LLM client pool per process, borrowed by ChatService on each request.
+    # Its clients are built by the background warm-up below (or by the first request needing one).
+    app.state.llm_pool = LLMClientPool.from_settings()
+    # Background worker that keeps long sessions' rolling summaries up to date
+    app.state.session_compactor = None
+    if settings.SUMMARY_ENABLED:
+        app.state.session_compactor = SessionCompactor(llm_pool=app.state.llm_pool)
+        app.state.session_compactor.start()
+    # Retrieval index; chat turns pull top-k chunks from it once documents are ingested
+    app.state.retriever = Retriever.from_settings() if settings.RAG_ENABLED else None
+    app.state.response_cache = None
+    if settings.RESPONSE_CACHE_ENABLED:
+        embedder = app.state.retriever.embedder if app.state.retriever is not None else None
+        app.state.response_cache = ResponseCache.from_settings(embedder=embedder)
+    app.state.warmup_task = asyncio.create_task(warm_up_in_background(app))
+    yield
+    # Replies still being generated get to finish and be saved before the pools go away.
+    # Under gunicorn, uvicorn has already waited for open responses (backend/app/worker.py);
+    # this covers the rest, e.g. the save after a stream's last token.
+    remaining = await generation_tracker.drain(settings.SHUTDOWN_DRAIN_SECONDS)
+    if remaining:
+        logger.warning("Shutting down with %d chat generation(s) still running.", remaining)
+    if not app.state.warmup_task.done():
+        app.state.warmup_task.cancel()
+    if app.state.session_compactor is not None:
+        await app.state.session_compactor.stop()
+    await app.state.llm_pool.close()
+    if app.state.write_behind is not None:
+        # Turns keep going through the queue while it drains: a direct INSERT now could take an id
+        # the allocator already gave to a queued row. Only once it's empty do writes go to the DB.
+        await app.state.write_behind.stop(timeout=settings.SHUTDOWN_DRAIN_SECONDS)
+        set_active_write_behind(None)
+    shutdown_logging()
+
+setup_logging()
+
+app = FastAPI(title="Gemini Chatbot API", lifespan=lifespan)
 
 # --- Middleware ---
 # CORS (Cross-Origin Resource Sharing)
@@ -32,12 +119,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Event Handlers ---
-@app.on_event("startup")
-async def startup_event():
-    print("FastAPI application startup...")
-    create_tables_on_startup()
-    # You could also initialize other resources here, e.g., ML models if not done per-request
+# Request latency histograms, Server-Timing spans and (opt-in) per-request profiles
+app.add_middleware(
+    InstrumentationMiddleware,
+    profiler=RequestProfiler.from_settings() if settings.PROFILING_ENABLED else None
+)
 
 # --- Routers ---
 app.include_router(api_v1.api_router, prefix="/api/v1") # Include v1 of the API
@@ -45,4 +131,40 @@ app.include_router(api_v1.api_router, prefix="/api/v1") # Include v1 of the API
 # --- Basic Root Endpoint ---
 @app.get("/")
 async def root():
-    return {"message": "Welcome to the Gemini Chatbot API!"}
\ No newline at end of file
+    return {"message": "Welcome to the Gemini Chatbot API!"}
+
+# --- Health (per worker process) ---
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the worker's event loop is responding."""
+    return {"status": "ok", "pid": os.getpid()}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """
+    Readiness: this worker can serve chat turns now. 503 until its LLM clients are
+    built and the database answers, and again once it starts draining for shutdown.
+    """
+    llm_pool = app.state.llm_pool
+    try:
+        await asyncio.wait_for(ping_database(), settings.READINESS_DB_TIMEOUT_SECONDS)
+        db_ok, db_error = True, None
+    except Exception as e:
+        db_ok, db_error = False, str(e) or type(e).__name__
+    ready = llm_pool.ready and db_ok and not generation_tracker.draining
+    body = {
+        "status": "ready" if ready else "not ready",
+        "pid": os.getpid(),
+        "draining": generation_tracker.draining,
+        "generations_in_flight": generation_tracker.in_flight,
+        "warmup_done": app.state.warmup_task.done(),
+        "llm_pool": {"ready": llm_pool.ready, "warm": llm_pool.warm, "in_flight": llm_pool.in_flight},
+        "llm_gateway": llm_pool.gateway.stats() if llm_pool.gateway is not None else None,
+        "db": {"ok": db_ok, "error": db_error, **pool_status(async_engine.sync_engine)},
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+# --- Metrics (Prometheus text format) ---
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
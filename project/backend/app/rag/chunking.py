@@ -0,0 +1,48 @@
+# backend/app/rag/chunking.py
+from typing import List, Sequence
+
+# Tried in order: paragraphs, lines, sentences, words
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+def _split(text: str, chunk_size: int, separators: Sequence[str]) -> List[str]:
+    if len(text) <= chunk_size:
+        return [text]
+    if not separators:
+        return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    sep, rest = separators[0], separators[1:]
+    parts = text.split(sep)
+    pieces: List[str] = []
+    for i, part in enumerate(parts):
+        # Keep the separator on the piece so joining pieces back reproduces the text
+        if i < len(parts) - 1:
+            part += sep
+        if len(part) > chunk_size:
+            pieces.extend(_split(part, chunk_size, rest))
+        elif part:
+            pieces.append(part)
+    return pieces
+
+
+def chunk_text(text: str, chunk_size: int = 800, overlap: int = 100) -> List[str]:
+    """
+    Splits text into chunks of at most ~chunk_size characters on the coarsest
+    boundary that fits, carrying the last `overlap` characters of each chunk
+    into the next so facts spanning a boundary stay retrievable.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+    text = text.strip()
+    if not text:
+        return []
+
+    chunks: List[str] = []
+    current = ""
+    for piece in _split(text, chunk_size - overlap, SEPARATORS):
+        if current and len(current) + len(piece) > chunk_size:
+            chunks.append(current.strip())
+            current = current[-overlap:] if overlap else ""
+        current += piece
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
@@ -0,0 +1,94 @@
+# backend/app/rag/embeddings.py
+import hashlib
+import re
+import threading
+from typing import List, Sequence
+
+import numpy as np
+
+from backend.app.core.config import settings
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder:
+    """Turns texts into L2-normalized float32 vectors of a fixed dimension."""
+
+    dim: int
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_documents([text])[0]
+
+    def warm_up(self) -> None:
+        """Does any slow one-time setup now instead of on the first embed call."""
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic, dependency-free embedder: signed feature hashing of word
+    unigrams and bigrams. Not semantic, but stable across processes, which is
+    what tests and offline benchmarks need.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                matrix[row, bucket] += sign
+        return _normalize_rows(matrix)
+
+
+class GoogleEmbedder(Embedder):
+    """Gemini embeddings through langchain_google_genai. The client (and the SDK import) is created on first use."""
+
+    def __init__(self, model: str = "models/text-embedding-004", dim: int = 768):
+        self.dim = dim
+        self.model = model
+        self._client = None
+        self._client_lock = threading.Lock() # embeds run in worker threads
+
+    def _get_client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+                    self._client = GoogleGenerativeAIEmbeddings(model=self.model, google_api_key=settings.GOOGLE_API_KEY)
+        return self._client
+
+    def warm_up(self) -> None:
+        self._get_client()
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return _normalize_rows(np.asarray(self._get_client().embed_documents(list(texts)), dtype=np.float32))
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return _normalize_rows(np.asarray([self._get_client().embed_query(text)], dtype=np.float32))[0]
+
+
+def get_embedder() -> Embedder:
+    if settings.EMBEDDER == "hashing":
+        return HashingEmbedder(dim=settings.EMBEDDING_DIM)
+    if settings.EMBEDDER == "google":
+        return GoogleEmbedder(model=settings.EMBEDDING_MODEL, dim=settings.EMBEDDING_DIM)
+    raise ValueError(f"Unknown EMBEDDER '{settings.EMBEDDER}' (expected 'hashing' or 'google')")
@@ -0,0 +1,420 @@
+# backend/app/rag/index.py
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+import numpy as np
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class SearchHit(NamedTuple):
+    id: str
+    score: float
+    payload: Dict[str, Any]
+
+
+class VectorIndex:
+    """Cosine-similarity index over L2-normalized float32 vectors, keyed by string ids."""
+
+    dim: int
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def search(self, query: np.ndarray, k: int) -> List[SearchHit]:
+        raise NotImplementedError
+
+    def contains(self, id: str) -> bool:
+        raise NotImplementedError
+
+    def existing(self, ids: Sequence[str]) -> Set[str]:
+        """The subset of `ids` already in the index."""
+        return {id_ for id_ in ids if self.contains(id_)}
+
+    def ids_for_source(self, source: str) -> Set[str]:
+        """Ids of every chunk whose payload has this "source"."""
+        raise NotImplementedError
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Deletes the given ids (unknown ones are ignored); returns how many were deleted."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first, without sorting everything."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+class BruteForceIndex(VectorIndex):
+    """
+    Exact search: one contiguous (capacity, dim) float32 matrix, scored with a
+    single matrix-vector product per query. Capacity doubles as rows are added.
+    Re-adding an existing id overwrites its vector and payload; a removed row
+    is filled with the last one, so the matrix stays contiguous.
+    """
+
+    def __init__(self, dim: int, initial_capacity: int = 1024):
+        self.dim = dim
+        self._matrix = np.zeros((max(1, initial_capacity), dim), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._ids_by_source: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+
+    def _grow(self, needed: int) -> None:
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[Dict[str, Any]]) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if not (len(ids) == vectors.shape[0] == len(payloads)):
+            raise ValueError("ids, vectors and payloads must have the same length")
+        with self._lock:
+            self._grow(self._size + len(ids))
+            for id_, vector, payload in zip(ids, vectors, payloads):
+                row = self._row_by_id.get(id_)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._ids.append(id_)
+                    self._payloads.append(payload)
+                    self._row_by_id[id_] = row
+                else:
+                    self._payloads[row] = payload
+                self._ids_by_source.setdefault(payload.get("source", ""), set()).add(id_)
+                self._matrix[row] = vector
+                self._on_row_written(row)
+
+    def remove(self, ids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for id_ in ids:
+                row = self._row_by_id.pop(id_, None)
+                if row is None:
+                    continue
+                source = self._payloads[row].get("source", "")
+                self._ids_by_source[source].discard(id_)
+                if not self._ids_by_source[source]:
+                    del self._ids_by_source[source]
+                self._on_row_removed(row)
+                last = self._size - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    self._ids[row] = self._ids[last]
+                    self._payloads[row] = self._payloads[last]
+                    self._row_by_id[self._ids[row]] = row
+                    self._on_row_moved(last, row)
+                self._ids.pop()
+                self._payloads.pop()
+                self._matrix[last] = 0
+                self._size -= 1
+                removed += 1
+        return removed
+
+    def _on_row_written(self, row: int) -> None:
+        pass
+
+    def _on_row_removed(self, row: int) -> None:
+        pass
+
+    def _on_row_moved(self, source: int, target: int) -> None:
+        pass
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> List[SearchHit]:
+        return [SearchHit(self._ids[r], float(s), self._payloads[r]) for r, s in zip(rows, scores)]
+
+    def search(self, query: np.ndarray, k: int) -> List[SearchHit]:
+        with self._lock:
+            if self._size == 0:
+                return []
+            scores = self._matrix[:self._size] @ np.asarray(query, dtype=np.float32)
+            top = _top_k(scores, k)
+            return self._hits(top, scores[top])
+
+    def contains(self, id: str) -> bool:
+        return id in self._row_by_id
+
+    def ids_for_source(self, source: str) -> Set[str]:
+        with self._lock:
+            return set(self._ids_by_source.get(source, ()))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def save(self, path: str) -> None:
+        """Writes vectors, ids and payloads to a single .npz file (written atomically)."""
+        with self._lock:
+            tmp_path = f"{path}.{os.getpid()}.tmp.npz" # per process: several workers may save the same path
+            np.savez(
+                tmp_path,
+                vectors=self._matrix[:self._size],
+                ids=np.asarray(self._ids, dtype=str),
+                payloads=np.asarray(json.dumps(self._payloads)),
+            )
+            os.replace(tmp_path, path)
+
+    def load(self, path: str) -> None:
+        """Adds everything from a file written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            ids = [str(i) for i in data["ids"]]
+            if ids:
+                self.add(ids, data["vectors"], json.loads(str(data["payloads"])))
+
+
+class IVFIndex(BruteForceIndex):
+    """
+    Approximate search for large corpora (IVF-Flat): rows are bucketed by their
+    nearest k-means centroid, and a query only scores the rows in its `n_probe`
+    closest buckets. Until `train_threshold` rows exist (or train() is called)
+    it behaves exactly like BruteForceIndex.
+    """
+
+    def __init__(self, dim: int, n_lists: Optional[int] = None, n_probe: int = 8, train_threshold: int = 50_000, initial_capacity: int = 1024):
+        super().__init__(dim, initial_capacity)
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_threshold = train_threshold
+        self._centroids: Optional[np.ndarray] = None
+        self._assignment = np.full(max(1, initial_capacity), -1, dtype=np.int32)
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _on_row_written(self, row: int) -> None:
+        if row >= self._assignment.shape[0]:
+            grown = np.full(self._matrix.shape[0], -1, dtype=np.int32)
+            grown[:self._assignment.shape[0]] = self._assignment
+            self._assignment = grown
+        if self._centroids is not None:
+            self._assign(row, int(np.argmax(self._centroids @ self._matrix[row])))
+
+    def _on_row_removed(self, row: int) -> None:
+        list_id = int(self._assignment[row])
+        if list_id >= 0:
+            self._lists[list_id].remove(row)
+            self._list_arrays.pop(list_id, None)
+            self._assignment[row] = -1
+
+    def _on_row_moved(self, source: int, target: int) -> None:
+        list_id = int(self._assignment[source])
+        self._assignment[target] = list_id
+        self._assignment[source] = -1
+        if list_id >= 0:
+            rows = self._lists[list_id]
+            rows[rows.index(source)] = target
+            self._list_arrays.pop(list_id, None)
+
+    def _assign(self, row: int, list_id: int) -> None:
+        previous = int(self._assignment[row])
+        if previous == list_id:
+            return
+        if previous >= 0:
+            self._lists[previous].remove(row)
+            self._list_arrays.pop(previous, None)
+        self._lists[list_id].append(row)
+        self._list_arrays.pop(list_id, None)
+        self._assignment[row] = list_id
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[Dict[str, Any]]) -> None:
+        super().add(ids, vectors, payloads)
+        if not self.trained and self._size >= self.train_threshold:
+            self.train()
+
+    def train(self, n_lists: Optional[int] = None, iterations: int = 10, sample_size: int = 100_000, seed: int = 0) -> None:
+        """Spherical k-means on a sample of the stored rows, then buckets every row."""
+        with self._lock:
+            if self._size == 0:
+                return
+            n_lists = min(n_lists or self.n_lists or max(1, int(np.sqrt(self._size))), self._size)
+            rng = np.random.default_rng(seed)
+            data = self._matrix[:self._size]
+            sample = data[rng.choice(self._size, min(self._size, sample_size), replace=False)]
+            centroids = sample[rng.choice(sample.shape[0], n_lists, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                # Per-centroid sums via sort + reduceat (much faster than np.add.at)
+                order = np.argsort(labels, kind="stable")
+                sorted_labels = labels[order]
+                filled = np.unique(sorted_labels)
+                sums = np.add.reduceat(sample[order], np.searchsorted(sorted_labels, filled), axis=0)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                centroids[filled] = sums / norms
+
+            self._centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+            labels = np.concatenate([
+                np.argmax(data[start:start + 65_536] @ self._centroids.T, axis=1)
+                for start in range(0, self._size, 65_536)
+            ]).astype(np.int32)
+            self._assignment[:] = -1
+            self._assignment[:self._size] = labels
+            order = np.argsort(labels, kind="stable")
+            bounds = np.searchsorted(labels[order], np.arange(n_lists + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(n_lists)]
+            self._list_arrays = {}
+
+    def _rows_of(self, list_id: int) -> np.ndarray:
+        rows = self._list_arrays.get(list_id)
+        if rows is None:
+            rows = np.asarray(self._lists[list_id], dtype=np.int64)
+            self._list_arrays[list_id] = rows
+        return rows
+
+    def search(self, query: np.ndarray, k: int) -> List[SearchHit]:
+        with self._lock:
+            if not self.trained:
+                return super().search(query, k)
+            query = np.asarray(query, dtype=np.float32)
+            probe = _top_k(self._centroids @ query, self.n_probe)
+            rows = np.concatenate([self._rows_of(int(list_id)) for list_id in probe])
+            if rows.size == 0:
+                return []
+            scores = self._matrix[rows] @ query
+            top = _top_k(scores, k)
+            return self._hits(rows[top], scores[top])
+
+
+class PgVectorIndex(VectorIndex):
+    """
+    Stores chunks in Postgres with the pgvector extension and searches with its
+    cosine distance operator, backed by an HNSW index.
+
+    len() is asked on every chat turn from the event loop, so it returns a
+    cached row count, recounted in a background thread after this process
+    adds rows and once older than `count_ttl` seconds (picks up rows ingested
+    by other processes, e.g. the ingestion CLI).
+    """
+
+    def __init__(self, engine: Engine, dim: int, table: str = "rag_chunks", count_ttl: float = 30.0):
+        self.engine = engine
+        self.dim = dim
+        self.table = table
+        self.count_ttl = count_ttl
+        self._check_schema()
+        self._count_lock = threading.Lock()
+        self._refreshing = False
+        self._refresh_count()
+
+    def _check_schema(self) -> None:
+        # The table, extension and HNSW index come from the Alembic migrations (0004)
+        with self.engine.connect() as conn:
+            column_type = conn.execute(text(
+                "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+                "WHERE attrelid = to_regclass(:table) AND attname = 'embedding' AND NOT attisdropped"
+            ), {"table": self.table}).scalar()
+        if column_type is None:
+            raise RuntimeError(
+                f"Table {self.table} doesn't exist: run `alembic upgrade head` on a Postgres server with pgvector installed"
+            )
+        if column_type != f"vector({self.dim})":
+            raise RuntimeError(f"{self.table}.embedding is {column_type}, but the embedder produces vector({self.dim})")
+
+    @staticmethod
+    def _literal(vector: np.ndarray) -> str:
+        return "[" + ",".join(f"{x:.7g}" for x in vector) + "]"
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray, payloads: Sequence[Dict[str, Any]]) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        rows = [
+            {"id": id_, "payload": json.dumps(payload), "embedding": self._literal(vector)}
+            for id_, vector, payload in zip(ids, vectors, payloads)
+        ]
+        if not rows:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"INSERT INTO {self.table} (id, payload, embedding) "
+                f"VALUES (:id, CAST(:payload AS JSONB), CAST(:embedding AS vector)) "
+                f"ON CONFLICT (id) DO UPDATE SET payload = EXCLUDED.payload, embedding = EXCLUDED.embedding"
+            ), rows)
+        with self._count_lock:
+            # At least these rows now; the next len() recounts in the background
+            self._count = max(self._count, len(rows))
+            self._counted_at = float("-inf")
+
+    def search(self, query: np.ndarray, k: int) -> List[SearchHit]:
+        with self.engine.connect() as conn:
+            result = conn.execute(text(
+                f"SELECT id, payload, 1 - (embedding <=> CAST(:query AS vector)) AS score "
+                f"FROM {self.table} ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"
+            ), {"query": self._literal(np.asarray(query, dtype=np.float32)), "k": k})
+            return [SearchHit(row.id, float(row.score), row.payload) for row in result]
+
+    def contains(self, id: str) -> bool:
+        with self.engine.connect() as conn:
+            return conn.execute(text(f"SELECT 1 FROM {self.table} WHERE id = :id"), {"id": id}).first() is not None
+
+    def existing(self, ids: Sequence[str]) -> Set[str]:
+        if not ids:
+            return set()
+        with self.engine.connect() as conn:
+            return set(conn.execute(
+                text(f"SELECT id FROM {self.table} WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": list(ids)}
+            ).scalars())
+
+    def ids_for_source(self, source: str) -> Set[str]:
+        # Uses the ix_rag_chunks_source expression index (migration 0005)
+        with self.engine.connect() as conn:
+            return set(conn.execute(
+                text(f"SELECT id FROM {self.table} WHERE payload->>'source' = :source"), {"source": source}
+            ).scalars())
+
+    def remove(self, ids: Iterable[str]) -> int:
+        ids = list(ids)
+        if not ids:
+            return 0
+        with self.engine.begin() as conn:
+            removed = conn.execute(
+                text(f"DELETE FROM {self.table} WHERE id IN :ids").bindparams(bindparam("ids", expanding=True)),
+                {"ids": ids}
+            ).rowcount
+        with self._count_lock:
+            self._counted_at = float("-inf")
+        return removed
+
+    def _refresh_count(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                count = int(conn.execute(text(f"SELECT count(*) FROM {self.table}")).scalar_one())
+            with self._count_lock:
+                self._count, self._counted_at = count, time.monotonic()
+        finally:
+            self._refreshing = False
+
+    def _refresh_count_in_background(self) -> None:
+        try:
+            self._refresh_count()
+        except Exception as e:
+            logger.warning("Counting %s rows failed, keeping the cached count: %s", self.table, e)
+
+    def __len__(self) -> int:
+        with self._count_lock:
+            if not self._refreshing and time.monotonic() - self._counted_at > self.count_ttl:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_count_in_background, name="pgvector-count", daemon=True).start()
+            return self._count
@@ -0,0 +1,261 @@
+# backend/app/rag/ingest.py
+"""
+Bulk document ingestion: parse -> chunk -> embed -> upsert, as a chain of
+generators so memory stays flat no matter how large the corpus is.
+
+Parsing runs in a process pool, embedding is batched, and both files and
+chunks are content-addressed: unchanged files are skipped before parsing
+(via a manifest of file hashes) and chunks already in the index are never
+re-embedded. A changed file's chunks that are no longer in it are deleted,
+and so are all chunks of manifest files under the given paths that no
+longer exist.
+
+    python -m backend.app.rag.ingest docs/ handbook.pdf --workers 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from backend.app.core.config import settings
+from backend.app.rag.chunking import chunk_text
+from backend.app.rag.retriever import Retriever, chunk_id
+
+SUPPORTED_EXTENSIONS = (".txt", ".md", ".rst", ".html", ".htm", ".pdf", ".docx")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+@dataclass
+class ParsedDocument:
+    source: str
+    content_hash: str
+    text: str = ""
+    error: Optional[str] = None
+
+
+@dataclass
+class IngestStats:
+    documents: int = 0
+    skipped_documents: int = 0
+    failed_documents: int = 0
+    removed_documents: int = 0
+    chunks: int = 0
+    skipped_chunks: int = 0
+    removed_chunks: int = 0
+    elapsed: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    def report(self) -> str:
+        elapsed = self.elapsed or 1e-9
+        return (
+            f"{self.documents} docs ({self.skipped_documents} unchanged, {self.failed_documents} failed, "
+            f"{self.removed_documents} removed), {self.chunks} chunks embedded ({self.skipped_chunks} already indexed, "
+            f"{self.removed_chunks} stale removed) in {self.elapsed:.2f}s | "
+            f"{self.documents / elapsed:.1f} docs/s, {self.chunks / elapsed:.1f} chunks/s"
+        )
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _html_to_text(html: str) -> str:
+    try:
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, "html.parser").get_text("\n")
+    except ImportError:
+        return _TAG_RE.sub(" ", html)
+
+
+def extract_text(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        from pypdf import PdfReader
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+    if ext == ".docx":
+        import docx
+        return "\n\n".join(paragraph.text for paragraph in docx.Document(path).paragraphs)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        raw = f.read()
+    return _html_to_text(raw) if ext in (".html", ".htm") else raw
+
+
+def parse_file(job: Tuple[str, str]) -> ParsedDocument:
+    """Process-pool worker: (path, content_hash) -> ParsedDocument. Never raises."""
+    path, content_hash = job
+    try:
+        return ParsedDocument(source=path, content_hash=content_hash, text=extract_text(path))
+    except Exception as e:
+        return ParsedDocument(source=path, content_hash=content_hash, error=f"{type(e).__name__}: {e}")
+
+
+class IngestManifest:
+    """source -> content hash of every file ingested so far, stored as JSON next to the index."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.hashes: Dict[str, str] = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.hashes = json.load(f)
+
+    def is_unchanged(self, source: str, content_hash: str) -> bool:
+        return self.hashes.get(source) == content_hash
+
+    def record(self, source: str, content_hash: str) -> None:
+        self.hashes[source] = content_hash
+
+    def forget(self, source: str) -> None:
+        self.hashes.pop(source, None)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.hashes, f)
+        os.replace(tmp_path, self.path)
+
+
+# --- Pipeline stages ---
+
+def iter_files(paths: Iterable[str], extensions: Sequence[str] = SUPPORTED_EXTENSIONS) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(tuple(extensions)):
+                        yield os.path.join(root, name)
+        elif os.path.isfile(path):
+            yield path
+
+
+def changed_files(paths: Iterable[str], manifest: IngestManifest, stats: IngestStats) -> Iterator[Tuple[str, str]]:
+    for path in paths:
+        content_hash = file_hash(path)
+        if manifest.is_unchanged(path, content_hash):
+            stats.skipped_documents += 1
+            continue
+        yield path, content_hash
+
+
+def parse_stage(jobs: Iterable[Tuple[str, str]], workers: int) -> Iterator[ParsedDocument]:
+    """Parses in a process pool, keeping at most `workers * 4` files in flight, in input order."""
+    if workers <= 1:
+        yield from map(parse_file, jobs)
+        return
+    window = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: List[Future] = []
+        for job in jobs:
+            pending.append(pool.submit(parse_file, job))
+            if len(pending) >= window:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def chunk_stage(docs: Iterable[ParsedDocument], retriever: Retriever, stats: IngestStats, manifest: IngestManifest) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    for doc in docs:
+        if doc.error:
+            stats.failed_documents += 1
+            stats.errors.append(f"{doc.source}: {doc.error}")
+            continue
+        stats.documents += 1
+        texts = chunk_text(doc.text, retriever.chunk_size, retriever.chunk_overlap)
+        ids = [chunk_id(doc.source, text) for text in texts]
+        # One lookup per document, not per chunk
+        indexed = retriever.index.existing(ids)
+        stale = retriever.index.ids_for_source(doc.source) - set(ids)
+        if stale:
+            stats.removed_chunks += retriever.index.remove(stale)
+        for i, (id_, text) in enumerate(zip(ids, texts)):
+            if id_ in indexed:
+                stats.skipped_chunks += 1
+                continue
+            yield id_, text, {"text": text, "source": doc.source, "chunk": i}
+        # Recorded once all of the doc's chunks have been handed on; saved only after upsert
+        manifest.record(doc.source, doc.content_hash)
+
+
+def remove_missing(paths: Iterable[str], seen: Set[str], retriever: Retriever, stats: IngestStats, manifest: IngestManifest) -> None:
+    """Deletes the chunks of manifest files under `paths` that weren't found this run (deleted or moved)."""
+    paths = list(paths)
+    for source in list(manifest.hashes):
+        if source in seen or not any(source == path or source.startswith(os.path.join(path, "")) for path in paths):
+            continue
+        stats.removed_chunks += retriever.index.remove(retriever.index.ids_for_source(source))
+        stats.removed_documents += 1
+        manifest.forget(source)
+
+
+def batch_stage(chunks: Iterable[Tuple[str, str, Dict[str, Any]]], batch_size: int) -> Iterator[List[Tuple[str, str, Dict[str, Any]]]]:
+    batch: List[Tuple[str, str, Dict[str, Any]]] = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_ingestion(
+    paths: Iterable[str],
+    retriever: Retriever,
+    workers: int = os.cpu_count() or 1,
+    batch_size: int = settings.INGEST_EMBED_BATCH_SIZE,
+    manifest: Optional[IngestManifest] = None,
+) -> IngestStats:
+    paths = list(paths)
+    stats = IngestStats()
+    manifest = manifest or IngestManifest(None)
+    started = time.perf_counter()
+
+    seen: Set[str] = set()
+    files = (seen.add(path) or path for path in iter_files(paths))
+    jobs = changed_files(files, manifest, stats)
+    docs = parse_stage(jobs, workers)
+    chunks = chunk_stage(docs, retriever, stats, manifest)
+    for batch in batch_stage(chunks, batch_size):
+        ids, texts, payloads = zip(*batch)
+        vectors = retriever.embedder.embed_documents(list(texts))
+        retriever.index.add(list(ids), vectors, list(payloads))
+        stats.chunks += len(batch)
+    remove_missing(paths, seen, retriever, stats, manifest)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="files or directories to ingest")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parser processes")
+    parser.add_argument("--batch-size", type=int, default=settings.INGEST_EMBED_BATCH_SIZE, help="chunks per embedding call")
+    parser.add_argument("--manifest", default=None, help="file-hash manifest (default: VECTOR_INDEX_PATH + '.manifest.json')")
+    args = parser.parse_args(argv)
+
+    manifest_path = args.manifest or (f"{settings.VECTOR_INDEX_PATH}.manifest.json" if settings.VECTOR_INDEX_PATH else None)
+    manifest = IngestManifest(manifest_path)
+    retriever = Retriever.from_settings()
+    stats = run_ingestion(args.paths, retriever, workers=args.workers, batch_size=args.batch_size, manifest=manifest)
+    retriever.save()
+    manifest.save()
+
+    print(f"[INGEST] {stats.report()}")
+    for error in stats.errors:
+        print(f"[INGEST] failed: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# backend/app/rag/retriever.py
+import logging
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import Request
+
+from backend.app.core.config import settings
+from backend.app.rag.chunking import chunk_text
+from backend.app.rag.embeddings import Embedder, get_embedder
+from backend.app.rag.index import BruteForceIndex, IVFIndex, PgVectorIndex, VectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetrievedChunk:
+    id: str
+    text: str
+    source: str
+    score: float
+
+
+def chunk_id(source: str, text: str) -> str:
+    """Content-addressed id, so re-ingesting an unchanged chunk overwrites rather than duplicates it."""
+    return hashlib.sha256(f"{source}\x00{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def build_index(backend: str, dim: int) -> VectorIndex:
+    if backend == "numpy":
+        return BruteForceIndex(dim)
+    if backend == "ivf":
+        return IVFIndex(dim, n_probe=settings.IVF_NPROBE, train_threshold=settings.IVF_TRAIN_THRESHOLD)
+    if backend == "pgvector":
+        from backend.app.db.database import engine
+        return PgVectorIndex(engine, dim)
+    raise ValueError(f"Unknown VECTOR_BACKEND '{backend}' (expected 'numpy', 'ivf' or 'pgvector')")
+
+
+class Retriever:
+    """Chunks and embeds documents into a vector index, and fetches the top-k chunks for a query."""
+
+    def __init__(self, embedder: Embedder, index: VectorIndex, chunk_size: int = 800, chunk_overlap: int = 100, top_k: int = 4, min_score: float = 0.0):
+        self.embedder = embedder
+        self.index = index
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.top_k = top_k
+        self.min_score = min_score
+
+    @classmethod
+    def from_settings(cls) -> "Retriever":
+        embedder = get_embedder()
+        index = build_index(settings.VECTOR_BACKEND, embedder.dim)
+        # In-process indexes are persisted by the ingestion CLI (see rag/ingest.py)
+        if settings.VECTOR_INDEX_PATH and isinstance(index, BruteForceIndex) and os.path.exists(settings.VECTOR_INDEX_PATH):
+            index.load(settings.VECTOR_INDEX_PATH)
+            logger.info("Loaded %d chunks from %s", len(index), settings.VECTOR_INDEX_PATH)
+        return cls(
+            embedder=embedder,
+            index=index,
+            chunk_size=settings.RAG_CHUNK_SIZE,
+            chunk_overlap=settings.RAG_CHUNK_OVERLAP,
+            top_k=settings.RAG_TOP_K,
+            min_score=settings.RAG_MIN_SCORE,
+        )
+
+    @property
+    def persistent(self) -> bool:
+        """Whether ingested chunks survive a restart: pgvector, or an in-process index saved to VECTOR_INDEX_PATH."""
+        return not isinstance(self.index, BruteForceIndex) or bool(settings.VECTOR_INDEX_PATH)
+
+    def save(self) -> None:
+        if settings.VECTOR_INDEX_PATH and isinstance(self.index, BruteForceIndex):
+            self.index.save(settings.VECTOR_INDEX_PATH)
+
+    def ingest(self, text: str, source: str, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """Indexes `text` as `source`, replacing the chunks a previous version of that source had."""
+        chunks = chunk_text(text, self.chunk_size, self.chunk_overlap)
+        ids = [chunk_id(source, chunk) for chunk in chunks]
+        stale = self.index.ids_for_source(source) - set(ids)
+        if stale:
+            self.index.remove(stale)
+        if not chunks:
+            return 0
+        vectors = self.embedder.embed_documents(chunks)
+        # Metadata first: it must not overwrite the fields retrieval relies on
+        payloads = [{**(metadata or {}), "text": chunk, "source": source, "chunk": i} for i, chunk in enumerate(chunks)]
+        self.index.add(ids, vectors, payloads)
+        return len(chunks)
+
+    def retrieve(self, query: str, k: Optional[int] = None, query_vector: Optional[np.ndarray] = None) -> List[RetrievedChunk]:
+        if len(self.index) == 0:
+            return [] # Nothing ingested yet, skip the embedding call
+        if query_vector is None:
+            query_vector = self.embedder.embed_query(query)
+        hits = self.index.search(query_vector, k or self.top_k)
+        return [
+            RetrievedChunk(id=hit.id, text=hit.payload.get("text", ""), source=hit.payload.get("source", ""), score=hit.score)
+            for hit in hits
+            if hit.score >= self.min_score
+        ]
+
+    async def aretrieve(self, query: str, k: Optional[int] = None, query_vector: Optional[np.ndarray] = None) -> List[RetrievedChunk]:
+        # Embedding calls and large matrix products would otherwise block the event loop
+        return await asyncio.to_thread(self.retrieve, query, k, query_vector)
+
+
+def format_context(chunks: List[RetrievedChunk]) -> str:
+    return "\n\n".join(f"[{i}] ({chunk.source}) {chunk.text}" for i, chunk in enumerate(chunks, start=1))
+
+
+# Dependency to get the retriever created in main.py's lifespan (None when RAG is disabled)
+def get_retriever(request: Request) -> Optional[Retriever]:
+    return getattr(request.app.state, "retriever", None)
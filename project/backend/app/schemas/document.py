@@ -0,0 +1,42 @@
+# backend/app/schemas/document.py
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, List, Optional
+
+# Payload keys the retriever sets on every chunk; caller metadata can't override them
+RESERVED_METADATA_KEYS = ("text", "source", "chunk")
+
+# Schema for ingesting a document into the retrieval index (request)
+class DocumentCreate(BaseModel):
+    source: str = Field(examples=["handbook.md"])
+    text: str
+    metadata: Optional[Dict[str, Any]] = None
+
+    @field_validator("metadata")
+    @classmethod
+    def no_reserved_keys(cls, metadata: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        reserved = sorted(set(metadata or {}) & set(RESERVED_METADATA_KEYS))
+        if reserved:
+            raise ValueError(f"metadata can't set reserved key(s): {', '.join(reserved)}")
+        return metadata
+
+# Schema for the result of an ingestion (response)
+class DocumentIngestResult(BaseModel):
+    source: str
+    chunks: int
+
+# Schema for a retrieved chunk (response)
+class RetrievedChunk(BaseModel):
+    id: str
+    text: str
+    source: str
+    score: float
+
+    class Config:
+        from_attributes = True
+
+class RetrievalQuery(BaseModel):
+    query: str
+    k: Optional[int] = None
+
+class RetrievalResult(BaseModel):
+    chunks: List[RetrievedChunk]
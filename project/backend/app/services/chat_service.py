@@ -1,113 +1,241 @@
 # backend/app/services/chat_service.py
-from sqlalchemy.orm import Session
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import ConversationChain
-from langchain.schema import HumanMessage, AIMessage
+from sqlalchemy.ext.asyncio import AsyncSession
+from langchain_core.messages import HumanMessage, SystemMessage, BaseMessage
 from fastapi import Depends # Ensure Depends is imported
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import numpy as np
 
+from backend.app.core.instrumentation import span
 from backend.app.db import crud
+from backend.app.db import models
 from backend.app import schemas
-from backend.app.core.config import settings
-from backend.app.db.database import get_db # <--- CORRECT: Import get_db from database.py
+from backend.app.db.database import AsyncSessionLocal, get_async_db
+from backend.app.db.write_behind import UnknownSessionError
+from backend.app.services.llm_pool import LLMClientPool, get_llm_pool
+from backend.app.services.memory_cache import HistorySnapshot, SessionMemoryCache, session_memory_cache
+from backend.app.services.summarizer import SessionCompactor, get_session_compactor
+from backend.app.services.response_cache import ResponseCache, get_response_cache
+from backend.app.rag.retriever import Retriever, format_context, get_retriever
+
+logger = logging.getLogger(__name__)
+
+# Same preamble ConversationChain uses by default, so replies keep the same tone
+CONVERSATION_SYSTEM_PROMPT = (
+    "The following is a friendly conversation between a human and an AI. "
+    "The AI is talkative and provides lots of specific details from its context. "
+    "If the AI does not know the answer to a question, it truthfully says it does not know."
+)
+
+RETRIEVAL_CONTEXT_PROMPT = (
+    "Use the following retrieved context when it is relevant to the human's question. "
+    "Cite the [number] of any passage you rely on.\n\n"
+)
 
 class ChatService:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: AsyncSession,
+        llm_pool: LLMClientPool,
+        memory_cache: SessionMemoryCache = session_memory_cache,
+        compactor: Optional[SessionCompactor] = None,
+        retriever: Optional[Retriever] = None,
+        response_cache: Optional[ResponseCache] = None
+    ):
         self.db = db
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=settings.GOOGLE_API_KEY,
-        )
-
-    def _load_chat_history_for_langchain(self, session_id: int) -> ConversationBufferMemory:
-        messages_db = crud.get_messages_by_session(self.db, session_id=session_id, limit=50)
-        memory = ConversationBufferMemory(return_messages=True)
-        for msg_db in messages_db:
-            if msg_db.sender_type == "user":
-                memory.chat_memory.add_user_message(msg_db.content)
-            elif msg_db.sender_type == "ai":
-                memory.chat_memory.add_ai_message(msg_db.content)
-        return memory
-
-    # def process_user_message(self, session_id: int, user_message_content: str) -> schemas.message.ChatMessage:
-    #     user_msg_to_save = schemas.message.ChatMessageCreateInternal(
-    #         session_id=session_id,
-    #         sender_type="user",
-    #         content=user_message_content
-    #     )
-    #     crud.create_chat_message(self.db, message=user_msg_to_save)
-
-    #     memory = self._load_chat_history_for_langchain(session_id)
-    #     conversation = ConversationChain(
-    #         llm=self.llm,
-    #         memory=memory,
-    #         verbose=True
-    #     )
-    #     ai_response_content = conversation.predict(input=user_message_content)
-
-    #     ai_msg_to_save = schemas.message.ChatMessageCreateInternal(
-    #         session_id=session_id,
-    #         sender_type="ai",
-    #         content=ai_response_content
-    #     )
-    #     db_ai_message = crud.create_chat_message(self.db, message=ai_msg_to_save)
-    #     # return schemas.message.ChatMessage.from_orm(db_ai_message) Pydantic v1
-    #     return schemas.message.ChatMessage.model_validate(db_ai_message) # Pydantic v2
-# backend/app/services/chat_service.py
-# ...
-    def process_user_message(self, session_id: int, user_message_content: str) -> schemas.message.ChatMessage:
-        print(f"[CHAT_SERVICE] process_user_message called for session_id: {session_id}, content: '{user_message_content}'") # DEBUG
-
-        # 1. Save user message
-        user_msg_to_save = schemas.message.ChatMessageCreateInternal(
-            session_id=session_id,
-            sender_type="user",
-            content=user_message_content
-        )
-        print(f"[CHAT_SERVICE] Attempting to save user message: {user_msg_to_save.model_dump_json()}") # DEBUG (Pydantic V2)
+        self.llm_pool = llm_pool
+        self.memory_cache = memory_cache
+        self.compactor = compactor
+        self.retriever = retriever
+        self.response_cache = response_cache
+
+    async def _load_chat_history(self, session_id: int, limit: int) -> HistorySnapshot:
+        session = await crud.get_session_async(self.db, session_id=session_id)
+        if session is None:
+            await self.db.commit()
+            raise UnknownSessionError([session_id])
+        summary = session.summary
+        summary_upto_id = session.summary_upto_message_id
+        messages_db = await crud.get_recent_messages_async(self.db, session_id=session_id, after_id=summary_upto_id, limit=limit)
+        # End the read transaction so the connection goes back to the pool while we wait on the LLM
+        await self.db.commit()
+        return summary, summary_upto_id, [(msg_db.id, msg_db.sender_type, msg_db.content) for msg_db in messages_db]
+
+    async def _session_head(self, session_id: int) -> Tuple[Optional[int], Optional[int]]:
+        head = await crud.get_session_head_async(self.db, session_id=session_id)
+        await self.db.commit()
+        if head is None:
+            raise UnknownSessionError([session_id])
+        return head
+
+    def _query_embedder(self):
+        if self.retriever is not None and len(self.retriever.index) > 0:
+            return self.retriever.embedder
+        if self.response_cache is not None and self.response_cache.semantic_enabled:
+            return self.response_cache.embedder
+        return None
+
+    async def _build_prompt(self, session_id: int, user_message_content: str) -> Tuple[List[BaseMessage], Optional[np.ndarray]]:
+        # Must run before the new user message is saved, otherwise it would appear twice in the prompt.
+        # Both the loader and the head check raise UnknownSessionError, before any embedding or LLM call.
+        with span("history_load"):
+            summary, history = await self.memory_cache.get_window(
+                session_id,
+                lambda limit: self._load_chat_history(session_id, limit),
+                head=lambda: self._session_head(session_id)
+            )
+        # Embed the question once; retrieval and the semantic response cache share the vector
+        embedder = self._query_embedder()
+        query_vector = None
+        if embedder is not None:
+            with span("embed_query"):
+                query_vector = await asyncio.to_thread(embedder.embed_query, user_message_content)
+
+        prompt: List[BaseMessage] = [SystemMessage(content=CONVERSATION_SYSTEM_PROMPT)]
+        if summary:
+            prompt.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+        if self.retriever is not None:
+            with span("retrieval"):
+                chunks = await self.retriever.aretrieve(user_message_content, query_vector=query_vector)
+            if chunks:
+                prompt.append(SystemMessage(content=RETRIEVAL_CONTEXT_PROMPT + format_context(chunks)))
+        return [*prompt, *history, HumanMessage(content=user_message_content)], query_vector
+
+    def _cached_response(self, prompt_messages: List[BaseMessage], query_vector: Optional[np.ndarray], use_cache: bool) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (context_key, cached reply). context_key is None when the cache is off for this turn."""
+        if self.response_cache is None:
+            return None, None
+        if not use_cache:
+            self.response_cache.record_bypass()
+            return None, None
+        # Everything but the new human message identifies the conversation state
+        context_key = ResponseCache.context_key(prompt_messages[:-1])
+        cached = self.response_cache.lookup(context_key, prompt_messages[-1].content, query_vector)
+        if cached is not None:
+            logger.debug("Response cache hit: %.50r", cached)
+        return context_key, cached
+
+    def _store_response(self, context_key: Optional[str], user_message_content: str, ai_response_content: str, query_vector: Optional[np.ndarray]) -> None:
+        if context_key is not None and ai_response_content:
+            self.response_cache.store(context_key, user_message_content, ai_response_content, query_vector)
+
+    def _maybe_schedule_compaction(self, session_id: int) -> None:
+        if self.compactor is not None and self.compactor.should_compact(self.memory_cache.unsummarized_count(session_id)):
+            self.compactor.schedule(session_id)
+
+    async def _save_turn(self, session_id: int, messages: List[Tuple[str, str]], db: Optional[AsyncSession] = None) -> List[models.ChatMessage]:
+        """
+        Persists a turn's (sender_type, content) messages with one INSERT ... RETURNING and one commit.
+        The user message is held back until the reply exists; the prompt was built before, so it isn't needed earlier.
+        """
+        to_save = [
+            schemas.message.ChatMessageCreateInternal(session_id=session_id, sender_type=sender_type, content=content)
+            for sender_type, content in messages
+        ]
+        logger.debug("Attempting to save %d message(s) for session %s", len(to_save), session_id)
         try:
-            db_user_message = crud.create_chat_message(self.db, message=user_msg_to_save)
-            print(f"[CHAT_SERVICE] User message saved to DB. ID: {db_user_message.id}, Content: {db_user_message.content[:50]}") # DEBUG
+            with span("db_write"):
+                db_messages = await crud.create_chat_turn_async(db or self.db, messages=to_save)
+            logger.debug("Messages saved to DB. IDs: %s", [msg.id for msg in db_messages])
         except Exception as e:
-            print(f"[CHAT_SERVICE] ERROR saving user message to DB: {e}") # DEBUG
-            # Re-raise or handle appropriately. If this fails, the rest won't proceed.
-            raise  # Re-raise the exception to be caught by the endpoint
-
-        # ... (rest of the LLM interaction) ...
-        print("[CHAT_SERVICE] Loading chat history...") # DEBUG
-        memory = self._load_chat_history_for_langchain(session_id)
-        # print(f"[CHAT_SERVICE] Memory loaded: {memory.chat_memory.messages}") # DEBUG - can be verbose
-
-        print("[CHAT_SERVICE] Calling LLM...") # DEBUG
-        conversation = ConversationChain(
-            llm=self.llm,
-            memory=memory,
-            verbose=True # Keep this True for now
-        )
-        
+            logger.error("ERROR saving messages to DB: %s", e)
+            raise # Re-raise to be caught by the endpoint
+        for db_message in db_messages:
+            self.memory_cache.append(session_id, db_message.id, db_message.sender_type, db_message.content)
+        return db_messages
+
+    async def _save_turn_shielded(self, session_id: int, messages: List[Tuple[str, str]]) -> List[models.ChatMessage]:
+        """
+        _save_turn in its own task and DB session, so it completes even when the request is
+        cancelled (client disconnect) and the request's session is closed under it.
+        """
+        async def save() -> List[models.ChatMessage]:
+            async with AsyncSessionLocal() as db:
+                return await self._save_turn(session_id, messages, db=db)
+        return await asyncio.shield(asyncio.ensure_future(save()))
+
+    async def _save_unanswered(self, session_id: int, user_message_content: str, partial_reply: str = "") -> None:
+        # The LLM failed or the client went away: still keep the user's message, like when it was
+        # saved before the call, and whatever part of the reply was already streamed
+        messages = [("user", user_message_content)]
+        if partial_reply:
+            messages.append(("ai", partial_reply))
         try:
-            ai_response_content = conversation.predict(input=user_message_content)
-            print(f"[CHAT_SERVICE] LLM response received: {ai_response_content[:100]}") # DEBUG
-        except Exception as e:
-            print(f"[CHAT_SERVICE] ERROR during LLM conversation.predict: {e}") # DEBUG
-            raise # Re-raise to be caught by endpoint
-
-        # 4. Save AI response
-        ai_msg_to_save = schemas.message.ChatMessageCreateInternal(
-            session_id=session_id,
-            sender_type="ai",
-            content=ai_response_content
-        )
-        print(f"[CHAT_SERVICE] Attempting to save AI message: {ai_msg_to_save.model_dump_json()}") # DEBUG
+            await self._save_turn_shielded(session_id, messages)
+        except (Exception, asyncio.CancelledError):
+            pass # The LLM error (or the cancellation) is the one worth reporting
+
+    async def process_user_message(self, session_id: int, user_message_content: str, use_cache: bool = True) -> schemas.message.ChatMessage:
+        logger.debug("process_user_message called for session_id: %s, content: %.100r", session_id, user_message_content)
+
+        # 1. Build the prompt from cached history
+        prompt_messages, query_vector = await self._build_prompt(session_id, user_message_content)
+
+        # 2. Call the LLM, unless an identical turn was answered recently
+        context_key, ai_response_content = self._cached_response(prompt_messages, query_vector, use_cache)
+        if ai_response_content is None:
+            logger.debug("Calling LLM...")
+            try:
+                with span("llm_call"):
+                    ai_response = await self.llm_pool.ainvoke(prompt_messages)
+                ai_response_content = ai_response.content
+                logger.debug("LLM response received: %.100r", ai_response_content)
+            except asyncio.CancelledError: # The client disconnected while we waited
+                await self._save_unanswered(session_id, user_message_content)
+                raise
+            except Exception as e:
+                logger.error("ERROR during LLM call: %s", e)
+                await self._save_unanswered(session_id, user_message_content)
+                raise # Re-raise to be caught by endpoint
+            self._store_response(context_key, user_message_content, ai_response_content, query_vector)
+
+        # 3. Save user message + AI response in one transaction
+        _, db_ai_message = await self._save_turn_shielded(session_id, [("user", user_message_content), ("ai", ai_response_content)])
+        self._maybe_schedule_compaction(session_id)
+        with span("serialize"):
+            return schemas.message.ChatMessage.model_validate(db_ai_message)
+
+    async def stream_user_message(self, session_id: int, user_message_content: str, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_user_message.
+        Yields {"type": "token", "content": ...} events as the LLM produces them,
+        then a single {"type": "message", "message": ...} event once the assembled
+        AI reply has been saved. A response cache hit is sent as one token event.
+        """
+        prompt_messages, query_vector = await self._build_prompt(session_id, user_message_content)
+
+        context_key, ai_response_content = self._cached_response(prompt_messages, query_vector, use_cache)
+        chunks = []
         try:
-            db_ai_message = crud.create_chat_message(self.db, message=ai_msg_to_save)
-            print(f"[CHAT_SERVICE] AI message saved to DB. ID: {db_ai_message.id}, Content: {db_ai_message.content[:50]}") # DEBUG
-        except Exception as e:
-            print(f"[CHAT_SERVICE] ERROR saving AI message to DB: {e}") # DEBUG
-            raise # Re-raise
+            if ai_response_content is not None:
+                chunks.append(ai_response_content)
+                yield {"type": "token", "content": ai_response_content}
+            else:
+                with span("llm_stream"): # includes the time the client takes to read the tokens
+                    async for chunk in self.llm_pool.astream(prompt_messages):
+                        if not chunk.content:
+                            continue
+                        chunks.append(chunk.content)
+                        yield {"type": "token", "content": chunk.content}
+                ai_response_content = "".join(chunks)
+                self._store_response(context_key, user_message_content, ai_response_content, query_vector)
+        except BaseException: # GeneratorExit / CancelledError when the client disconnects mid-stream
+            await self._save_unanswered(session_id, user_message_content, "".join(chunks))
+            raise
 
-        return schemas.message.ChatMessage.model_validate(db_ai_message)
+        _, db_ai_message = await self._save_turn_shielded(session_id, [("user", user_message_content), ("ai", ai_response_content)])
+        self._maybe_schedule_compaction(session_id)
+        with span("serialize"):
+            ai_message = schemas.message.ChatMessage.model_validate(db_ai_message).model_dump(mode="json")
+        yield {"type": "message", "message": ai_message}
 
 # Dependency to get ChatService instance
-def get_chat_service(db: Session = Depends(get_db)): # <--- CORRECT: Use get_db imported from database.py
-    return ChatService(db=db)
\ No newline at end of file
+def get_chat_service(
+    db: AsyncSession = Depends(get_async_db),
+    llm_pool: LLMClientPool = Depends(get_llm_pool),
+    compactor: Optional[SessionCompactor] = Depends(get_session_compactor),
+    retriever: Optional[Retriever] = Depends(get_retriever),
+    response_cache: Optional[ResponseCache] = Depends(get_response_cache)
+):
+    return ChatService(db=db, llm_pool=llm_pool, compactor=compactor, retriever=retriever, response_cache=response_cache)
@@ -0,0 +1,194 @@
+# backend/app/services/llm_pool.py
+import logging
+import asyncio
+import importlib
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, List, Optional, Sequence
+
+from fastapi import Request
+from langchain_core.messages import BaseMessage, HumanMessage
+from llm_gateway import LLMGateway, estimate_tokens, prompt_key
+
+from backend.app.core.config import settings
+
+if TYPE_CHECKING: # langchain_core.language_models pulls in langsmith & co, ~0.7s of import time
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+logger = logging.getLogger(__name__)
+
+
+def gemini_client_factory() -> "BaseChatModel":
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=settings.LLM_MODEL_NAME,
+        google_api_key=settings.GOOGLE_API_KEY,
+        # The gateway retries (with backoff shared across requests); the SDK's own 6 attempts would multiply them
+        max_retries=1 if settings.LLM_GATEWAY_ENABLED else 6,
+    )
+
+
+def gateway_from_settings() -> LLMGateway:
+    return LLMGateway.from_limits(
+        requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        max_attempts=settings.LLM_MAX_ATTEMPTS,
+        base_delay=settings.LLM_RETRY_BASE_DELAY,
+        max_delay=settings.LLM_RETRY_MAX_DELAY,
+        breaker_failures=settings.LLM_BREAKER_FAILURES,
+        breaker_reset=settings.LLM_BREAKER_RESET_SECONDS,
+        acquire_timeout=settings.LLM_ACQUIRE_TIMEOUT,
+        coalesce=settings.LLM_COALESCE,
+        name=settings.LLM_MODEL_NAME,
+    )
+
+
+def messages_tokens(messages: Sequence[BaseMessage]) -> int:
+    return estimate_tokens("".join(str(m.content) for m in messages))
+
+
+def load_client_factory(path: str) -> Callable[[], "BaseChatModel"]:
+    """Resolves a "package.module:callable" string (Settings.LLM_CLIENT_FACTORY)."""
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError(f"LLM_CLIENT_FACTORY must look like 'module:callable', got '{path}'")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class LLMClientPool:
+    """
+    Process-wide set of LLM clients, created once and shared by all requests,
+    so the client setup and its transport aren't rebuilt per request.
+    Borrowing goes through a semaphore that caps in-flight LLM calls.
+
+    With lazy=True the clients (and the SDK imports behind them, seconds for
+    langchain_google_genai) are built in a worker thread on first use, or
+    earlier via start(), so they don't hold up process startup.
+
+    ainvoke/astream send a prompt through the optional LLMGateway (rate
+    limits, retries, circuit breaker, coalescing); borrow() is the raw client.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], "BaseChatModel"],
+        size: int = 1,
+        max_concurrency: int = 64,
+        lazy: bool = False,
+        gateway: Optional[LLMGateway] = None
+    ):
+        if size < 1:
+            raise ValueError("LLM pool size must be at least 1")
+        self._factory = factory
+        self._size = size
+        self._clients: Optional[List["BaseChatModel"]] = None if lazy else self._build_clients()
+        self._init_task: Optional[asyncio.Task] = None
+        self._next_client = itertools.cycle(range(size))
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.warm = False
+        self.gateway = gateway
+
+    @classmethod
+    def from_settings(cls, factory: Optional[Callable[[], "BaseChatModel"]] = None) -> "LLMClientPool":
+        if factory is None:
+            factory = load_client_factory(settings.LLM_CLIENT_FACTORY) if settings.LLM_CLIENT_FACTORY else gemini_client_factory
+        return cls(
+            factory=factory,
+            size=settings.LLM_POOL_SIZE,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            lazy=settings.LLM_LAZY_INIT,
+            gateway=gateway_from_settings() if settings.LLM_GATEWAY_ENABLED else None,
+        )
+
+    def _build_clients(self) -> List["BaseChatModel"]:
+        started = time.perf_counter()
+        clients = [self._factory() for _ in range(self._size)]
+        logger.info("Created %d LLM client(s) in %.2fs.", len(clients), time.perf_counter() - started)
+        return clients
+
+    @property
+    def ready(self) -> bool:
+        return self._clients is not None
+
+    def start(self) -> None:
+        """Starts building the clients in the background (no-op if they exist or are being built)."""
+        if self._clients is None and self._init_task is None:
+            self._init_task = asyncio.create_task(asyncio.to_thread(self._build_clients))
+
+    async def ensure_clients(self) -> List["BaseChatModel"]:
+        """The clients, waiting for the background build if it is still running."""
+        if self._clients is None:
+            self.start()
+            task = self._init_task
+            try:
+                # shield: a cancelled request must not cancel the build everyone else is waiting on
+                self._clients = await asyncio.shield(task)
+            except Exception:
+                if self._init_task is task:
+                    self._init_task = None # let the next borrow retry
+                raise
+        return self._clients
+
+    @asynccontextmanager
+    async def borrow(self) -> AsyncIterator["BaseChatModel"]:
+        clients = await self.ensure_clients()
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                yield clients[next(self._next_client)]
+            finally:
+                self.in_flight -= 1
+
+    async def ainvoke(self, messages: Sequence[BaseMessage]) -> Any:
+        """One completion. Identical prompts in flight at the same time share a single upstream call."""
+        async def attempt():
+            # Borrowed per attempt: a request backing off doesn't hold a concurrency slot
+            async with self.borrow() as llm:
+                return await llm.ainvoke(messages)
+
+        if self.gateway is None:
+            return await attempt()
+        key = prompt_key(settings.LLM_MODEL_NAME, [(m.type, m.content) for m in messages])
+        return await self.gateway.acall(attempt, tokens=messages_tokens(messages), key=key)
+
+    async def astream(self, messages: Sequence[BaseMessage]) -> AsyncIterator[Any]:
+        """Streamed completion; retried only until the first chunk arrives, never coalesced."""
+        async def attempt():
+            async with self.borrow() as llm:
+                async for chunk in llm.astream(messages):
+                    yield chunk
+
+        if self.gateway is None:
+            async for chunk in attempt():
+                yield chunk
+            return
+        async for chunk in self.gateway.astream(attempt, tokens=messages_tokens(messages)):
+            yield chunk
+
+    async def warm_up(self) -> None:
+        """Sends one tiny prompt through every client so the first real request doesn't pay for connection setup."""
+        try:
+            await self.ensure_clients()
+            await asyncio.gather(*(client.ainvoke([HumanMessage(content="ping")]) for client in self._clients))
+            self.warm = True
+            logger.info("Warmed up %d LLM client(s).", len(self._clients))
+        except Exception as e:
+            logger.warning("LLM warm-up failed, continuing cold: %s", e)
+
+    async def close(self) -> None:
+        if self._init_task is not None and not self._init_task.done():
+            try:
+                await self._init_task # the worker thread can't be interrupted; let it finish
+            except Exception:
+                pass
+        self._init_task = None
+        self._clients = None
+        self.warm = False
+
+
+# Dependency to get the pool created in main.py's lifespan
+def get_llm_pool(request: Request) -> LLMClientPool:
+    return request.app.state.llm_pool
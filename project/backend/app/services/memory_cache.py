@@ -0,0 +1,141 @@
+# backend/app/services/memory_cache.py
+from collections import deque
+from typing import Awaitable, Callable, Deque, Iterable, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from backend.app.core.config import settings
+from backend.app.core.lru import LRUCache
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting English prompts
+    return max(1, len(text) // 4)
+
+
+def to_langchain_message(sender_type: str, content: str) -> Optional[BaseMessage]:
+    if sender_type == "user":
+        return HumanMessage(content=content)
+    if sender_type == "ai":
+        return AIMessage(content=content)
+    return None
+
+
+class SessionHistory:
+    """Rolling summary of a session plus the raw messages that came after it, oldest first."""
+
+    def __init__(self, max_messages: int, summary: Optional[str] = None, summary_upto_id: Optional[int] = None):
+        self.summary = summary
+        self.summary_upto_id = summary_upto_id
+        self.messages: Deque[Tuple[Optional[int], BaseMessage, int]] = deque(maxlen=max_messages)
+        self.newest_id: Optional[int] = None
+
+    def push(self, message_id: Optional[int], sender_type: str, content: str) -> None:
+        if message_id is not None and (self.newest_id is None or message_id > self.newest_id):
+            self.newest_id = message_id
+        message = to_langchain_message(sender_type, content)
+        if message is not None:
+            self.messages.append((message_id, message, estimate_tokens(content)))
+
+    def apply_summary(self, summary: str, upto_id: int) -> None:
+        if self.summary_upto_id is not None and upto_id <= self.summary_upto_id:
+            return # An older compaction finished after a newer one
+        self.summary = summary
+        self.summary_upto_id = upto_id
+        while self.messages and self.messages[0][0] is not None and self.messages[0][0] <= upto_id:
+            self.messages.popleft()
+
+    def is_behind(self, summary_upto_id: Optional[int], newest_id: Optional[int]) -> bool:
+        """Whether the DB has messages or a summary this copy hasn't seen (written by another worker)."""
+        def newer(db_id: Optional[int], cached_id: Optional[int]) -> bool:
+            return db_id is not None and (cached_id is None or db_id > cached_id)
+        return newer(newest_id, self.newest_id) or newer(summary_upto_id, self.summary_upto_id)
+
+
+# What a cache-miss loader returns: (summary, summary_upto_id, [(message_id, sender_type, content), ...])
+HistorySnapshot = Tuple[Optional[str], Optional[int], Iterable[Tuple[int, str, str]]]
+# What a cache-hit check returns: (summary_upto_id, newest message id) as stored in the DB
+SessionHead = Tuple[Optional[int], Optional[int]]
+
+
+class SessionMemoryCache:
+    """
+    Per-session conversation history kept in process, keyed by session_id.
+
+    A session's summary and recent messages are loaded from the DB once (on a
+    miss) and then appended to as the chat service writes new messages, so a
+    turn doesn't re-query the history. Prompts get a token-budgeted window of it.
+    With several workers, another process may have written to the session
+    since: a hit is checked against the session's newest message id and
+    summary in the DB (one indexed read), and reloaded if it is behind.
+    """
+
+    def __init__(self, max_sessions: int, max_messages: int, token_budget: int, ttl: Optional[float] = None):
+        self.max_messages = max_messages
+        self.token_budget = token_budget
+        self._sessions = LRUCache(maxsize=max_sessions, ttl=ttl)
+        self.stale_reloads = 0 # hits reloaded because another worker wrote to the session
+
+    @classmethod
+    def from_settings(cls) -> "SessionMemoryCache":
+        return cls(
+            max_sessions=settings.MEMORY_CACHE_MAX_SESSIONS,
+            max_messages=settings.MEMORY_MAX_MESSAGES,
+            token_budget=settings.MEMORY_TOKEN_BUDGET,
+            ttl=settings.MEMORY_CACHE_TTL_SECONDS,
+        )
+
+    async def get_window(
+        self,
+        session_id: int,
+        loader: Callable[[int], Awaitable[HistorySnapshot]],
+        head: Optional[Callable[[], Awaitable[SessionHead]]] = None
+    ) -> Tuple[Optional[str], List[BaseMessage]]:
+        """
+        Returns the session's rolling summary (if any) and the newest messages
+        after it that fit in the token budget, oldest first.
+        `loader(limit)` is only awaited when the session isn't cached, or when
+        `head()`, awaited on a hit, shows the cached copy is behind the DB.
+        """
+        history = self._sessions.get(session_id)
+        if history is not None and head is not None and history.is_behind(*await head()):
+            self.stale_reloads += 1
+            history = None
+        if history is None:
+            summary, summary_upto_id, rows = await loader(self.max_messages)
+            history = SessionHistory(self.max_messages, summary, summary_upto_id)
+            for message_id, sender_type, content in rows:
+                history.push(message_id, sender_type, content)
+            self._sessions.set(session_id, history)
+
+        used = estimate_tokens(history.summary) if history.summary else 0
+        window: List[BaseMessage] = []
+        for _, message, tokens in reversed(history.messages):
+            if used + tokens > self.token_budget:
+                break
+            window.append(message)
+            used += tokens
+        window.reverse()
+        return history.summary, window
+
+    def append(self, session_id: int, message_id: Optional[int], sender_type: str, content: str) -> None:
+        """Write-through hook for newly persisted messages. Uncached sessions are left to load lazily."""
+        history = self._sessions.get(session_id)
+        if history is not None:
+            history.push(message_id, sender_type, content)
+
+    def unsummarized_count(self, session_id: int) -> Optional[int]:
+        """Raw messages held after the summary, or None if the session isn't cached."""
+        history = self._sessions.get(session_id)
+        return None if history is None else len(history.messages)
+
+    def apply_summary(self, session_id: int, summary: str, upto_id: int) -> None:
+        history = self._sessions.get(session_id)
+        if history is not None:
+            history.apply_summary(summary, upto_id)
+
+    def invalidate(self, session_id: int) -> None:
+        self._sessions.pop(session_id)
+
+
+session_memory_cache = SessionMemoryCache.from_settings()
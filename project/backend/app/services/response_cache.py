@@ -0,0 +1,130 @@
+# backend/app/services/response_cache.py
+import hashlib
+import re
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from fastapi import Request
+from langchain_core.messages import BaseMessage
+
+from backend.app.core.config import settings
+from backend.app.core.lru import LRUCache
+from backend.app.rag.embeddings import Embedder
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class ResponseCache:
+    """
+    Caches LLM replies keyed on (prompt context, user message) so repeated
+    questions skip the Gemini round trip.
+
+    - exact tier: hash of the normalized user message + the context key
+    - semantic tier (optional, needs an embedder): same context key and
+      cosine similarity of the user message >= `semantic_threshold`
+
+    The context key covers everything else in the prompt (system prompt,
+    summary, retrieved passages, history window), so a cached reply is only
+    reused when the model would have seen the same conversation.
+    Both tiers are LRU with a TTL.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float],
+        embedder: Optional[Embedder] = None,
+        semantic_threshold: float = 0.95,
+        semantic_maxsize: int = 1024,
+    ):
+        self.embedder = embedder
+        self.semantic_threshold = semantic_threshold
+        self._exact = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._semantic = LRUCache(maxsize=semantic_maxsize, ttl=ttl) if embedder is not None else None
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.stores = 0
+
+    @classmethod
+    def from_settings(cls, embedder: Optional[Embedder] = None) -> "ResponseCache":
+        return cls(
+            maxsize=settings.RESPONSE_CACHE_MAXSIZE,
+            ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+            embedder=embedder if settings.RESPONSE_CACHE_SEMANTIC else None,
+            semantic_threshold=settings.RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+            semantic_maxsize=settings.RESPONSE_CACHE_SEMANTIC_MAXSIZE,
+        )
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self._semantic is not None
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return _WHITESPACE_RE.sub(" ", prompt.strip().lower()).rstrip(" ?!.")
+
+    @staticmethod
+    def context_key(messages: Sequence[BaseMessage]) -> str:
+        digest = hashlib.sha256()
+        for message in messages:
+            digest.update(message.type.encode("utf-8"))
+            digest.update(b"\x00")
+            digest.update(str(message.content).encode("utf-8"))
+            digest.update(b"\x01")
+        return digest.hexdigest()
+
+    def _key(self, context_key: str, prompt: str) -> str:
+        return hashlib.sha256(f"{context_key}\x00{self.normalize(prompt)}".encode("utf-8")).hexdigest()
+
+    def record_bypass(self) -> None:
+        self.bypassed += 1
+
+    def lookup(self, context_key: str, prompt: str, query_vector: Optional[np.ndarray] = None) -> Optional[str]:
+        response = self._exact.get(self._key(context_key, prompt))
+        if response is not None:
+            self.exact_hits += 1
+            return response
+
+        if self._semantic is not None and query_vector is not None:
+            best_score, best_key, best_response = self.semantic_threshold, None, None
+            for entry_key, (entry_context, vector, entry_response) in self._semantic.items():
+                if entry_context != context_key:
+                    continue
+                score = float(vector @ query_vector)
+                if score >= best_score:
+                    best_score, best_key, best_response = score, entry_key, entry_response
+            if best_key is not None:
+                self._semantic.get(best_key) # mark as recently used
+                self.semantic_hits += 1
+                return best_response
+
+        self.misses += 1
+        return None
+
+    def store(self, context_key: str, prompt: str, response: str, query_vector: Optional[np.ndarray] = None) -> None:
+        key = self._key(context_key, prompt)
+        self._exact.set(key, response)
+        if self._semantic is not None and query_vector is not None:
+            self._semantic.set(key, (context_key, np.asarray(query_vector, dtype=np.float32), response))
+        self.stores += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "stores": self.stores,
+            "hit_ratio": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "exact_entries": len(self._exact),
+            "exact_evictions": self._exact.evictions,
+            "semantic_entries": len(self._semantic) if self._semantic is not None else 0,
+        }
+
+
+# Dependency to get the cache created in main.py's lifespan (None when disabled)
+def get_response_cache(request: Request) -> Optional[ResponseCache]:
+    return getattr(request.app.state, "response_cache", None)
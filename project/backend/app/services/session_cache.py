@@ -0,0 +1,118 @@
+# backend/app/services/session_cache.py
+import itertools
+import threading
+from typing import List, Optional, Sequence
+
+from backend.app import schemas
+from backend.app.core.config import settings
+from backend.app.core.lru import LRUCache
+
+
+class UserSessionCache:
+    """
+    In-process cache of user records, (name, topic) -> user id logins and
+    per-user session lists, for the endpoints the frontend hits on every
+    login / session switch. Users are never renamed or deleted, so login
+    entries can't go stale.
+
+    Only the newest `sessions_per_user` sessions of a user are cached; pages
+    beyond them are read from the DB with LIMIT/OFFSET.
+
+    Write-through: create_chat_session results are pushed into the cached
+    list (newest first, same order as the DB query) instead of dropping it.
+    A list read from the DB before such a write is not cached over it:
+    put_sessions() takes the read_token() from before the query and drops
+    the list if the user's sessions changed since.
+    Each worker process has its own copy, so a session created through
+    another worker shows up here once the entry expires (USER_CACHE_TTL_SECONDS).
+    """
+
+    def __init__(self, max_users: int, ttl: Optional[float], sessions_per_user: int = 100):
+        self.sessions_per_user = sessions_per_user
+        self._users = LRUCache(maxsize=max_users, ttl=ttl)
+        self._logins = LRUCache(maxsize=max_users, ttl=ttl)
+        # user_id -> (newest sessions, whether that is all of them)
+        self._sessions = LRUCache(maxsize=max_users, ttl=ttl)
+        # user_id -> token of the last session write-through
+        self._session_writes = LRUCache(maxsize=max_users, ttl=ttl)
+        self._tokens = itertools.count(1)
+        self._sessions_lock = threading.Lock() # endpoints run in the threadpool
+
+    @classmethod
+    def from_settings(cls) -> "UserSessionCache":
+        return cls(
+            max_users=settings.USER_CACHE_MAX_USERS,
+            ttl=settings.USER_CACHE_TTL_SECONDS,
+            sessions_per_user=settings.USER_CACHE_SESSIONS_PER_USER,
+        )
+
+    def get_user(self, user_id: int) -> Optional[schemas.user.User]:
+        return self._users.get(user_id)
+
+    def get_user_by_login(self, name: str, topic: str) -> Optional[schemas.user.User]:
+        user_id = self._logins.get((name, topic))
+        return self._users.get(user_id) if user_id is not None else None
+
+    def put_user(self, user) -> schemas.user.User:
+        user = schemas.user.User.model_validate(user)
+        self._users.set(user.id, user)
+        self._logins.set((user.name, user.topic_of_interest), user.id)
+        return user
+
+    def get_sessions(self, user_id: int, skip: int = 0, limit: int = 100) -> Optional[List[schemas.session.ChatSession]]:
+        """The page if the cached prefix covers it, else None."""
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            return None
+        sessions, complete = entry
+        if not complete and skip + limit > len(sessions):
+            return None
+        return sessions[skip:skip + limit]
+
+    def read_token(self) -> int:
+        """Taken before reading a session list from the DB, for put_sessions()."""
+        return next(self._tokens)
+
+    def put_sessions(self, user_id: int, sessions: Sequence, read_token: int) -> List[schemas.session.ChatSession]:
+        """
+        Caches the newest sessions_per_user of `sessions` (a DB read of at least
+        sessions_per_user + 1 rows, so a complete list can be told apart).
+        Returns all of them as schemas.
+        """
+        validated = [schemas.session.ChatSession.model_validate(session) for session in sessions]
+        with self._sessions_lock:
+            if self._session_writes.get(user_id, 0) < read_token:
+                self._sessions.set(user_id, (validated[:self.sessions_per_user], len(validated) <= self.sessions_per_user))
+        return validated
+
+    def add_session(self, session) -> schemas.session.ChatSession:
+        session = schemas.session.ChatSession.model_validate(session)
+        with self._sessions_lock:
+            self._session_writes.set(session.user_id, next(self._tokens))
+            entry = self._sessions.get(session.user_id)
+            if entry is not None:
+                sessions, complete = entry
+                # Copy rather than mutate: other requests may be reading the old list
+                sessions = [session, *sessions]
+                if len(sessions) > self.sessions_per_user:
+                    sessions, complete = sessions[:self.sessions_per_user], False
+                self._sessions.set(session.user_id, (sessions, complete))
+        return session
+
+    def invalidate(self, user_id: int) -> None:
+        user = self._users.pop(user_id)
+        if user is not None:
+            self._logins.pop((user.name, user.topic_of_interest))
+        self._sessions.pop(user_id)
+
+    def clear(self) -> None:
+        self._users.clear()
+        self._logins.clear()
+        self._sessions.clear()
+        self._session_writes.clear()
+
+    def stats(self):
+        return {"users": self._users.stats(), "logins": self._logins.stats(), "sessions": self._sessions.stats()}
+
+
+user_session_cache = UserSessionCache.from_settings()
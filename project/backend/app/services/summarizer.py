@@ -0,0 +1,111 @@
+# backend/app/services/summarizer.py
+import logging
+import asyncio
+from typing import Optional, Set
+
+from fastapi import Request
+from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.app.core.config import settings
+from backend.app.db import crud
+from backend.app.db.database import AsyncSessionLocal
+from backend.app.services.llm_pool import LLMClientPool
+from backend.app.services.memory_cache import SessionMemoryCache, session_memory_cache
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "Progressively summarize the lines of conversation provided, adding onto the previous summary "
+    "and returning a new summary. Keep names, facts, decisions and open questions; drop small talk."
+)
+
+
+class SessionCompactor:
+    """
+    Background worker that folds the older messages of long sessions into
+    ChatSession.summary, leaving only the newest `keep_recent` messages raw.
+
+    ChatService calls schedule() after a turn; the summarization LLM call runs
+    in this worker's task, never on the request path.
+    """
+
+    def __init__(
+        self,
+        llm_pool: LLMClientPool,
+        memory_cache: SessionMemoryCache = session_memory_cache,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        keep_recent: int = settings.SUMMARY_KEEP_RECENT_MESSAGES,
+        batch: int = settings.SUMMARY_BATCH_MESSAGES,
+    ):
+        self.llm_pool = llm_pool
+        self.memory_cache = memory_cache
+        self.session_factory = session_factory
+        self.keep_recent = keep_recent
+        self.batch = batch
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue()
+        self._pending: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def should_compact(self, unsummarized_count: Optional[int]) -> bool:
+        return unsummarized_count is not None and unsummarized_count >= self.keep_recent + self.batch
+
+    def schedule(self, session_id: int) -> None:
+        if session_id not in self._pending:
+            self._pending.add(session_id)
+            self._queue.put_nowait(session_id)
+
+    async def _run(self) -> None:
+        while True:
+            session_id = await self._queue.get()
+            self._pending.discard(session_id)
+            try:
+                await self.compact(session_id)
+            except Exception as e:
+                logger.exception("Compaction failed for session %s: %s", session_id, e)
+
+    async def compact(self, session_id: int) -> bool:
+        async with self.session_factory() as db:
+            session = await crud.get_session_async(db, session_id=session_id)
+            if session is None:
+                return False
+            messages = await crud.get_messages_after_async(db, session_id=session_id, after_id=session.summary_upto_message_id)
+            previous_summary = session.summary
+            await db.commit() # Don't hold the connection during the LLM call
+
+            to_fold = messages[:-self.keep_recent] if self.keep_recent else messages
+            if len(to_fold) < self.batch:
+                return False
+
+            transcript = "\n".join(
+                f"{'Human' if m.sender_type == 'user' else 'AI'}: {m.content}" for m in to_fold
+            )
+            prompt = [
+                SystemMessage(content=SUMMARY_PROMPT),
+                HumanMessage(content=f"Current summary:\n{previous_summary or '(none)'}\n\nNew lines of conversation:\n{transcript}\n\nNew summary:"),
+            ]
+            new_summary = (await self.llm_pool.ainvoke(prompt)).content
+
+            upto_id = to_fold[-1].id
+            written = await crud.update_session_summary_async(db, session_id=session_id, summary=new_summary, upto_message_id=upto_id)
+            if written:
+                self.memory_cache.apply_summary(session_id, new_summary, upto_id)
+            return written
+
+
+# Dependency to get the compactor created in main.py's lifespan (None when summaries are disabled)
+def get_session_compactor(request: Request) -> Optional[SessionCompactor]:
+    return getattr(request.app.state, "session_compactor", None)
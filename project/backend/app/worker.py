@@ -0,0 +1,26 @@
+# backend/app/worker.py
+from typing import Any
+
+from uvicorn.workers import UvicornWorker
+
+# Seconds of gunicorn's graceful_timeout kept back for the lifespan shutdown
+# (drain bookkeeping, write-behind flush, closing pools) after requests are done
+SHUTDOWN_RESERVE_SECONDS = 10
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker for gunicorn (see gunicorn.conf.py). On SIGTERM uvicorn stops
+    accepting connections and waits for in-flight responses, including chat
+    replies that are still streaming. Stock UvicornWorker waits without a limit,
+    so gunicorn SIGKILLs the worker at graceful_timeout, before the lifespan
+    shutdown runs. This worker stops waiting a little earlier so shutdown can
+    still flush and close things.
+    """
+
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto", "lifespan": "on"}
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        graceful = self.cfg.graceful_timeout
+        self.config.timeout_graceful_shutdown = max(1, graceful - min(SHUTDOWN_RESERVE_SECONDS, graceful // 2))
@@ -0,0 +1,60 @@
+"""initial schema, as created by create_all before migrations existed
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created by the old create-on-startup code already have these
+tables: `alembic stamp 0001` them (or `stamp 0002` if chat_sessions already
+has the summary columns) and then `alembic upgrade head`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("topic_of_interest", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("name", "topic_of_interest", name="_user_name_topic_uc"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_name", "users", ["name"])
+    op.create_index("ix_users_topic_of_interest", "users", ["topic_of_interest"])
+
+    op.create_table(
+        "chat_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("session_name", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_chat_sessions_id", "chat_sessions", ["id"])
+    op.create_index("ix_chat_sessions_session_name", "chat_sessions", ["session_name"])
+
+    op.create_table(
+        "chat_messages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("chat_sessions.id"), nullable=False),
+        sa.Column("sender_type", sa.String(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_chat_messages_id", "chat_messages", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("chat_messages")
+    op.drop_table("chat_sessions")
+    op.drop_table("users")
@@ -0,0 +1,48 @@
+"""indexes for the hot list queries; drop the ones nothing filters on
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+- chat_messages (session_id, id): get_messages_by_session / get_recent_messages_async
+  filter on session_id and order / keyset-paginate on id
+- chat_sessions (user_id, created_at, id): session lists filter on user_id and
+  order by created_at (id breaks ties)
+- dropped: ix_*_id (duplicates of the primary keys), ix_users_name and
+  ix_users_topic_of_interest (login looks up (name, topic), which the
+  _user_name_topic_uc unique index already covers), ix_chat_sessions_session_name
+  (never filtered on)
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNUSED_INDEXES = [
+    ("users", "ix_users_id", ["id"]),
+    ("users", "ix_users_name", ["name"]),
+    ("users", "ix_users_topic_of_interest", ["topic_of_interest"]),
+    ("chat_sessions", "ix_chat_sessions_id", ["id"]),
+    ("chat_sessions", "ix_chat_sessions_session_name", ["session_name"]),
+    ("chat_messages", "ix_chat_messages_id", ["id"]),
+]
+
+
+def upgrade() -> None:
+    # if_not_exists: databases created with create_all after the keyset pagination change already have it
+    op.create_index("ix_chat_messages_session_id_id", "chat_messages", ["session_id", "id"], if_not_exists=True)
+    op.create_index("ix_chat_sessions_user_id_created_at", "chat_sessions", ["user_id", "created_at", "id"], if_not_exists=True)
+    for table, name, _ in UNUSED_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    for table, name, columns in UNUSED_INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    op.drop_index("ix_chat_sessions_user_id_created_at", table_name="chat_sessions")
+    op.drop_index("ix_chat_messages_session_id_id", table_name="chat_messages")
@@ -0,0 +1,46 @@
+"""rag_chunks table for VECTOR_BACKEND=pgvector (rag/index.py PgVectorIndex)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Postgres only, and only where the pgvector extension is available on the
+server; elsewhere this is a no-op (the numpy / ivf backends keep their index
+in process). The embedding width is EMBEDDING_DIM at the time of the upgrade.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.app.core.config import settings
+
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _pgvector_available() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    return bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")).first() is not None
+
+
+def upgrade() -> None:
+    if not _pgvector_available():
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS rag_chunks ("
+        f"id TEXT PRIMARY KEY, payload JSONB NOT NULL, embedding vector({int(settings.EMBEDDING_DIM)}) NOT NULL)"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_rag_chunks_embedding_hnsw ON rag_chunks USING hnsw (embedding vector_cosine_ops)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP TABLE IF EXISTS rag_chunks")
@@ -0,0 +1,35 @@
+"""index rag_chunks by source, for dropping a re-ingested document's stale chunks
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+rag/ingest.py looks up every chunk of a changed or deleted file by
+payload->>'source' (PgVectorIndex.ids_for_source). Only where 0004 created
+rag_chunks.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_rag_chunks() -> bool:
+    bind = op.get_bind()
+    return bind.dialect.name == "postgresql" and sa.inspect(bind).has_table("rag_chunks")
+
+
+def upgrade() -> None:
+    if _has_rag_chunks():
+        op.execute("CREATE INDEX IF NOT EXISTS ix_rag_chunks_source ON rag_chunks ((payload->>'source'))")
+
+
+def downgrade() -> None:
+    if _has_rag_chunks():
+        op.execute("DROP INDEX IF EXISTS ix_rag_chunks_source")
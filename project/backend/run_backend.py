@@ -1,26 +1,70 @@
 # backend/run_backend.py
+"""
+Starts the API with uvicorn.
+
+    python backend/run_backend.py                  # development: one process, auto-reload
+    python backend/run_backend.py --production     # gunicorn, one uvicorn worker per CPU core
+    python backend/run_backend.py --production --workers 4 --port 8080
+
+Production mode runs gunicorn with project/gunicorn.conf.py (preloaded app,
+graceful drain on SIGTERM). Where gunicorn isn't available (Windows) it falls
+back to uvicorn's own multi-process mode. It doesn't create tables; run
+`alembic upgrade head` first (or set DB_CREATE_TABLES_ON_STARTUP=true for a
+throwaway database). WEB_CONCURRENCY sets the default worker count.
+"""
+import argparse
+import importlib.util
 import uvicorn
 import os
 import sys
 
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--production", action="store_true", help="no auto-reload, multiple worker processes")
+    parser.add_argument("--workers", type=int, help="worker processes in production mode (default: WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
     # Calculate the project root directory (one level up from 'backend' directory)
     PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     # Add the project root to sys.path
     if PROJECT_ROOT not in sys.path:
         sys.path.insert(0, PROJECT_ROOT)
-    
-    print(f"PROJECT_ROOT added to sys.path: {PROJECT_ROOT}")
-    print(f"Current sys.path: {sys.path}") # For debugging
 
     # Now Uvicorn should be able to find 'backend.app.main'
     # and within 'backend.app.main', imports should resolve correctly
     # if they are absolute from the project root (e.g., from backend.app.schemas)
 
-    uvicorn.run(
-        "backend.app.main:app",  # Path to the FastAPI app instance from project root
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        # reload_dirs=[os.path.join(PROJECT_ROOT, "backend")], # Optional: specify reload dirs
-    )
\ No newline at end of file
+    if args.production:
+        from backend.app.core.lifecycle import default_workers
+
+        workers = args.workers or default_workers()
+        if importlib.util.find_spec("gunicorn") is not None:
+            os.chdir(PROJECT_ROOT)
+            argv = [
+                sys.executable, "-m", "gunicorn", "backend.app.main:app",
+                "--config", os.path.join(PROJECT_ROOT, "gunicorn.conf.py"),
+                "--workers", str(workers),
+                "--bind", f"{args.host}:{args.port}",
+            ]
+            os.execv(sys.executable, argv) # gunicorn becomes this process, so signals reach its master
+        print(f"gunicorn not installed, starting {workers} uvicorn worker(s) on {args.host}:{args.port}")
+        uvicorn.run(
+            "backend.app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            app_dir=PROJECT_ROOT, # worker processes re-import the app by name
+            access_log=False, # request metrics are on /metrics
+        )
+    else:
+        print(f"PROJECT_ROOT added to sys.path: {PROJECT_ROOT}")
+        uvicorn.run(
+            "backend.app.main:app",  # Path to the FastAPI app instance from project root
+            host=args.host,
+            port=args.port,
+            reload=True,
+            # reload_dirs=[os.path.join(PROJECT_ROOT, "backend")], # Optional: specify reload dirs
+        )
@@ -0,0 +1,126 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold start of the backend:
+
+- import:     `import backend.app.main` in a fresh interpreter (median of --runs)
+- ready:      uvicorn process spawned -> first 200 from GET /
+- first turn: login + new session + first chat message right after ready,
+              i.e. what the first user pays for anything startup deferred
+
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --save-baseline benchmarks/cold_start.json
+    python -m benchmarks.bench_cold_start --baseline benchmarks/cold_start.json --threshold 0.25
+
+The server runs against the fake LLM with --init-cost seconds of client
+setup, standing in for importing langchain_google_genai and building the
+Gemini client (about 1.5s here). Both LLM_LAZY_INIT modes are measured:
+"eager" builds the clients before serving, "lazy" in the background after.
+Exits 1 on regressions against --baseline.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.common import PROJECT_ROOT
+from benchmarks.harness import _free_port, configure_harness_environment
+
+
+def measure_import(runs: int) -> float:
+    code = "import time; t = time.perf_counter(); import backend.app.main; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=os.environ.copy(), capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def measure_server(lazy: bool, timeout: float = 60.0) -> Dict[str, float]:
+    import httpx
+
+    port = _free_port()
+    env = {**os.environ, "LLM_LAZY_INIT": str(lazy).lower()}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while True:
+                try:
+                    if client.get("/").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError("server did not come up")
+                time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            turn_started = time.perf_counter()
+            user = client.post("/api/v1/users/login", json={"name": f"cold-{port}", "topic_of_interest": "startup"}).json()
+            session = client.post(f"/api/v1/users/{user['id']}/sessions", json={"session_name": "cold start"}).json()
+            client.post(f"/api/v1/sessions/{session['id']}/messages", json={"content": "hello"}).raise_for_status()
+            first_turn = time.perf_counter() - turn_started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return {"ready": ready, "first_turn": first_turn}
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    return [
+        f"{name}: {value:.3f}s vs baseline {baseline[name]:.3f}s"
+        for name, value in results.items()
+        if name in baseline and value > baseline[name] * (1 + threshold)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters for the import measurement")
+    parser.add_argument("--init-cost", type=float, default=1.5, help="simulated LLM client setup time (s)")
+    parser.add_argument("--baseline", help="JSON baseline to compare against")
+    parser.add_argument("--save-baseline", help="write this run's results as a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed regression as a fraction")
+    args = parser.parse_args(argv)
+
+    configure_harness_environment(latency=0.05, tokens_per_second=0.0)
+    os.environ.setdefault("FAKE_LLM_INIT_COST", str(args.init_cost))
+
+    results = {"import": measure_import(args.runs)}
+    for mode, lazy in (("eager", False), ("lazy", True)):
+        for name, value in measure_server(lazy).items():
+            results[f"{mode}_{name}"] = value
+
+    print(f"import backend.app.main  {results['import']:.3f}s (median of {args.runs})")
+    print(f"{'mode':<6} {'ready s':>8} {'first turn s':>13} {'ready + first turn':>19}")
+    for mode in ("eager", "lazy"):
+        ready, first_turn = results[f"{mode}_ready"], results[f"{mode}_first_turn"]
+        print(f"{mode:<6} {ready:>8.3f} {first_turn:>13.3f} {ready + first_turn:>19.3f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
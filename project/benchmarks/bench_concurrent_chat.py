@@ -0,0 +1,73 @@
+# benchmarks/bench_concurrent_chat.py
+"""
+Fires N concurrent POST /sessions/{id}/messages requests at the app in-process,
+with the Gemini client replaced by FakeChatModel, and reports wall time,
+throughput and latency percentiles.
+
+    python -m benchmarks.bench_concurrent_chat --requests 300 --latency 1.0
+
+With the async chat path all requests overlap on a single event loop, so wall
+time stays close to one LLM latency. The old sync endpoint was capped by
+Starlette's threadpool (40 workers), i.e. ~ceil(N / 40) * latency.
+"""
+import argparse
+import asyncio
+import math
+import time
+
+from benchmarks.common import configure_environment, percentile
+
+configure_environment("bench_concurrent_chat.db")
+
+import httpx  # noqa: E402
+
+from backend.app.main import app  # noqa: E402
+from backend.app.db.database import create_db_tables  # noqa: E402
+from backend.app.services.llm_pool import LLMClientPool  # noqa: E402
+from benchmarks.fake_llm import FakeChatModel  # noqa: E402
+
+SYNC_THREADPOOL_WORKERS = 40
+
+
+async def run(num_requests: int, num_sessions: int, latency: float) -> None:
+    create_db_tables()
+    # ASGITransport doesn't run the lifespan, so install the pool it would have created
+    app.state.llm_pool = LLMClientPool(factory=lambda: FakeChatModel(latency=latency), max_concurrency=num_requests)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        user = (await client.post("/api/v1/users/login", json={"name": "bench", "topic_of_interest": "load"})).json()
+        session_ids = []
+        for i in range(num_sessions):
+            resp = await client.post(f"/api/v1/users/{user['id']}/sessions", json={"session_name": f"bench-{i}"})
+            session_ids.append(resp.json()["id"])
+
+        latencies = []
+
+        async def one(i: int) -> None:
+            started = time.perf_counter()
+            resp = await client.post(
+                f"/api/v1/sessions/{session_ids[i % num_sessions]}/messages",
+                json={"content": f"question {i}"},
+            )
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(num_requests)))
+        wall = time.perf_counter() - started
+
+    sync_estimate = math.ceil(num_requests / SYNC_THREADPOOL_WORKERS) * latency
+    print(f"requests:        {num_requests} over {num_sessions} sessions, fake LLM latency {latency:.2f}s")
+    print(f"wall time:       {wall:.2f}s (sync threadpool bound ~{sync_estimate:.2f}s)")
+    print(f"throughput:      {num_requests / wall:.1f} req/s")
+    print(f"latency p50/p95/p99: {percentile(latencies, 50):.3f}s / {percentile(latencies, 95):.3f}s / {percentile(latencies, 99):.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.sessions, args.latency))
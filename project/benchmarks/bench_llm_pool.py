@@ -0,0 +1,68 @@
+# benchmarks/bench_llm_pool.py
+"""
+Per-request LLM client construction vs borrowing from the shared LLMClientPool.
+
+    python -m benchmarks.bench_llm_pool --requests 500 --init-cost 0.005
+
+Each "request" gets a client and makes one call to a zero-latency FakeChatModel,
+so the numbers isolate the client overhead. With --real-client the per-request
+side builds a real ChatGoogleGenerativeAI (no network call is made) to show the
+setup cost the pool avoids.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_environment, percentile
+
+configure_environment("bench_llm_pool.db")
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from backend.app.services.llm_pool import LLMClientPool  # noqa: E402
+from benchmarks.fake_llm import FakeChatModel  # noqa: E402
+
+
+def report(label: str, samples, total: float, constructed: int) -> None:
+    print(f"{label:<14} total {total:.3f}s | per request p50 {percentile(samples, 50) * 1000:.3f}ms "
+          f"p99 {percentile(samples, 99) * 1000:.3f}ms | clients constructed: {constructed}")
+
+
+async def run(num_requests: int, init_cost: float, real_client: bool) -> None:
+    prompt = [HumanMessage(content="hello")]
+
+    def per_request_client():
+        if real_client:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            return ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key="benchmark-dummy-key")
+        return FakeChatModel(latency=0.0, init_cost=init_cost)
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(num_requests):
+        t0 = time.perf_counter()
+        client = per_request_client()
+        if not real_client:
+            await client.ainvoke(prompt)
+        samples.append(time.perf_counter() - t0)
+    report("per-request", samples, time.perf_counter() - started, num_requests)
+
+    pool = LLMClientPool(factory=lambda: FakeChatModel(latency=0.0, init_cost=init_cost))
+    samples = []
+    started = time.perf_counter()
+    for _ in range(num_requests):
+        t0 = time.perf_counter()
+        async with pool.borrow() as client:
+            if not real_client:
+                await client.ainvoke(prompt)
+        samples.append(time.perf_counter() - t0)
+    report("pooled", samples, time.perf_counter() - started, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--init-cost", type=float, default=0.005, help="simulated client setup time in seconds")
+    parser.add_argument("--real-client", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.init_cost, args.real_client))
@@ -0,0 +1,135 @@
+# benchmarks/bench_login.py
+"""
+Concurrent first logins for the same (name, topic) pairs.
+
+- crud level: `--threads` threads hit each fresh pair at once (behind a barrier)
+  with the old SELECT-then-INSERT (get_user_by_name_and_topic + create_user)
+  and with the get_or_create_user upsert. Counts failed logins, users per pair
+  (must be 1) and statements per login.
+- endpoint level: the same burst through POST /api/v1/users/login in-process,
+  first with the login cache cold, then repeated against the warm cache.
+
+    python -m benchmarks.bench_login --pairs 50 --threads 16
+
+Uses a temp SQLite file unless DATABASE_URL is set (point it at Postgres to
+exercise the ON CONFLICT path and real concurrent writers).
+"""
+import argparse
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import configure_environment, percentile
+from benchmarks.harness import configure_harness_environment
+
+configure_environment("bench_login.db")
+configure_harness_environment(latency=0.0, tokens_per_second=0.0) # fake LLM etc. for the endpoint part
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from backend.app import schemas  # noqa: E402
+from backend.app.db import crud, models  # noqa: E402
+from backend.app.db.database import SessionLocal, create_db_tables, engine  # noqa: E402
+
+
+def legacy_login(db, user_in):
+    user = crud.get_user_by_name_and_topic(db, name=user_in.name, topic=user_in.topic_of_interest)
+    if not user:
+        user = crud.create_user(db=db, user=user_in)
+    return user
+
+
+def upsert_login(db, user_in):
+    return crud.get_or_create_user(db, user=user_in)
+
+
+def run_crud(label: str, login, pairs: int, threads: int, statements: list) -> None:
+    statements[0] = 0
+    failures = 0
+    latencies = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for pair in range(pairs):
+            user_in = schemas.user.UserCreate(name=f"{label}-{pair}", topic_of_interest="race")
+            barrier = threading.Barrier(threads)
+
+            def one():
+                barrier.wait()
+                t0 = time.perf_counter()
+                with SessionLocal() as db:
+                    try:
+                        login(db, user_in)
+                        return time.perf_counter() - t0
+                    except Exception:
+                        return None
+
+            for result in pool.map(lambda _: one(), range(threads)):
+                if result is None:
+                    failures += 1
+                else:
+                    latencies.append(result)
+    wall = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        per_pair = db.execute(
+            select(func.count()).select_from(models.User).where(models.User.name.like(f"{label}-%")).group_by(models.User.name)
+        ).scalars().all()
+    logins = pairs * threads
+    print(
+        f"{label:<8} {logins:>7} {failures:>8} {max(per_pair, default=0):>10} {logins / wall:>9.1f} "
+        f"{percentile(latencies, 50) * 1000:>8.2f} {percentile(latencies, 99) * 1000:>8.2f} {statements[0] / logins:>8.2f}"
+    )
+
+
+async def run_endpoint(pairs: int, threads: int) -> None:
+    import httpx
+
+    from backend.app.main import app
+    from backend.app.services.session_cache import user_session_cache
+
+    user_session_cache.clear()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for phase in ("cold", "warm"):
+                started = time.perf_counter()
+                responses = await asyncio.gather(*(
+                    client.post("/api/v1/users/login", json={"name": f"http-{pair}", "topic_of_interest": "race"})
+                    for pair in range(pairs) for _ in range(threads)
+                ))
+                wall = time.perf_counter() - started
+                errors = sum(resp.status_code != 200 for resp in responses)
+                ids = {}
+                for resp in responses:
+                    if resp.status_code == 200:
+                        ids.setdefault(resp.json()["name"], set()).add(resp.json()["id"])
+                print(
+                    f"endpoint {phase:<5} {len(responses)} logins, {errors} errors, "
+                    f"max ids per pair {max(map(len, ids.values()), default=0)}, {len(responses) / wall:.1f} logins/s"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=50, help="fresh (name, topic) pairs per mode")
+    parser.add_argument("--threads", type=int, default=16, help="concurrent logins per pair")
+    args = parser.parse_args()
+
+    create_db_tables()
+    statements = [0]
+
+    def _count(*_):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    print(f"{args.pairs} pairs x {args.threads} concurrent logins ({engine.dialect.name})")
+    print(f"{'mode':<8} {'logins':>7} {'failures':>8} {'users/pair':>10} {'logins/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'stmts':>8}")
+    run_crud("legacy", legacy_login, args.pairs, args.threads, statements)
+    run_crud("upsert", upsert_login, args.pairs, args.threads, statements)
+    event.remove(engine, "before_cursor_execute", _count)
+    asyncio.run(run_endpoint(args.pairs, args.threads))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_session_memory.py
+"""
+Drives one long chat session and reports, every few turns, how many SQL
+statements a turn costs and how large the prompt sent to the LLM is.
+
+    python -m benchmarks.bench_session_memory --turns 120
+
+With the per-session memory cache the history SELECT only happens on the first
+turn (the remaining chat_messages SELECTs are the post-insert refreshes), and the
+prompt stays flat: older turns are folded into the rolling summary by the
+background SessionCompactor (pass --no-summary to see the token-budget cap alone).
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import configure_environment
+
+configure_environment("bench_session_memory.db")
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from backend.app.main import app  # noqa: E402
+from backend.app.db.database import async_engine, create_db_tables  # noqa: E402
+from backend.app.services.llm_pool import LLMClientPool  # noqa: E402
+from backend.app.services.summarizer import SessionCompactor  # noqa: E402
+from benchmarks.fake_llm import FakeChatModel  # noqa: E402
+
+
+async def run(turns: int, report_every: int, summary: bool) -> None:
+    create_db_tables()
+    fake_llm = FakeChatModel(latency=0.0, reply="A moderately long canned answer " * 8)
+    app.state.llm_pool = LLMClientPool(factory=lambda: fake_llm)
+    app.state.session_compactor = SessionCompactor(llm_pool=app.state.llm_pool) if summary else None
+    if summary:
+        app.state.session_compactor.start()
+
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        user = (await client.post("/api/v1/users/login", json={"name": "bench", "topic_of_interest": "memory"})).json()
+        session = (await client.post(f"/api/v1/users/{user['id']}/sessions", json={"session_name": "long"})).json()
+
+        print(f"{'turn':>5} {'sql stmts':>10} {'msg SELECTs':>12} {'prompt chars':>13}")
+        for turn in range(1, turns + 1):
+            statements.clear()
+            resp = await client.post(f"/api/v1/sessions/{session['id']}/messages", json={"content": f"question number {turn} " * 4})
+            resp.raise_for_status()
+            await asyncio.sleep(0) # let the compactor pick up scheduled work
+            if turn == 1 or turn % report_every == 0:
+                selects = sum(1 for s in statements if s.lstrip().upper().startswith("SELECT") and "chat_messages" in s)
+                print(f"{turn:>5} {len(statements):>10} {selects:>12} {fake_llm.last_prompt_chars:>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=120)
+    parser.add_argument("--report-every", type=int, default=20)
+    parser.add_argument("--no-summary", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.report_every, not args.no_summary))
@@ -0,0 +1,117 @@
+# benchmarks/bench_turn_persistence.py
+"""
+DB cost of persisting one chat turn (user message + AI reply), measured
+directly against the async engine:
+
+- per-message: crud.create_chat_message_async twice (add + commit + refresh each)
+- per-turn:    crud.create_chat_turn_async (one INSERT ... RETURNING, one commit)
+- write-behind: the same call with the write-behind log active, so turns are
+  queued and group-committed by the background flusher (wall time includes
+  the final flush)
+
+    python -m benchmarks.bench_turn_persistence --turns 500 --concurrency 20
+
+Reports DB time per turn, statements per turn and commits per turn. Point
+DATABASE_URL at Postgres to see the fsync savings; the default is a temp SQLite file.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_environment, percentile
+
+configure_environment("bench_turn_persistence.db")
+
+from sqlalchemy import event  # noqa: E402
+
+from backend.app import schemas  # noqa: E402
+from backend.app.db import crud, models  # noqa: E402
+from backend.app.db.database import AsyncSessionLocal, SessionLocal, async_engine, create_db_tables  # noqa: E402
+from backend.app.db.write_behind import MessageWriteBehind, set_active_write_behind  # noqa: E402
+
+
+def _turn(session_id: int, i: int):
+    return [
+        schemas.message.ChatMessageCreateInternal(session_id=session_id, sender_type="user", content=f"question {i}"),
+        schemas.message.ChatMessageCreateInternal(session_id=session_id, sender_type="ai", content=f"answer {i} " * 40),
+    ]
+
+
+async def per_message(db, messages) -> None:
+    for message in messages:
+        await crud.create_chat_message_async(db, message=message)
+
+
+async def per_turn(db, messages) -> None:
+    await crud.create_chat_turn_async(db, messages=messages)
+
+
+async def run_mode(name, persist, session_ids, turns: int, concurrency: int, counters, write_behind=None) -> None:
+    counters.update(statements=0, commits=0)
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                await persist(db, _turn(session_ids[i % len(session_ids)], i))
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(turns)))
+    if write_behind is not None:
+        set_active_write_behind(None)
+        await write_behind.stop() # count the time until everything is durable
+    wall = time.perf_counter() - started
+    print(
+        f"{name:<12} {wall:>7.2f}s {turns / wall:>9.1f} "
+        f"{percentile(latencies, 50) * 1000:>8.2f} {percentile(latencies, 95) * 1000:>8.2f} "
+        f"{counters['statements'] / turns:>10.2f} {counters['commits'] / turns:>9.2f}"
+    )
+
+
+async def run(turns: int, concurrency: int, sessions: int) -> None:
+    create_db_tables()
+    with SessionLocal() as db:
+        user = models.User(name="bench", topic_of_interest="persistence")
+        db.add(user)
+        db.commit()
+        chat_sessions = [models.ChatSession(user_id=user.id, session_name=f"bench-{i}") for i in range(sessions)]
+        db.add_all(chat_sessions)
+        db.commit()
+        session_ids = [chat_session.id for chat_session in chat_sessions]
+
+    counters = {"statements": 0, "commits": 0}
+
+    def _count_statement(*args):
+        counters["statements"] += 1
+
+    def _count_commit(*args):
+        counters["commits"] += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count_statement)
+    event.listen(async_engine.sync_engine, "commit", _count_commit)
+
+    print(f"{turns} turns, {concurrency} concurrent, {sessions} sessions")
+    print(f"{'mode':<12} {'wall':>8} {'turns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'stmts/turn':>10} {'commits':>9}")
+    await run_mode("per-message", per_message, session_ids, turns, concurrency, counters)
+    await run_mode("per-turn", per_turn, session_ids, turns, concurrency, counters)
+
+    write_behind = MessageWriteBehind.from_settings()
+    write_behind.start()
+    set_active_write_behind(write_behind)
+    await run_mode("write-behind", per_turn, session_ids, turns, concurrency, counters, write_behind)
+
+    with SessionLocal() as db:
+        stored = db.query(models.ChatMessage).count()
+    print(f"rows stored: {stored} (expected {turns * 2 * 3})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.turns, args.concurrency, args.sessions))
@@ -0,0 +1,65 @@
+# benchmarks/bench_vector_index.py
+"""
+Brute-force vs IVF search on a synthetic clustered corpus of unit vectors.
+
+    python -m benchmarks.bench_vector_index --rows 200000 --dim 128 --queries 200
+
+Reports build/train time, per-query latency and IVF recall@k against the
+exact brute-force results.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import configure_environment
+
+configure_environment("bench_vector_index.db")
+
+from backend.app.rag.index import BruteForceIndex, IVFIndex  # noqa: E402
+
+
+def synthetic_corpus(rows: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    data = centers[rng.integers(0, clusters, rows)] + 0.3 * rng.normal(size=(rows, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def main(rows: int, dim: int, queries: int, k: int, n_probe: int) -> None:
+    data = synthetic_corpus(rows, dim, clusters=max(10, rows // 400))
+    ids = [str(i) for i in range(rows)]
+    payloads = [{}] * rows
+    rng = np.random.default_rng(1)
+    query_vectors = data[rng.integers(0, rows, queries)] + 0.05 * rng.normal(size=(queries, dim)).astype(np.float32)
+
+    started = time.perf_counter()
+    exact = BruteForceIndex(dim)
+    exact.add(ids, data, payloads)
+    print(f"brute-force build: {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    approx = IVFIndex(dim, n_probe=n_probe, train_threshold=rows + 1)
+    approx.add(ids, data, payloads)
+    approx.train()
+    print(f"ivf build + train: {time.perf_counter() - started:.2f}s ({len(approx._lists)} lists, n_probe {n_probe})")
+
+    results = {}
+    for label, index in (("brute-force", exact), ("ivf", approx)):
+        started = time.perf_counter()
+        results[label] = [[hit.id for hit in index.search(q, k)] for q in query_vectors]
+        print(f"{label:<12} {(time.perf_counter() - started) / queries * 1000:.3f} ms/query")
+
+    recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(results["brute-force"], results["ivf"])])
+    print(f"ivf recall@{k}: {recall:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-probe", type=int, default=8)
+    args = parser.parse_args()
+    main(args.rows, args.dim, args.queries, args.k, args.n_probe)
@@ -0,0 +1,163 @@
+# benchmarks/check_query_plans.py
+"""
+Checks that the hot read queries are served by indexes: runs the real crud
+functions, captures the SQL they send and EXPLAINs each statement.
+
+    python -m benchmarks.check_query_plans            # temp SQLite, migrated to head
+    DATABASE_URL=postgresql://... python -m benchmarks.check_query_plans --no-migrate
+
+A plan fails the check if it scans a whole table (SQLite `SCAN <table>`,
+Postgres `Seq Scan`) or sorts rows itself instead of reading them in index
+order (SQLite `USE TEMP B-TREE FOR ORDER BY`, Postgres `Sort`). On Postgres
+seqscans and sorts are disabled for the EXPLAIN, so a small test database
+doesn't hide a missing index behind "the table is tiny anyway" plans.
+Exits 1 if any query fails.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import Callable, List, Tuple
+
+from benchmarks.common import PROJECT_ROOT, configure_environment
+
+configure_environment("query_plans.db")
+
+from sqlalchemy import event  # noqa: E402
+
+from backend.app.db import crud  # noqa: E402
+from backend.app.db.database import AsyncSessionLocal, SessionLocal, async_engine, engine  # noqa: E402
+
+USER_ID, SESSION_ID, MESSAGE_ID = 1, 1, 1000
+
+# name -> call; each call runs one crud read the API serves on every request
+SYNC_QUERIES: List[Tuple[str, Callable]] = [
+    ("login lookup", lambda db: crud.get_user_by_name_and_topic(db, name="alice", topic="python")),
+    ("user by id", lambda db: crud.get_user(db, user_id=USER_ID)),
+    ("sessions of user", lambda db: crud.get_sessions_by_user(db, user_id=USER_ID)),
+    ("sessions if user exists", lambda db: crud.get_sessions_if_user_exists(db, user_id=USER_ID)),
+    ("history page", lambda db: crud.get_messages_by_session(db, session_id=SESSION_ID, limit=50)),
+    ("history after_id", lambda db: crud.get_messages_by_session(db, session_id=SESSION_ID, after_id=MESSAGE_ID, limit=50)),
+    ("history before_id", lambda db: crud.get_messages_by_session(db, session_id=SESSION_ID, before_id=MESSAGE_ID, limit=50)),
+]
+ASYNC_QUERIES: List[Tuple[str, Callable]] = [
+    ("session head", lambda db: crud.get_session_head_async(db, session_id=SESSION_ID)),
+    ("prompt window", lambda db: crud.get_recent_messages_async(db, session_id=SESSION_ID, limit=50)),
+    ("prompt window after summary", lambda db: crud.get_recent_messages_async(db, session_id=SESSION_ID, after_id=MESSAGE_ID, limit=50)),
+    ("messages after", lambda db: crud.get_messages_after_async(db, session_id=SESSION_ID, after_id=MESSAGE_ID)),
+]
+
+
+def migrate() -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "backend", "migrations"))
+    command.upgrade(config, "head")
+
+
+def plan_problems(dialect: str, plan: List[str]) -> List[str]:
+    problems = []
+    for line in plan:
+        if dialect == "sqlite":
+            if line.startswith("SCAN ") and "CONSTANT ROW" not in line:
+                problems.append(f"full scan: {line}")
+            if "TEMP B-TREE" in line:
+                problems.append(f"sort: {line}")
+        else:
+            node = line.strip().lstrip("-> ").strip()
+            if node.startswith("Seq Scan"):
+                problems.append(f"full scan: {node}")
+            if node.startswith("Sort") or node.startswith("Incremental Sort"):
+                problems.append(f"sort: {node}")
+    return problems
+
+
+class StatementCapture:
+    """Collects (statement, parameters) sent on an engine while active."""
+
+    def __init__(self, sync_engine):
+        self.sync_engine = sync_engine
+        self.statements: List[Tuple[str, object]] = []
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.sync_engine, "before_cursor_execute", self._capture)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.sync_engine, "before_cursor_execute", self._capture)
+
+
+def explain_sync(statement: str, parameters) -> List[str]:
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            return [row[-1] for row in rows]
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        conn.exec_driver_sql("SET LOCAL enable_sort = off")
+        return [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()]
+
+
+async def explain_async(statement: str, parameters) -> List[str]:
+    async with async_engine.connect() as conn:
+        if async_engine.dialect.name == "sqlite":
+            rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+            return [row[-1] for row in rows]
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        await conn.exec_driver_sql("SET LOCAL enable_sort = off")
+        return [row[0] for row in (await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)).all()]
+
+
+def report(name: str, statement: str, plan: List[str], problems: List[str], verbose: bool) -> None:
+    print(f"{'FAIL' if problems else 'ok  '} {name}")
+    if problems or verbose:
+        print(f"     {' '.join(statement.split())}")
+        for line in plan:
+            print(f"       {line}")
+        for problem in problems:
+            print(f"     ! {problem}")
+
+
+async def run(verbose: bool) -> int:
+    failures = 0
+    for name, call in SYNC_QUERIES:
+        with SessionLocal() as db, StatementCapture(engine) as capture:
+            call(db)
+        for statement, parameters in capture.statements:
+            plan = explain_sync(statement, parameters)
+            problems = plan_problems(engine.dialect.name, plan)
+            failures += bool(problems)
+            report(name, statement, plan, problems, verbose)
+    for name, call in ASYNC_QUERIES:
+        async with AsyncSessionLocal() as db:
+            with StatementCapture(async_engine.sync_engine) as capture:
+                await call(db)
+        for statement, parameters in capture.statements:
+            plan = await explain_async(statement, parameters)
+            problems = plan_problems(async_engine.dialect.name, plan)
+            failures += bool(problems)
+            report(name, statement, plan, problems, verbose)
+    await async_engine.dispose()
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-migrate", action="store_true", help="check the database as it is, don't run alembic upgrade head")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan, not only failing ones")
+    args = parser.parse_args()
+
+    if not args.no_migrate:
+        migrate()
+    print(f"database: {engine.url.render_as_string(hide_password=True)}")
+    failures = asyncio.run(run(args.verbose))
+    print(f"{failures} query plan(s) without index support" if failures else "all hot queries use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+# benchmarks/common.py
+"""Shared setup for the benchmark scripts. Run them from the project root, e.g.
+`python -m benchmarks.bench_concurrent_chat`."""
+import os
+import sys
+import tempfile
+from typing import List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure_environment(db_name: str = "bench.db") -> str:
+    """
+    Points the backend at a throwaway SQLite database and a dummy API key.
+    Must be called before anything under `backend.app` is imported, since
+    settings and engines are created at import time.
+    """
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    db_path = os.path.join(tempfile.mkdtemp(prefix="ragbot-bench-"), db_name)
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-dummy-key")
+    return os.environ["DATABASE_URL"]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
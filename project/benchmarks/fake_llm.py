@@ -0,0 +1,81 @@
+# benchmarks/fake_llm.py
+"""
+Deterministic stand-in for ChatGoogleGenerativeAI.
+
+Sleeps for `latency` seconds before the first token and then emits the canned
+reply word by word at `tokens_per_second` (0 = all at once), so benchmarks can
+exercise the chat path without network access or an API key. `init_cost`
+simulates the client setup work a real SDK client does when constructed.
+
+To run a real server process against it, set
+LLM_CLIENT_FACTORY=benchmarks.fake_llm:fake_client_factory (plus the
+FAKE_LLM_* variables below).
+"""
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    latency: float = 1.0
+    tokens_per_second: float = 0.0
+    reply: str = "This is a canned reply from the fake LLM used for benchmarking."
+    init_cost: float = 0.0
+    # Size of the most recent prompt, for benchmarks that track prompt growth
+    last_prompt_chars: int = 0
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.init_cost:
+            time.sleep(self.init_cost)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self) -> List[str]:
+        words = self.reply.split(" ")
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    def _record_prompt(self, messages: List[BaseMessage]) -> None:
+        self.last_prompt_chars = sum(len(str(m.content)) for m in messages)
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._record_prompt(messages)
+        time.sleep(self.latency + self._token_delay() * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._record_prompt(messages)
+        await asyncio.sleep(self.latency + self._token_delay() * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._record_prompt(messages)
+        time.sleep(self.latency)
+        for token in self._tokens():
+            time.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self._record_prompt(messages)
+        await asyncio.sleep(self.latency)
+        for token in self._tokens():
+            await asyncio.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def fake_client_factory() -> FakeChatModel:
+    """LLM_CLIENT_FACTORY entry point, configured through FAKE_LLM_LATENCY / FAKE_LLM_TOKENS_PER_SECOND / FAKE_LLM_INIT_COST."""
+    return FakeChatModel(
+        latency=float(os.environ.get("FAKE_LLM_LATENCY", "0.5")),
+        tokens_per_second=float(os.environ.get("FAKE_LLM_TOKENS_PER_SECOND", "0")),
+        init_cost=float(os.environ.get("FAKE_LLM_INIT_COST", "0")),
+    )
@@ -0,0 +1,265 @@
+# benchmarks/harness.py
+"""
+Endpoint benchmark suite: login, session listing, message history and
+send-message, driven concurrently against the FastAPI app with the fake LLM.
+
+    # in-process (httpx ASGITransport, app lifespan runs as in production)
+    python -m benchmarks.harness
+
+    # over HTTP: spawn uvicorn on a free port with the same settings
+    python -m benchmarks.harness --http
+
+    # against a server that is already running (configure its LLM yourself)
+    python -m benchmarks.harness --url http://localhost:8000
+
+    # record a baseline, then fail (exit 1) on regressions beyond 20%
+    python -m benchmarks.harness --save-baseline benchmarks/baseline.json
+    python -m benchmarks.harness --baseline benchmarks/baseline.json --threshold 0.2
+
+For each endpoint it reports p50/p95/p99 latency, throughput and SQL
+statements per request. The statement count comes from the server's
+db_queries_total metric on /metrics, so it works in all three modes. The
+database is a temp SQLite file unless DATABASE_URL is set, e.g. to a local
+Postgres.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from benchmarks.common import PROJECT_ROOT, configure_environment, percentile
+
+SCENARIOS = ("login", "list_sessions", "history", "send_message")
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    errors: int
+    wall: float
+    p50: float
+    p95: float
+    p99: float
+    throughput: float
+    queries_per_request: float
+
+
+def configure_harness_environment(latency: float, tokens_per_second: float) -> None:
+    configure_environment("bench_harness.db")
+    os.environ.setdefault("LLM_CLIENT_FACTORY", "benchmarks.fake_llm:fake_client_factory")
+    os.environ.setdefault("FAKE_LLM_LATENCY", str(latency))
+    os.environ.setdefault("FAKE_LLM_TOKENS_PER_SECOND", str(tokens_per_second))
+    os.environ.setdefault("EMBEDDER", "hashing") # no embedding API calls
+    os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false") # measure the LLM path, not cache hits
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("DB_CREATE_TABLES_ON_STARTUP", "true") # fresh temp database every run
+
+
+def parse_metric_total(metrics_text: str, name: str) -> float:
+    """Sum of all samples of one counter in Prometheus text format."""
+    total = 0.0
+    for line in metrics_text.splitlines():
+        if line.startswith(name) and (line[len(name)] in " {"):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+async def db_queries(client) -> float:
+    resp = await client.get("/metrics")
+    resp.raise_for_status()
+    return parse_metric_total(resp.text, "db_queries_total")
+
+
+async def run_scenario(client, name: str, make_request: Callable[[int], Awaitable], requests: int, concurrency: int) -> ScenarioResult:
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            resp = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            if resp.status_code >= 400:
+                errors += 1
+
+    queries_before = await db_queries(client)
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - started
+    queries = await db_queries(client) - queries_before
+    return ScenarioResult(
+        name=name,
+        requests=requests,
+        errors=errors,
+        wall=wall,
+        p50=percentile(latencies, 50),
+        p95=percentile(latencies, 95),
+        p99=percentile(latencies, 99),
+        throughput=requests / wall,
+        queries_per_request=queries / requests,
+    )
+
+
+async def run_suite(client, args) -> List[ScenarioResult]:
+    # Fixtures: users with one session each and some history to page through
+    users, sessions = [], []
+    for i in range(args.users):
+        user = (await client.post("/api/v1/users/login", json={"name": f"bench-{i}", "topic_of_interest": "harness"})).json()
+        users.append(user["id"])
+        session = (await client.post(f"/api/v1/users/{user['id']}/sessions", json={"session_name": f"bench-{i}"})).json()
+        sessions.append(session["id"])
+    await asyncio.gather(*(
+        client.post(f"/api/v1/sessions/{sessions[i % len(sessions)]}/messages", json={"content": f"warm-up {i}"})
+        for i in range(args.history_turns * len(sessions))
+    ))
+
+    requests: Dict[str, Callable[[int], Awaitable]] = {
+        "login": lambda i: client.post(
+            "/api/v1/users/login", json={"name": f"bench-{i % args.users}", "topic_of_interest": "harness"}
+        ),
+        "list_sessions": lambda i: client.get(f"/api/v1/users/{users[i % len(users)]}/sessions"),
+        "history": lambda i: client.get(f"/api/v1/sessions/{sessions[i % len(sessions)]}/messages", params={"limit": 50}),
+        "send_message": lambda i: client.post(
+            f"/api/v1/sessions/{sessions[i % len(sessions)]}/messages", json={"content": f"benchmark question {i}"}
+        ),
+    }
+    results = []
+    for name in args.scenarios:
+        results.append(await run_scenario(client, name, requests[name], args.requests, args.concurrency))
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(client, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.2)
+
+
+async def run(args) -> List[ScenarioResult]:
+    import httpx
+
+    timeout = httpx.Timeout(None)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout) as client:
+            return await run_suite(client, args)
+
+    if args.http:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=PROJECT_ROOT,
+            env=os.environ.copy(),
+        )
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout, limits=limits) as client:
+                await _wait_until_up(client)
+                return await run_suite(client, args)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    from backend.app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+            return await run_suite(client, args)
+
+
+def compare(results: List[ScenarioResult], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Regressions of p95 latency, throughput or queries/request beyond `threshold` (fraction) vs the baseline."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.p95 > base["p95"] * (1 + threshold):
+            regressions.append(f"{result.name}: p95 {result.p95 * 1000:.1f}ms vs baseline {base['p95'] * 1000:.1f}ms")
+        if result.throughput < base["throughput"] * (1 - threshold):
+            regressions.append(f"{result.name}: throughput {result.throughput:.1f}/s vs baseline {base['throughput']:.1f}/s")
+        # Query counts are deterministic, any increase is a regression
+        if result.queries_per_request > base["queries_per_request"] + 0.01:
+            regressions.append(
+                f"{result.name}: {result.queries_per_request:.2f} queries/request vs baseline {base['queries_per_request']:.2f}"
+            )
+        if result.errors:
+            regressions.append(f"{result.name}: {result.errors} failed requests")
+    return regressions
+
+
+def print_report(results: List[ScenarioResult], mode: str) -> None:
+    print(f"mode: {mode}")
+    print(f"{'endpoint':<14} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries/req':>12}")
+    for r in results:
+        print(
+            f"{r.name:<14} {r.requests:>6} {r.errors:>4} {r.throughput:>8.1f} {r.p50 * 1000:>8.1f} "
+            f"{r.p95 * 1000:>8.1f} {r.p99 * 1000:>8.1f} {r.queries_per_request:>12.2f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--http", action="store_true", help="spawn uvicorn and benchmark over HTTP")
+    mode.add_argument("--url", help="benchmark an already running server")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--history-turns", type=int, default=5, help="warm-up turns per session before measuring")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency before the first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--baseline", help="JSON baseline to compare against")
+    parser.add_argument("--save-baseline", help="write this run's results as a baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression as a fraction (0.2 = 20%%)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    configure_harness_environment(args.latency, args.tokens_per_second)
+    results = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps([asdict(r) for r in results], indent=2))
+    else:
+        print_report(results, "url" if args.url else "http" if args.http else "in-process")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({r.name: asdict(r) for r in results}, f, indent=2)
+        print(f"baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
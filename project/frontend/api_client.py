@@ -1,4 +1,5 @@
 # frontend/api_client.py
+import json
 import requests
 import streamlit as st
 from typing import List, Dict, Any, Optional, Generator
@@ -72,12 +73,13 @@ def get_session_details(session_id: int) -> Optional[Dict[str, Any]]:
     return None
 
 # --- NEW FUNCTIONS FOR CHAT MESSAGES ---
-def get_session_messages_from_api(session_id: int) -> Optional[List[Dict[str, Any]]]:
-    """Fetches all messages for a given session ID from the backend."""
+def get_session_messages_from_api(session_id: int, since_id: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """Fetches the messages for a given session ID from the backend (only the ones after since_id, if given)."""
     if not session_id:
         return []
+    params = {"since_id": since_id} if since_id is not None else None
     try:
-        response = requests.get(f"{BACKEND_URL}/sessions/{session_id}/messages")
+        response = requests.get(f"{BACKEND_URL}/sessions/{session_id}/messages", params=params)
         response.raise_for_status()
         return response.json() # List of message dicts
     except requests.exceptions.HTTPError as http_err:
@@ -130,4 +132,34 @@ def send_message_to_backend(session_id: int, message_content: str) -> Optional[D
     except Exception as e:
         st.error(f"An error occurred sending message: {e}")
         print(f"[API_CLIENT] Exception: {e}") # DEBUG
-    return None
\ No newline at end of file
+    return None
+
+def stream_message_to_backend(session_id: int, message_content: str) -> Generator[str, None, None]:
+    """
+    Sends a user's message to the streaming endpoint and yields the AI's reply
+    token by token, so it can be fed straight into st.write_stream.
+    """
+    if not session_id or not message_content:
+        return
+    try:
+        payload = {"content": message_content}
+        with requests.post(
+            f"{BACKEND_URL}/sessions/{session_id}/messages/stream",
+            json=payload,
+            stream=True,
+            timeout=30 # Applies between chunks, not to the whole reply
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "token":
+                    yield event.get("content", "")
+                elif event.get("type") == "error":
+                    st.error(f"Error from backend while streaming: {event.get('detail')}")
+                    return
+    except requests.exceptions.HTTPError as http_err:
+        st.error(f"HTTP error sending message: {http_err} - Detail: {response.text}")
+    except Exception as e:
+        st.error(f"An error occurred sending message: {e}")
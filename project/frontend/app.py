@@ -6,7 +6,7 @@ from api_client import (
     create_new_session,
     get_session_details,
     get_session_messages_from_api, # New import
-    send_message_to_backend      # New import
+    stream_message_to_backend
 )
 from datetime import datetime
 
@@ -42,6 +42,19 @@ def load_chat_messages_for_session():
         st.session_state.chat_messages = []
 
 
+def append_new_chat_messages_for_session():
+    # After a turn only the new user + AI messages are fetched, not the whole history again
+    confirmed = [msg for msg in st.session_state.chat_messages if "id" in msg] # drops optimistic entries
+    if not confirmed:
+        load_chat_messages_for_session()
+        return
+    new_messages = get_session_messages_from_api(st.session_state.current_session_id, since_id=confirmed[-1]["id"])
+    if new_messages is None:
+        load_chat_messages_for_session() # Fall back to a full reload
+    else:
+        st.session_state.chat_messages = confirmed + new_messages
+
+
 # --- Main Application Logic (EXISTING CODE) ---
 def main():
     st.title("🤖 Gemini Powered Chatbot")
@@ -117,11 +130,12 @@ def render_main_app_layout():
             new_session = create_new_session(user_id, new_session_name if new_session_name else "New Chat")
             if new_session:
                 st.sidebar.success(f"Session '{new_session['session_name']}' created!")
-                load_user_sessions() # Reload sessions list
+                # The list is newest first; no need to refetch it from the backend
+                st.session_state.user_sessions.insert(0, new_session)
                 # Automatically select the new session
                 st.session_state.current_session_id = new_session['id']
                 st.session_state.current_session_details = new_session
-                load_chat_messages_for_session() # Load (empty) messages for the new session
+                st.session_state.chat_messages = [] # A new session has no messages yet
                 st.rerun()
 
     st.sidebar.markdown("---")
@@ -186,20 +200,18 @@ def render_chat_interface(session_details):
             "content": user_input,
             "timestamp": datetime.now().isoformat()
         })
-        # Consider NOT rerunning here immediately if debugging the backend call.
-        # Or, place the rerun after the backend call attempt.
-        # st.rerun() # Temporarily comment out or move for clearer debugging print order
+        with st.chat_message("user"):
+            st.markdown(user_input)
 
-        print(f"[FRONTEND_APP] Calling send_message_to_backend for session {session_details['id']}") # DEBUG
-        ai_response = send_message_to_backend(session_details['id'], user_input)
-        print(f"[FRONTEND_APP] AI response from backend: {ai_response}") # DEBUG
+        # Render the AI reply as it streams in instead of waiting for the whole response
+        with st.chat_message("assistant"):
+            ai_response = st.write_stream(stream_message_to_backend(session_details['id'], user_input))
 
         if ai_response:
-            print("[FRONTEND_APP] AI response successful, reloading messages.") # DEBUG
-            load_chat_messages_for_session()
+            append_new_chat_messages_for_session()
         else:
             print("[FRONTEND_APP] AI response failed or None.") # DEBUG
-        
+
         st.rerun() # Rerun to display changes
 
     # user_input = st.chat_input("Your message...", key=f"chat_input_sid_{session_details['id']}")
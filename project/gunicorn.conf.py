@@ -0,0 +1,45 @@
+# gunicorn.conf.py
+# Production serving: gunicorn master + uvicorn workers. From the project/ directory:
+#   gunicorn backend.app.main:app            (picks this file up automatically)
+#   python backend/run_backend.py --production
+# Environment: WEB_CONCURRENCY (workers, default = usable CPU cores), BIND / PORT,
+# GRACEFUL_TIMEOUT (seconds a worker gets to finish in-flight replies on SIGTERM).
+import os
+
+from backend.app.core.lifecycle import default_workers
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = default_workers()
+worker_class = "backend.app.worker.DrainingUvicornWorker"
+
+# Import the app once in the master and fork: workers share the imported code pages
+# (copy-on-write) and start in milliseconds. Per-worker state (DB pools, LLM clients,
+# caches) is still created after the fork, in each worker's lifespan.
+preload_app = True
+
+# A streamed chat reply can take a while; on SIGTERM each worker stops accepting
+# connections, lets open responses finish for up to graceful_timeout minus a
+# reserve for the lifespan shutdown (see backend/app/worker.py), then exits.
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 60))
+timeout = int(os.environ.get("WORKER_TIMEOUT", 120)) # heartbeat timeout, not a request timeout
+keepalive = 5
+accesslog = None # request metrics are on /metrics
+
+
+def on_starting(server):
+    # Pay for the Gemini SDK import once in the master so forked workers share it;
+    # otherwise every worker imports it again when it builds its LLM clients.
+    if not os.environ.get("LLM_CLIENT_FACTORY"):
+        try:
+            import langchain_google_genai  # noqa: F401  (preloaded for the forked workers)
+        except ImportError:
+            pass
+
+
+def post_fork(server, worker):
+    # Engines are created at import time in the master. Make sure no pooled
+    # connection crosses the fork; close=False leaves the parent's sockets alone.
+    from backend.app.db.database import async_engine, engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
@@ -0,0 +1,39 @@
+# tests/conftest.py
+import itertools
+import os
+import tempfile
+
+# Settings and engines are created when backend.app is imported, so the test
+# database has to be chosen before any test module imports it. Always a fresh
+# SQLite file: a DATABASE_URL from the environment or .env is never touched.
+_db_dir = tempfile.mkdtemp(prefix="ragbot-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'tests.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.setdefault("GOOGLE_API_KEY", "test-dummy-key")
+
+import pytest  # noqa: E402
+
+_names = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def migrated_db() -> str:
+    """The test database, upgraded to the latest Alembic revision."""
+    from benchmarks.check_query_plans import migrate
+    migrate()
+    return os.environ["DATABASE_URL"]
+
+
+@pytest.fixture
+def chat_session_id(migrated_db) -> int:
+    """A new user with one empty chat session."""
+    from backend.app.db import models
+    from backend.app.db.database import SessionLocal
+    with SessionLocal() as db:
+        user = models.User(name=f"user{next(_names)}", topic_of_interest="chat")
+        db.add(user)
+        db.flush()
+        chat_session = models.ChatSession(user_id=user.id, session_name="tests")
+        db.add(chat_session)
+        db.commit()
+        return chat_session.id
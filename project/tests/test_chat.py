@@ -0,0 +1,162 @@
+# tests/test_chat.py
+import asyncio
+import json
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from backend.app.db import models
+from backend.app.db.database import AsyncSessionLocal, SessionLocal, async_engine
+from backend.app.main import app
+from backend.app.services.chat_service import ChatService
+from backend.app.services.llm_pool import get_llm_pool
+from backend.app.services.memory_cache import SessionMemoryCache, session_memory_cache
+
+
+class FakeLLMPool:
+    """Stands in for LLMClientPool: a fixed reply, streamed token by token."""
+
+    def __init__(self, tokens=("Hello", ", ", "world")):
+        self.tokens = tokens
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content="".join(self.tokens))
+
+    async def astream(self, messages):
+        self.calls += 1
+        for token in self.tokens:
+            await asyncio.sleep(0)
+            yield AIMessageChunk(content=token)
+
+
+@pytest.fixture
+def llm():
+    pool = FakeLLMPool()
+    app.dependency_overrides[get_llm_pool] = lambda: pool
+    yield pool
+    app.dependency_overrides.pop(get_llm_pool, None)
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose() # aiosqlite connections are bound to this loop
+    return asyncio.run(main())
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+    return run(send())
+
+
+def stored(session_id: int):
+    with SessionLocal() as db:
+        rows = db.query(models.ChatMessage).filter(models.ChatMessage.session_id == session_id).order_by(models.ChatMessage.id)
+        return [(row.sender_type, row.content) for row in rows]
+
+
+def test_stream_sends_tokens_then_the_saved_message(chat_session_id, llm):
+    response = request("POST", f"/api/v1/sessions/{chat_session_id}/messages/stream", json={"content": "hi"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["content"] for event in events[:-1]] == ["Hello", ", ", "world"]
+    assert events[-1]["type"] == "message"
+    assert events[-1]["message"]["content"] == "Hello, world"
+    assert events[-1]["message"]["sender_type"] == "ai"
+    assert stored(chat_session_id) == [("user", "hi"), ("ai", "Hello, world")]
+
+
+def test_post_returns_the_saved_reply(chat_session_id, llm):
+    response = request("POST", f"/api/v1/sessions/{chat_session_id}/messages", json={"content": "hi"})
+    assert response.status_code == 200
+    assert response.json()["content"] == "Hello, world"
+    assert stored(chat_session_id) == [("user", "hi"), ("ai", "Hello, world")]
+
+
+def test_unknown_session_is_404_before_any_llm_call(migrated_db, llm):
+    response = request("POST", "/api/v1/sessions/999999/messages", json={"content": "hi"})
+    assert response.status_code == 404
+    events = request("POST", "/api/v1/sessions/999999/messages/stream", json={"content": "hi"}).text.splitlines()
+    assert [json.loads(line) for line in events] == [{"type": "error", "detail": "Session not found"}]
+    assert llm.calls == 0
+    assert stored(999999) == []
+
+
+def test_unknown_session_is_404_on_a_memory_cache_hit(migrated_db, llm):
+    async def no_history(limit):
+        return None, None, []
+
+    run(session_memory_cache.get_window(999998, no_history)) # e.g. cached before the session went away
+    assert session_memory_cache.unsummarized_count(999998) == 0
+    assert request("POST", "/api/v1/sessions/999998/messages", json={"content": "hi"}).status_code == 404
+    assert llm.calls == 0
+
+
+def test_disconnect_mid_stream_keeps_the_partial_turn(chat_session_id):
+    async def read_one_token_then_leave():
+        async with AsyncSessionLocal() as db:
+            service = ChatService(db=db, llm_pool=FakeLLMPool(), memory_cache=SessionMemoryCache(10, 10, 1000))
+            stream = service.stream_user_message(chat_session_id, "hi")
+            assert await stream.__anext__() == {"type": "token", "content": "Hello"}
+            await stream.aclose() # what the server does when the client goes away
+
+    run(read_one_token_then_leave())
+    assert stored(chat_session_id) == [("user", "hi"), ("ai", "Hello")]
+
+
+def test_cancelled_request_keeps_the_user_message(chat_session_id):
+    class HangingLLMPool(FakeLLMPool):
+        async def ainvoke(self, messages):
+            await asyncio.sleep(60)
+
+    async def cancel_while_waiting():
+        async with AsyncSessionLocal() as db:
+            service = ChatService(db=db, llm_pool=HangingLLMPool(), memory_cache=SessionMemoryCache(10, 10, 1000))
+            task = asyncio.ensure_future(service.process_user_message(chat_session_id, "hi"))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    run(cancel_while_waiting())
+    assert stored(chat_session_id) == [("user", "hi")]
+
+
+def add_messages(session_id: int, count: int) -> list:
+    with SessionLocal() as db:
+        rows = [models.ChatMessage(session_id=session_id, sender_type="user", content=f"message {i}") for i in range(count)]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+
+def page(session_id: int, **params) -> list:
+    response = request("GET", f"/api/v1/sessions/{session_id}/messages", params=params)
+    assert response.status_code == 200
+    return [message["id"] for message in response.json()]
+
+
+def test_history_pages_by_cursor(chat_session_id):
+    ids = add_messages(chat_session_id, 10)
+    assert page(chat_session_id, limit=4) == ids[:4]
+    assert page(chat_session_id, after_id=ids[3], limit=4) == ids[4:8]
+    assert page(chat_session_id, before_id=ids[8], limit=3) == ids[5:8] # the page just before, oldest first
+    assert page(chat_session_id, before_id=ids[2], limit=5) == ids[:2]
+    assert page(chat_session_id, after_id=ids[1], before_id=ids[5]) == ids[2:5]
+    assert page(chat_session_id, since_id=ids[6]) == ids[7:]
+    assert page(chat_session_id, since_id=ids[-1]) == []
+
+
+def test_since_id_cannot_be_combined_with_a_cursor(chat_session_id):
+    url = f"/api/v1/sessions/{chat_session_id}/messages"
+    assert request("GET", url, params={"since_id": 1, "after_id": 1}).status_code == 400
+    assert request("GET", url, params={"since_id": 1, "before_id": 5}).status_code == 400
+    assert request("GET", "/api/v1/sessions/999999/messages", params={"after_id": 1}).status_code == 404
@@ -0,0 +1,89 @@
+# tests/test_ingest.py
+import os
+
+import pytest
+
+from backend.app.rag.embeddings import HashingEmbedder
+from backend.app.rag.index import BruteForceIndex
+from backend.app.rag.ingest import IngestManifest, run_ingestion
+from backend.app.rag.retriever import Retriever
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__(dim=64)
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def write(path, name: str, paragraphs: int) -> None:
+    text = "\n\n".join(
+        " ".join(f"Sentence {i} of paragraph {n} in {name} says something new." for i in range(8))
+        for n in range(paragraphs)
+    )
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def docs(tmp_path):
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    write(folder / "a.txt", "a", 6)
+    write(folder / "b.md", "b", 4)
+    return folder
+
+
+@pytest.fixture
+def retriever():
+    return Retriever(CountingEmbedder(), BruteForceIndex(64), chunk_size=300, chunk_overlap=0)
+
+
+def ingest(docs, retriever, manifest):
+    return run_ingestion([str(docs)], retriever, workers=1, batch_size=4, manifest=manifest)
+
+
+def test_second_run_over_unchanged_files_embeds_nothing(docs, retriever, tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    first = ingest(docs, retriever, manifest)
+    manifest.save()
+    assert first.documents == 2 and first.chunks == len(retriever.index) > 2
+    embedded = retriever.embedder.embedded
+
+    # With the saved manifest the files aren't even parsed
+    second = ingest(docs, retriever, IngestManifest(manifest.path))
+    assert second.skipped_documents == 2 and second.documents == 0
+
+    # Without it, every chunk id is found in the index and nothing is re-embedded
+    third = ingest(docs, retriever, IngestManifest(None))
+    assert third.skipped_chunks == first.chunks and third.chunks == 0
+    assert retriever.embedder.embedded == embedded and len(retriever.index) == first.chunks
+
+
+def test_edited_file_replaces_its_stale_chunks(docs, retriever):
+    manifest = IngestManifest(None)
+    first = ingest(docs, retriever, manifest)
+    before = retriever.index.ids_for_source(str(docs / "a.txt"))
+
+    write(docs / "a.txt", "a, edited", 3)
+    stats = ingest(docs, retriever, manifest)
+    after = retriever.index.ids_for_source(str(docs / "a.txt"))
+
+    assert stats.skipped_documents == 1 and stats.documents == 1
+    assert stats.removed_chunks == len(before) and not before & after
+    assert len(retriever.index) == first.chunks - len(before) + len(after)
+
+
+def test_deleted_file_is_removed_from_the_index(docs, retriever):
+    manifest = IngestManifest(None)
+    ingest(docs, retriever, manifest)
+    removed = retriever.index.ids_for_source(str(docs / "b.md"))
+
+    os.remove(docs / "b.md")
+    stats = ingest(docs, retriever, manifest)
+
+    assert stats.removed_documents == 1 and stats.removed_chunks == len(removed)
+    assert retriever.index.ids_for_source(str(docs / "b.md")) == set()
+    assert str(docs / "b.md") not in manifest.hashes
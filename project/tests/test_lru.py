@@ -0,0 +1,55 @@
+# tests/test_lru.py
+import pytest
+
+from backend.app.core import lru
+from backend.app.core.lru import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1 # "a" is now the most recent
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(lru.time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    now[0] += 5
+    assert cache.get("a") == 1
+    now[0] += 6
+    assert cache.get("a", "gone") == "gone"
+    assert len(cache) == 0
+
+
+def test_items_skip_expired_and_keep_recency(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(lru.time, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=4, ttl=10)
+    cache.set("old", 1)
+    now[0] = 8
+    cache.set("new", 2)
+    now[0] = 12
+    assert cache.items() == [("new", 2)]
+    assert cache.misses == 0 # items() doesn't count as a lookup
+
+
+def test_stats_and_pop():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "none") == "none"
+    assert cache.stats() == {"size": 0, "maxsize": 2, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_rejects_empty_cache():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
@@ -0,0 +1,91 @@
+# tests/test_memory_cache.py
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from backend.app.db.database import AsyncSessionLocal, async_engine
+from backend.app.services.chat_service import ChatService
+from backend.app.services.memory_cache import SessionMemoryCache, estimate_tokens
+
+
+def snapshot(*rows, summary=None, summary_upto_id=None):
+    async def loader(limit):
+        loader.calls += 1
+        return summary, summary_upto_id, list(rows)[-limit:]
+    loader.calls = 0
+    return loader
+
+
+def head(summary_upto_id, newest_id):
+    async def current():
+        return summary_upto_id, newest_id
+    return current
+
+
+def test_window_keeps_the_newest_messages_within_the_token_budget():
+    cache = SessionMemoryCache(max_sessions=10, max_messages=10, token_budget=30)
+    rows = [(i, "user" if i % 2 else "ai", f"message {i} " + "x" * 32) for i in range(1, 7)] # 10 tokens each
+    summary, window = asyncio.run(cache.get_window(1, snapshot(*rows)))
+    assert summary is None
+    assert [m.content for m in window] == [content for _, _, content in rows[-3:]]
+    assert isinstance(window[0], AIMessage) and isinstance(window[1], HumanMessage)
+
+
+def test_summary_counts_against_the_budget_and_drops_what_it_covers():
+    cache = SessionMemoryCache(max_sessions=10, max_messages=10, token_budget=30)
+    rows = [(i, "user", "y" * 40) for i in range(1, 5)]
+    asyncio.run(cache.get_window(1, snapshot(*rows)))
+    cache.apply_summary(1, "s" * 40, upto_id=2)
+    cache.apply_summary(1, "older", upto_id=1) # finished late: ignored
+    summary, window = asyncio.run(cache.get_window(1, snapshot()))
+    assert summary == "s" * 40
+    assert len(window) == 2 and estimate_tokens(summary) + 20 <= 30
+    assert cache.unsummarized_count(1) == 2
+
+
+def test_hit_does_not_reload_unless_the_db_is_ahead():
+    cache = SessionMemoryCache(max_sessions=10, max_messages=10, token_budget=1000)
+    loader = snapshot((1, "user", "hi"), (2, "ai", "hello"))
+    asyncio.run(cache.get_window(1, loader))
+    cache.append(1, 3, "user", "written here")
+    asyncio.run(cache.get_window(1, loader, head(None, 3)))
+    assert loader.calls == 1
+
+    newer = snapshot((1, "user", "hi"), (2, "ai", "hello"), (3, "user", "written here"), (4, "ai", "from another worker"))
+    _, window = asyncio.run(cache.get_window(1, newer, head(None, 4)))
+    assert newer.calls == 1 and window[-1].content == "from another worker"
+
+    summarized = snapshot((4, "ai", "from another worker"), summary="earlier", summary_upto_id=3)
+    summary, window = asyncio.run(cache.get_window(1, summarized, head(3, 4)))
+    assert summarized.calls == 1 and summary == "earlier" and len(window) == 1
+    assert cache.stale_reloads == 2
+
+
+class RecordingLLMPool:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append([m.content for m in messages])
+        return AIMessage(content=f"reply {len(self.prompts)}")
+
+
+def test_turns_from_another_worker_reach_the_prompt(chat_session_id):
+    """Two workers, each with its own memory cache, answering the same session in turn."""
+    llm = RecordingLLMPool()
+    workers = [SessionMemoryCache(10, 20, 1000), SessionMemoryCache(10, 20, 1000)]
+
+    async def turn(worker, content):
+        async with AsyncSessionLocal() as db:
+            await ChatService(db=db, llm_pool=llm, memory_cache=workers[worker]).process_user_message(chat_session_id, content)
+
+    async def scenario():
+        try:
+            await turn(0, "first")
+            await turn(1, "second")
+            await turn(0, "third") # worker 0 has "first" cached, but not worker 1's turn
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(scenario())
+    assert llm.prompts[-1][1:] == ["first", "reply 1", "second", "reply 2", "third"]
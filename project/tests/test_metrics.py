@@ -0,0 +1,53 @@
+# tests/test_metrics.py
+import pytest
+
+from backend.app.core.metrics import MetricsRegistry
+
+
+def test_counter_and_labels():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["route"])
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    assert requests.value(route="/a") == 3
+    assert requests.value(route="/b") == 0
+    with pytest.raises(ValueError):
+        requests.inc(path="/a")
+    assert 'requests_total{route="/a"} 3' in registry.render()
+
+
+def test_gauge_function_is_read_at_render_time():
+    registry = MetricsRegistry()
+    depth = [4]
+    registry.gauge("queue_depth", "Depth").set_function(lambda: depth[0])
+    assert "queue_depth 4" in registry.render()
+    depth[0] = 7
+    assert "queue_depth 7" in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_count 4" in lines
+    assert latency.count() == 4 and latency.total() == pytest.approx(6.05)
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors", ["message"]).inc(message='say "hi"\n')
+    assert 'errors_total{message="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_reregistering_returns_the_live_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("hits_total", "Hits")
+    first.inc()
+    assert registry.counter("hits_total", "Hits") is first
+    with pytest.raises(ValueError):
+        registry.gauge("hits_total", "Hits")
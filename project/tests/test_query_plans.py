@@ -0,0 +1,16 @@
+# tests/test_query_plans.py
+import asyncio
+
+from benchmarks import check_query_plans
+
+
+def test_hot_queries_use_indexes(migrated_db, capsys):
+    failures = asyncio.run(check_query_plans.run(verbose=False))
+    assert failures == 0, capsys.readouterr().out
+
+
+def test_plan_problems_flag_scans_and_sorts():
+    assert check_query_plans.plan_problems("sqlite", ["SCAN chat_messages"]) == ["full scan: SCAN chat_messages"]
+    assert check_query_plans.plan_problems("sqlite", ["USE TEMP B-TREE FOR ORDER BY"]) == ["sort: USE TEMP B-TREE FOR ORDER BY"]
+    assert check_query_plans.plan_problems("sqlite", ["SEARCH chat_messages USING INDEX ix_chat_messages_session_id_id (session_id=?)"]) == []
+    assert check_query_plans.plan_problems("postgresql", ["  ->  Seq Scan on chat_messages"]) == ["full scan: Seq Scan on chat_messages"]
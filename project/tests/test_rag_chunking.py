@@ -0,0 +1,38 @@
+# tests/test_rag_chunking.py
+import pytest
+
+from backend.app.rag.chunking import chunk_text
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("  Just one line.  ") == ["Just one line."]
+    assert chunk_text("   ") == []
+
+
+def test_chunks_respect_size_and_overlap():
+    paragraphs = [f"Paragraph {i}. " + "word " * 40 for i in range(20)]
+    text = "\n\n".join(paragraphs)
+    chunks = chunk_text(text, chunk_size=500, overlap=50)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # the tail of each chunk is carried into the next one
+        assert previous[-30:].strip() in chunk
+    for i in range(20):
+        assert any(f"Paragraph {i}." in chunk for chunk in chunks)
+
+
+def test_prefers_paragraph_boundaries():
+    text = "A" * 300 + "\n\n" + "B" * 300
+    chunks = chunk_text(text, chunk_size=400, overlap=0)
+    assert chunks == ["A" * 300, "B" * 300]
+
+
+def test_splits_unbroken_text():
+    chunks = chunk_text("x" * 1000, chunk_size=300, overlap=0)
+    assert "".join(chunks) == "x" * 1000
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        chunk_text("text", chunk_size=100, overlap=100)
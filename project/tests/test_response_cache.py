@@ -0,0 +1,113 @@
+# tests/test_response_cache.py
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from backend.app.db import models
+from backend.app.db.database import SessionLocal, async_engine
+from backend.app.main import app
+from backend.app.rag.embeddings import HashingEmbedder
+from backend.app.services.llm_pool import get_llm_pool
+from backend.app.services.response_cache import ResponseCache, get_response_cache
+
+
+class CountingLLMPool:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=f"reply {self.calls}")
+
+
+@pytest.fixture
+def llm():
+    pool = CountingLLMPool()
+    app.dependency_overrides[get_llm_pool] = lambda: pool
+    yield pool
+    app.dependency_overrides.pop(get_llm_pool, None)
+
+
+@pytest.fixture
+def cache():
+    response_cache = ResponseCache(maxsize=100, ttl=None)
+    app.dependency_overrides[get_response_cache] = lambda: response_cache
+    yield response_cache
+    app.dependency_overrides.pop(get_response_cache, None)
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    async def send():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        finally:
+            await async_engine.dispose() # aiosqlite connections are bound to this loop
+    return asyncio.run(send())
+
+
+def another_session(session_id: int) -> int:
+    """A new, empty session of the same user."""
+    with SessionLocal() as db:
+        user_id = db.get(models.ChatSession, session_id).user_id
+        chat_session = models.ChatSession(user_id=user_id, session_name="tests")
+        db.add(chat_session)
+        db.commit()
+        return chat_session.id
+
+
+def test_exact_hit_ignores_case_whitespace_and_trailing_punctuation():
+    cache = ResponseCache(maxsize=10, ttl=None)
+    context = ResponseCache.context_key([SystemMessage(content="system")])
+    cache.store(context, "What is RAG?", "retrieval augmented generation")
+
+    assert cache.lookup(context, "  what   is rag ") == "retrieval augmented generation"
+    assert cache.lookup(ResponseCache.context_key([SystemMessage(content="system"), HumanMessage(content="earlier")]), "What is RAG?") is None
+    assert cache.stats()["exact_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_semantic_hit_needs_the_same_context():
+    embedder = HashingEmbedder(dim=256)
+    cache = ResponseCache(maxsize=10, ttl=None, embedder=embedder, semantic_threshold=0.8)
+    context = ResponseCache.context_key([SystemMessage(content="system")])
+    question = "how do I reset my account password from the settings page"
+    cache.store(context, question, "answer", embedder.embed_query(question))
+
+    reworded = "how can I reset my account password from the settings page"
+    assert cache.lookup(context, reworded, embedder.embed_query(reworded)) == "answer"
+    assert cache.lookup("other context", reworded, embedder.embed_query(reworded)) is None
+    assert cache.semantic_hits == 1
+
+
+def test_same_question_in_a_new_session_is_served_from_the_cache(chat_session_id, llm, cache):
+    first = request("POST", f"/api/v1/sessions/{chat_session_id}/messages", json={"content": "What is RAG?"})
+    second = request("POST", f"/api/v1/sessions/{another_session(chat_session_id)}/messages", json={"content": "what is rag"})
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["content"] == first.json()["content"] == "reply 1"
+    assert llm.calls == 1
+
+    stats = request("GET", "/api/v1/response-cache/stats").json()
+    assert stats["enabled"] and stats["exact_hits"] == 1 and stats["stores"] == 1
+
+
+def test_use_cache_false_always_calls_the_llm(chat_session_id, llm, cache):
+    request("POST", f"/api/v1/sessions/{chat_session_id}/messages", json={"content": "What is RAG?"})
+    response = request(
+        "POST", f"/api/v1/sessions/{another_session(chat_session_id)}/messages",
+        params={"use_cache": "false"}, json={"content": "What is RAG?"}
+    )
+
+    assert response.json()["content"] == "reply 2"
+    assert llm.calls == 2
+    assert cache.bypassed == 1 and cache.stores == 1 # a bypassed turn isn't stored either
+
+
+def test_stats_when_the_cache_is_off():
+    app.dependency_overrides[get_response_cache] = lambda: None
+    try:
+        assert request("GET", "/api/v1/response-cache/stats").json() == {"enabled": False}
+    finally:
+        app.dependency_overrides.pop(get_response_cache, None)
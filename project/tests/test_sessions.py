@@ -0,0 +1,95 @@
+# tests/test_sessions.py
+import asyncio
+import datetime
+import itertools
+
+import httpx
+import pytest
+
+from backend.app.db import models
+from backend.app.db.database import async_engine
+from backend.app.main import app
+from backend.app.services.session_cache import UserSessionCache, user_session_cache
+
+_names = itertools.count()
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    async def send():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(send())
+
+
+@pytest.fixture
+def user_id(migrated_db) -> int:
+    response = request("POST", "/api/v1/users/login", json={"name": f"lister{next(_names)}", "topic_of_interest": "sessions"})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def create(user_id: int, name: str) -> int:
+    response = request("POST", f"/api/v1/users/{user_id}/sessions", json={"session_name": name})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def listed(user_id: int, **params):
+    response = request("GET", f"/api/v1/users/{user_id}/sessions", params=params)
+    assert response.status_code == 200
+    return [session["session_name"] for session in response.json()]
+
+
+def session(id: int, name: str = "s", user_id: int = 7) -> models.ChatSession:
+    return models.ChatSession(id=id, user_id=user_id, session_name=name, created_at=datetime.datetime(2026, 1, 1, 0, 0, id))
+
+
+def test_created_session_shows_up_in_the_cached_list(user_id):
+    create(user_id, "first")
+    assert listed(user_id) == ["first"] # now cached
+    create(user_id, "second")
+    hits = user_session_cache.stats()["sessions"]["hits"]
+    assert listed(user_id) == ["second", "first"]
+    assert user_session_cache.stats()["sessions"]["hits"] == hits + 1
+
+
+def test_pages_past_the_cached_prefix_come_from_the_db(user_id, monkeypatch):
+    monkeypatch.setattr(user_session_cache, "sessions_per_user", 3)
+    names = [f"s{i}" for i in range(6)]
+    for name in names:
+        create(user_id, name)
+    newest_first = names[::-1]
+    assert listed(user_id, limit=2) == newest_first[:2]
+    assert listed(user_id, skip=2, limit=3) == newest_first[2:5]
+    assert listed(user_id, skip=5, limit=3) == newest_first[5:]
+    assert listed(user_id, skip=10, limit=3) == []
+
+
+def test_unknown_user_is_404(migrated_db):
+    assert request("GET", "/api/v1/users/999999/sessions").status_code == 404
+    assert request("GET", "/api/v1/users/999999/sessions", params={"skip": 500}).status_code == 404
+
+
+def test_list_read_before_a_write_through_is_not_cached_over_it():
+    cache = UserSessionCache(max_users=10, ttl=None, sessions_per_user=10)
+    old = session(1, "old")
+    token = cache.read_token() # a list request reads [old] from the DB...
+    cache.add_session(session(2, "new")) # ...a create lands meanwhile
+    assert [s.session_name for s in cache.put_sessions(7, [old], token)] == ["old"]
+    assert cache.get_sessions(7) is None # the stale list wasn't cached
+
+    cache.put_sessions(7, [session(2, "new"), old], cache.read_token())
+    assert [s.session_name for s in cache.get_sessions(7)] == ["new", "old"]
+
+
+def test_cached_prefix_is_capped():
+    cache = UserSessionCache(max_users=10, ttl=None, sessions_per_user=2)
+    rows = [session(i) for i in (3, 2, 1)]
+    cache.put_sessions(7, rows, cache.read_token())
+    assert [s.id for s in cache.get_sessions(7, limit=2)] == [3, 2]
+    assert cache.get_sessions(7, limit=3) is None # not known to be the whole list
+    cache.add_session(session(4))
+    assert [s.id for s in cache.get_sessions(7, limit=2)] == [4, 3]
@@ -0,0 +1,96 @@
+# tests/test_summarizer.py
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from backend.app.db import crud, models
+from backend.app.db.database import AsyncSessionLocal, SessionLocal, async_engine
+from backend.app.services.memory_cache import SessionMemoryCache
+from backend.app.services.summarizer import SessionCompactor
+
+
+class SummaryLLMPool:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        return AIMessage(content=f"summary {len(self.prompts)}")
+
+
+def add_messages(session_id: int, count: int, start: int = 0) -> list:
+    with SessionLocal() as db:
+        rows = [
+            models.ChatMessage(session_id=session_id, sender_type="user" if i % 2 == 0 else "ai", content=f"message {i}")
+            for i in range(start, start + count)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+
+def stored_summary(session_id: int):
+    with SessionLocal() as db:
+        session = db.get(models.ChatSession, session_id)
+        return session.summary, session.summary_upto_message_id
+
+
+def compact(compactor: SessionCompactor, session_id: int) -> bool:
+    async def run():
+        try:
+            return await compactor.compact(session_id)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+def test_folds_all_but_the_recent_messages_into_the_summary(chat_session_id):
+    ids = add_messages(chat_session_id, 7)
+    llm, cache = SummaryLLMPool(), SessionMemoryCache(10, 20, 1000)
+    compactor = SessionCompactor(llm, memory_cache=cache, keep_recent=2, batch=3)
+
+    assert compact(compactor, chat_session_id)
+    assert stored_summary(chat_session_id) == ("summary 1", ids[4])
+    assert "Human: message 0" in llm.prompts[0] and "Human: message 4" in llm.prompts[0]
+    assert "message 5" not in llm.prompts[0]
+
+    # The next pass builds on the stored summary and only sends what it doesn't cover
+    ids += add_messages(chat_session_id, 3, start=7)
+    assert compact(compactor, chat_session_id)
+    assert stored_summary(chat_session_id) == ("summary 2", ids[7])
+    assert "Current summary:\nsummary 1" in llm.prompts[1]
+    assert "message 4" not in llm.prompts[1] and "AI: message 7" in llm.prompts[1]
+
+
+def test_nothing_to_fold_below_the_batch_size(chat_session_id):
+    add_messages(chat_session_id, 4)
+    llm = SummaryLLMPool()
+    compactor = SessionCompactor(llm, memory_cache=SessionMemoryCache(10, 20, 1000), keep_recent=2, batch=3)
+
+    assert not compact(compactor, chat_session_id)
+    assert llm.prompts == []
+    assert stored_summary(chat_session_id) == (None, None)
+
+
+def test_a_late_summary_does_not_replace_a_newer_one(chat_session_id):
+    ids = add_messages(chat_session_id, 4)
+
+    async def write(summary, upto_id):
+        async with AsyncSessionLocal() as db:
+            return await crud.update_session_summary_async(db, session_id=chat_session_id, summary=summary, upto_message_id=upto_id)
+
+    async def run():
+        try:
+            return await write("newer", ids[3]), await write("older", ids[1])
+        finally:
+            await async_engine.dispose()
+
+    assert asyncio.run(run()) == (True, False)
+    assert stored_summary(chat_session_id) == ("newer", ids[3])
+
+
+def test_should_compact_once_a_batch_is_past_the_recent_window():
+    compactor = SessionCompactor(SummaryLLMPool(), memory_cache=SessionMemoryCache(10, 20, 1000), keep_recent=2, batch=3)
+    assert not compactor.should_compact(None)
+    assert not compactor.should_compact(4)
+    assert compactor.should_compact(5)
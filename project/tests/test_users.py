@@ -0,0 +1,53 @@
+# tests/test_users.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from backend.app.db import crud, models
+from backend.app.db.database import SessionLocal, async_engine
+from backend.app.main import app
+from backend.app.schemas.user import UserCreate
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    async def send():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(send())
+
+
+def users_named(name: str):
+    with SessionLocal() as db:
+        return db.query(models.User).filter(models.User.name == name).count()
+
+
+def test_concurrent_first_logins_get_one_user(migrated_db):
+    workers = 8
+    start = threading.Barrier(workers)
+
+    def login(_):
+        start.wait() # all threads upsert at once
+        with SessionLocal() as db:
+            return crud.get_or_create_user(db, user=UserCreate(name="racer", topic_of_interest="upsert")).id
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        ids = set(pool.map(login, range(workers)))
+
+    assert len(ids) == 1
+    assert users_named("racer") == 1
+
+
+def test_login_returns_the_existing_user_for_the_same_name_and_topic(migrated_db):
+    first = request("POST", "/api/v1/users/login", json={"name": "returning", "topic_of_interest": "upsert"})
+    again = request("POST", "/api/v1/users/login", json={"name": "returning", "topic_of_interest": "upsert"})
+    other_topic = request("POST", "/api/v1/users/login", json={"name": "returning", "topic_of_interest": "other"})
+
+    assert first.status_code == again.status_code == other_topic.status_code == 200
+    assert first.json() == again.json()
+    assert other_topic.json()["id"] != first.json()["id"]
+    assert users_named("returning") == 2
@@ -0,0 +1,84 @@
+# tests/test_vector_index.py
+import numpy as np
+import pytest
+
+from backend.app.rag.index import BruteForceIndex, IVFIndex
+
+DIM = 32
+
+
+def unit_vectors(n: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def fill(index, n: int, seed: int = 0) -> np.ndarray:
+    vectors = unit_vectors(n, seed)
+    index.add([f"id{i}" for i in range(n)], vectors, [{"source": f"doc{i % 5}", "n": i} for i in range(n)])
+    return vectors
+
+
+@pytest.mark.parametrize("make_index", [
+    lambda: BruteForceIndex(DIM, initial_capacity=4),
+    lambda: IVFIndex(DIM, n_lists=8, n_probe=8, train_threshold=100, initial_capacity=4),
+])
+def test_finds_exact_match_first(make_index):
+    index = make_index()
+    vectors = fill(index, 300)
+    hits = index.search(vectors[42], k=3)
+    assert hits[0].id == "id42"
+    assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+    assert hits[0].payload["n"] == 42
+    assert len(index) == 300
+
+
+def test_ivf_trains_at_threshold_and_keeps_recall():
+    exact = BruteForceIndex(DIM)
+    ivf = IVFIndex(DIM, n_lists=16, n_probe=4, train_threshold=500)
+    fill(exact, 2000)
+    fill(ivf, 2000)
+    assert ivf.trained
+    queries = unit_vectors(50, seed=1)
+    recall = np.mean([
+        len({h.id for h in exact.search(q, 10)} & {h.id for h in ivf.search(q, 10)}) / 10
+        for q in queries
+    ])
+    assert recall >= 0.5 # 4 of 16 lists probed
+
+
+def test_readding_an_id_overwrites_it():
+    index = BruteForceIndex(DIM)
+    vectors = unit_vectors(2)
+    index.add(["a"], vectors[:1], [{"source": "s", "v": 1}])
+    index.add(["a"], vectors[1:], [{"source": "s", "v": 2}])
+    assert len(index) == 1
+    assert index.search(vectors[1], 1)[0].payload["v"] == 2
+
+
+@pytest.mark.parametrize("make_index", [
+    lambda: BruteForceIndex(DIM),
+    lambda: IVFIndex(DIM, n_lists=8, n_probe=8, train_threshold=50),
+])
+def test_remove_keeps_index_consistent(make_index):
+    index = make_index()
+    vectors = fill(index, 200)
+    assert index.ids_for_source("doc0") == {f"id{i}" for i in range(0, 200, 5)}
+    assert index.remove(index.ids_for_source("doc0") | {"unknown"}) == 40
+    assert len(index) == 160
+    assert index.ids_for_source("doc0") == set()
+    assert index.existing(["id0", "id1", "id5"]) == {"id1"}
+    for i in (1, 2, 199):
+        assert index.search(vectors[i], 1)[0].id == f"id{i}"
+    assert all(not hit.id.endswith(("0", "5")) for hit in index.search(vectors[0], 200))
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BruteForceIndex(DIM)
+    vectors = fill(index, 20)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = BruteForceIndex(DIM)
+    loaded.load(path)
+    assert len(loaded) == 20
+    assert loaded.search(vectors[7], 1)[0].id == "id7"
+    assert loaded.ids_for_source("doc2") == index.ids_for_source("doc2")
@@ -0,0 +1,159 @@
+# tests/test_write_behind.py
+import asyncio
+import itertools
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from backend.app.schemas import message as message_schemas
+from backend.app.db import models, write_behind
+from backend.app.db.database import AsyncSessionLocal, SessionLocal, async_engine
+from backend.app.db.write_behind import LocalIdAllocator, MessageWriteBehind, UnknownSessionError
+
+_names = itertools.count()
+
+
+@pytest.fixture
+def session_id(migrated_db) -> int:
+    with SessionLocal() as db:
+        user = models.User(name=f"user{next(_names)}", topic_of_interest="tests")
+        db.add(user)
+        db.flush()
+        chat_session = models.ChatSession(user_id=user.id, session_name="write-behind")
+        db.add(chat_session)
+        db.commit()
+        return chat_session.id
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose() # aiosqlite connections are bound to this loop
+    return asyncio.run(main())
+
+
+def message(session_id: int, content: str) -> message_schemas.ChatMessageCreateInternal:
+    return message_schemas.ChatMessageCreateInternal(session_id=session_id, sender_type="user", content=content)
+
+
+def make_write_behind(**kwargs) -> MessageWriteBehind:
+    kwargs.setdefault("flush_interval", 0.05)
+    kwargs.setdefault("max_backoff", 0.05)
+    return MessageWriteBehind(LocalIdAllocator(AsyncSessionLocal), **kwargs)
+
+
+async def stored(session_id: int):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(models.ChatMessage.id, models.ChatMessage.content)
+            .where(models.ChatMessage.session_id == session_id).order_by(models.ChatMessage.id)
+        )
+        return [tuple(row) for row in result]
+
+
+def test_group_commit_and_pending_overlay(session_id):
+    async def scenario():
+        wb = make_write_behind()
+        wb.start()
+        rows = await wb.submit([message(session_id, "hi"), message(session_id, "hello")])
+        # Visible through the overlay before the flush
+        assert [row.content for row in wb.pending_for_session(session_id)] == ["hi", "hello"]
+        await wb.stop()
+        assert wb.pending_for_session(session_id) == []
+        return rows, await stored(session_id)
+
+    rows, in_db = run(scenario())
+    assert in_db == [(row.id, row.content) for row in rows]
+
+
+def test_bad_row_is_rejected_alone(session_id):
+    async def scenario():
+        wb = make_write_behind(flush_interval=0.2)
+        wb.start()
+        rows = await wb.submit([message(session_id, f"m{i}") for i in range(6)])
+        duplicate = rows[2].model_copy(update={"content": "duplicate id"})
+        await wb._queue.put([duplicate]) # same primary key as rows[2], in the same batch
+        await wb.stop()
+        return rows, await stored(session_id)
+
+    rejected_before = write_behind.WRITE_BEHIND_REJECTED.value()
+    rows, in_db = run(scenario())
+    assert in_db == [(row.id, row.content) for row in rows]
+    assert write_behind.WRITE_BEHIND_REJECTED.value() == rejected_before + 1
+
+
+def test_transient_errors_are_retried(session_id, monkeypatch):
+    async def scenario():
+        wb = make_write_behind()
+        insert, failures = wb._insert, [3]
+
+        async def flaky_insert(rows):
+            if failures[0]:
+                failures[0] -= 1
+                raise OperationalError("INSERT", {}, Exception("database is down"))
+            await insert(rows)
+
+        monkeypatch.setattr(wb, "_insert", flaky_insert)
+        wb.start()
+        rows = await wb.submit([message(session_id, "survives an outage")])
+        await wb.stop()
+        return rows, await stored(session_id)
+
+    dropped_before = write_behind.WRITE_BEHIND_DROPPED.value()
+    rows, in_db = run(scenario())
+    assert in_db == [(rows[0].id, "survives an outage")]
+    assert write_behind.WRITE_BEHIND_DROPPED.value() == dropped_before
+
+
+def test_stop_gives_up_after_timeout(session_id, monkeypatch):
+    async def scenario():
+        wb = make_write_behind()
+
+        async def database_down(rows):
+            raise OperationalError("INSERT", {}, Exception("database is down"))
+
+        monkeypatch.setattr(wb, "_insert", database_down)
+        wb.start()
+        await wb.submit([message(session_id, "lost")])
+        await wb.stop(timeout=0.2)
+        return wb.pending_for_session(session_id)
+
+    dropped_before = write_behind.WRITE_BEHIND_DROPPED.value()
+    assert run(scenario()) == []
+    assert write_behind.WRITE_BEHIND_DROPPED.value() == dropped_before + 1
+
+
+def test_unknown_session_is_rejected_on_submit(session_id):
+    async def scenario():
+        wb = make_write_behind()
+        with pytest.raises(UnknownSessionError) as error:
+            await wb.submit([message(session_id, "ok"), message(10**9, "no such session")])
+        return error.value.session_ids, wb._queue.qsize()
+
+    assert run(scenario()) == ([10**9], 0)
+
+
+def test_turns_submitted_while_stopping_are_flushed(session_id, monkeypatch):
+    async def scenario():
+        wb = make_write_behind()
+        allocate = wb.allocator.allocate
+
+        async def slow_allocate(n):
+            await asyncio.sleep(0.2) # still allocating when stop() queues its sentinel
+            return await allocate(n)
+
+        monkeypatch.setattr(wb.allocator, "allocate", slow_allocate)
+        wb.start()
+        submitting = asyncio.ensure_future(wb.submit([message(session_id, "late")]))
+        await asyncio.sleep(0.05)
+        await wb.stop()
+        rows = await submitting
+        with pytest.raises(RuntimeError):
+            await wb.submit([message(session_id, "after stop")])
+        return rows, await stored(session_id)
+
+    rows, in_db = run(scenario())
+    assert in_db == [(rows[0].id, "late")]
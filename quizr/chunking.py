@@ -0,0 +1,122 @@
+# quizr/chunking.py
+"""
+Splits a page into chunks once, then decides which chunk each question is
+generated from, so a prompt carries one chunk instead of the whole page.
+"""
+import bisect
+import random
+from typing import Dict, List, Optional, Sequence
+
+# Tried in order: paragraphs, lines, sentences, words
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+# One chunk is a few paragraphs: enough context for a self-contained question
+CHUNK_SIZE = 4000
+CHUNK_OVERLAP = 200
+# Chunks shorter than this (menus, footers, cookie banners) rarely make a good question
+MIN_CHUNK_CHARS = 300
+
+
+def _split(text: str, chunk_size: int, separators: Sequence[str]) -> List[str]:
+    if len(text) <= chunk_size:
+        return [text]
+    if not separators:
+        return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+    sep, rest = separators[0], separators[1:]
+    parts = text.split(sep)
+    pieces: List[str] = []
+    for i, part in enumerate(parts):
+        if i < len(parts) - 1:
+            part += sep
+        if len(part) > chunk_size:
+            pieces.extend(_split(part, chunk_size, rest))
+        elif part:
+            pieces.append(part)
+    return pieces
+
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP, min_chars: int = MIN_CHUNK_CHARS) -> List[str]:
+    """
+    Splits text into chunks of at most ~chunk_size characters on the coarsest
+    boundary that fits, with `overlap` characters carried into the next chunk.
+    Chunks under `min_chars` are dropped unless that would leave nothing.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+    text = text.strip()
+    if not text:
+        return []
+
+    chunks: List[str] = []
+    current = ""
+    for piece in _split(text, chunk_size - overlap, SEPARATORS):
+        if current and len(current) + len(piece) > chunk_size:
+            chunks.append(current.strip())
+            current = current[-overlap:] if overlap else ""
+        current += piece
+    if current.strip():
+        chunks.append(current.strip())
+    substantial = [c for c in chunks if len(c) >= min_chars]
+    return substantial or chunks
+
+
+class ChunkSampler:
+    """
+    Coverage-driven choice of the next chunk to ask about: the least-asked
+    chunks first, and among those the one farthest from every chunk asked so
+    far, so a quiz spreads over the whole page instead of walking it top to
+    bottom. Chunks that produced no new question are skipped from then on.
+
+    Also keeps the questions asked per chunk; only those go back into the
+    prompt (the ones that could be repeated from this text), not the whole
+    quiz history.
+    """
+
+    def __init__(self, num_chunks: int, seed: Optional[int] = None):
+        self.num_chunks = num_chunks
+        self.visits = [0] * num_chunks
+        self.exhausted: set = set()
+        self.questions: Dict[int, List[str]] = {}
+        self._visited_positions: List[int] = [] # sorted, for the distance lookup
+        self._rng = random.Random(seed)
+
+    def _distance_to_visited(self, i: int) -> int:
+        pos = bisect.bisect_left(self._visited_positions, i)
+        nearest = self.num_chunks
+        if pos < len(self._visited_positions):
+            nearest = self._visited_positions[pos] - i
+        if pos > 0:
+            nearest = min(nearest, i - self._visited_positions[pos - 1])
+        return nearest
+
+    def next_chunk(self) -> Optional[int]:
+        """Index of the chunk for the next question, or None when every chunk is exhausted."""
+        available = [i for i in range(self.num_chunks) if i not in self.exhausted]
+        if not available:
+            return None
+        fewest = min(self.visits[i] for i in available)
+        candidates = [i for i in available if self.visits[i] == fewest]
+        if fewest == 0 and self._visited_positions:
+            farthest = max(self._distance_to_visited(i) for i in candidates)
+            candidates = [i for i in candidates if self._distance_to_visited(i) == farthest]
+        choice = self._rng.choice(candidates)
+        if self.visits[choice] == 0:
+            bisect.insort(self._visited_positions, choice)
+        self.visits[choice] += 1
+        return choice
+
+    def record_question(self, chunk_id: int, question: str) -> None:
+        self.questions.setdefault(chunk_id, []).append(question)
+
+    def mark_exhausted(self, chunk_id: int) -> None:
+        self.exhausted.add(chunk_id)
+
+    def fingerprint(self, chunk_id: int, max_questions: int = 10, max_chars: int = 120) -> List[str]:
+        """Questions already asked from this chunk, newest last, each cut to `max_chars`: bounded prompt size."""
+        asked = self.questions.get(chunk_id, [])[-max_questions:]
+        return [q if len(q) <= max_chars else q[:max_chars - 1] + "…" for q in asked]
+
+    @property
+    def coverage(self) -> float:
+        """Fraction of chunks asked about at least once."""
+        return len(self._visited_positions) / self.num_chunks if self.num_chunks else 1.0
@@ -0,0 +1,274 @@
+# quizr/content_store.py
+"""
+Disk-backed cache of fetched quiz pages, shared by every quizr process that
+points at the same directory (QUIZR_CONTENT_DIR, e.g. a shared volume).
+
+Each page is stored once as its extracted text, gzip-compressed, keyed by the
+SHA-256 of its URL. A fresh entry (younger than `ttl`) is served without any
+network access. A stale one is revalidated with If-None-Match /
+If-Modified-Since: a 304 just refreshes it, and if the site is unreachable the
+stale text is served. The directory is kept under `max_bytes` by evicting the
+least recently used entries. Writes are atomic (temp file + rename), so
+concurrent writers never leave a torn entry; temp files left behind by a
+crashed writer are swept by the next eviction.
+
+    python -m quizr.content_store prewarm urls.txt     # one URL per line
+    python -m quizr.content_store stats
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "quizr", "pages")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 3600
+USER_AGENT = "QuizrApp/1.0 (StreamlitQuizBot/contact@example.com)"
+ENTRY_SUFFIX = ".json.gz"
+TMP_SUFFIX = ".tmp"
+# Temp files older than this belong to a writer that died mid-put
+STALE_TMP_SECONDS = 3600
+# put() only scans the directory when its running size estimate goes over budget,
+# and every this many puts (other processes write to the same directory)
+EVICT_CHECK_EVERY = 64
+
+
+def html_to_text(html: str) -> str:
+    """Page text the way WebBaseLoader extracts it (BeautifulSoup html.parser, get_text())."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "html.parser").get_text()
+
+
+@dataclass
+class PageEntry:
+    url: str
+    text: str
+    fetched_at: float # last time the origin confirmed this text (200 or 304)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class ContentStore:
+    def __init__(
+        self,
+        root: str = DEFAULT_DIR,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        timeout: float = 20.0
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.timeout = timeout
+        self.stats: Dict[str, int] = {"hits": 0, "revalidated": 0, "fetched": 0, "stale_served": 0, "evicted": 0}
+        self._estimated_bytes: Optional[int] = None # None until the first scan
+        self._puts = 0
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "ContentStore":
+        return cls(
+            root=os.getenv("QUIZR_CONTENT_DIR", DEFAULT_DIR),
+            max_bytes=int(os.getenv("QUIZR_CONTENT_MAX_MB", "256")) * 1024 * 1024,
+            ttl=float(os.getenv("QUIZR_CONTENT_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))),
+        )
+
+    # --- entries on disk ---
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, url: str) -> Optional[PageEntry]:
+        path = self._path(url)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Dropping unreadable cache entry %s: %s", path, e)
+            self._remove(path)
+            return None
+        if data.get("url") != url: # SHA-256 collision is not a practical concern; a hand-edited file is
+            return None
+        try:
+            os.utime(path) # mtime = last use, for LRU eviction
+        except OSError:
+            pass
+        return PageEntry(**data)
+
+    def put(self, entry: PageEntry) -> None:
+        path = self._path(entry.url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+                f.write(json.dumps(entry.__dict__).encode("utf-8"))
+            written = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self._puts += 1
+        if self._estimated_bytes is not None:
+            self._estimated_bytes += written # overcounts a replaced entry, which only makes the next scan come sooner
+        if self._estimated_bytes is None or self._estimated_bytes > self.max_bytes or self._puts % EVICT_CHECK_EVERY == 0:
+            self.evict()
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _scandir(path: str) -> List[os.DirEntry]:
+        try:
+            with os.scandir(path) as it:
+                return list(it)
+        except FileNotFoundError: # removed by another process meanwhile
+            return []
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], List[str]]:
+        """(mtime, size, path) of every entry, and the paths of stale temp files."""
+        entries, stale_tmp = [], []
+        now = time.time()
+        for shard in self._scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for e in self._scandir(shard.path):
+                try:
+                    st = e.stat()
+                except FileNotFoundError: # evicted or replaced by another process
+                    continue
+                if e.name.endswith(ENTRY_SUFFIX):
+                    entries.append((st.st_mtime, st.st_size, e.path))
+                elif e.name.endswith(TMP_SUFFIX) and now - st.st_mtime > STALE_TMP_SECONDS:
+                    stale_tmp.append(e.path)
+        return entries, stale_tmp
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        return self._scan()[0]
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the store fits in max_bytes, and stale temp files. Returns the number of entries deleted."""
+        entries, stale_tmp = self._scan()
+        for path in stale_tmp:
+            self._remove(path)
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            evicted += 1
+        self._estimated_bytes = total
+        self.stats["evicted"] += evicted
+        return evicted
+
+    # --- fetching ---
+
+    def fetch(self, url: str, parse: Callable[[str], str] = html_to_text, headers: Optional[Dict[str, str]] = None) -> str:
+        """
+        The page's text: from the store while fresh, revalidated once stale,
+        downloaded and parsed only when new or changed. Raises on network
+        errors only if there is nothing cached to fall back on.
+        """
+        entry = self.get(url)
+        if entry is not None and entry.age() < self.ttl:
+            self.stats["hits"] += 1
+            return entry.text
+
+        request_headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        if entry is not None:
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+        try:
+            response = requests.get(url, headers=request_headers, timeout=self.timeout)
+            if response.status_code == 304:
+                if entry is None: # only possible with conditional headers passed in by the caller
+                    raise requests.HTTPError(f"304 Not Modified for {url}, but nothing is cached", response=response)
+                entry.fetched_at = time.time()
+                self.put(entry)
+                self.stats["revalidated"] += 1
+                return entry.text
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            logger.warning("Revalidating %s failed (%s), serving cached copy from %.0fs ago", url, e, entry.age())
+            self.stats["stale_served"] += 1
+            return entry.text
+
+        response.encoding = response.apparent_encoding # like WebBaseLoader's autoset_encoding
+        entry = PageEntry(
+            url=url,
+            text=parse(response.text),
+            fetched_at=time.time(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        self.put(entry)
+        self.stats["fetched"] += 1
+        return entry.text
+
+    def prewarm(self, urls: Iterable[str]) -> Dict[str, int]:
+        """Fetches (or revalidates) each URL into the store; returns counts of ok / failed."""
+        result = {"ok": 0, "failed": 0}
+        for url in urls:
+            started = time.perf_counter()
+            try:
+                text = self.fetch(url)
+                result["ok"] += 1
+                print(f"ok      {len(text):>9,} chars {time.perf_counter() - started:6.2f}s  {url}")
+            except Exception as e:
+                result["failed"] += 1
+                print(f"failed  {e}  {url}")
+        return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    prewarm = sub.add_parser("prewarm", help="fetch a list of URLs into the store")
+    prewarm.add_argument("url_file", help="file with one URL per line ('-' for stdin); blank lines and # comments are skipped")
+    sub.add_parser("stats", help="entries and size of the store")
+    sub.add_parser("evict", help="trim the store to QUIZR_CONTENT_MAX_MB")
+    args = parser.parse_args()
+
+    store = ContentStore.from_env()
+    if args.command == "prewarm":
+        with (sys.stdin if args.url_file == "-" else open(args.url_file, encoding="utf-8")) as f:
+            urls = [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+        result = store.prewarm(urls)
+        print(f"{result['ok']} cached, {result['failed']} failed ({store.stats}); store at {store.root}")
+        sys.exit(1 if result["failed"] else 0)
+    elif args.command == "stats":
+        print(f"{len(store._entries())} pages, {store.size() / 1e6:.1f} MB of {store.max_bytes / 1e6:.0f} MB in {store.root}")
+    else:
+        print(f"evicted {store.evict()} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# quizr/dedupe.py
+"""
+Local near-duplicate detection for quiz questions: MinHash signatures over
+character shingles with LSH banding, so a paraphrased repeat ("In which year
+was X founded?" vs "When was X founded?") is caught without an LLM call.
+
+Shingle overlap alone can't tell "Which country won the 1998 World Cup?"
+from the 2018 one, so a match also needs the same numbers and mostly the
+same capitalized names (key_tokens).
+"""
+import re
+import struct
+import zlib
+from hashlib import blake2b
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+# Words that carry no content; dropping them lets rephrasings of the same question meet
+STOPWORDS = frozenset("""
+a an the of in on at to for from by with about as into is are was were be been being do does did
+what which who whom whose when where why how this that these those it its and or not
+according following true statement best describes correct
+""".split())
+
+SHINGLE_SIZE = 4
+# Minimum Jaccard similarity of the capitalized names of two texts that match
+NAME_OVERLAP = 0.5
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize(text: str) -> str:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    # crude stemming so "founded"/"founding", "cities"/"city" share shingles
+    content = [w.rstrip("s") if len(w) > 3 else w for w in words if w not in STOPWORDS]
+    return " ".join(content or words)
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> Set[int]:
+    """Hashed character k-grams of the normalized text."""
+    norm = normalize(text)
+    if len(norm) <= k:
+        return {zlib.crc32(norm.encode("utf-8"))}
+    return {zlib.crc32(norm[i:i + k].encode("utf-8")) for i in range(len(norm) - k + 1)}
+
+
+def key_tokens(text: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    (numbers, capitalized names) in the text: what a reworded repeat keeps
+    verbatim and a different question about the same kind of thing changes.
+    The first word is skipped, it is capitalized either way.
+    """
+    numbers = frozenset(re.findall(r"\d+(?:\.\d+)?", text))
+    names = frozenset(
+        m.group().lower() for m in re.finditer(r"\b[A-Z][A-Za-z]*", text)
+        if m.start() > 0 and m.group().lower() not in STOPWORDS
+    )
+    return numbers, names
+
+
+def keys_agree(a: Tuple[FrozenSet[str], FrozenSet[str]], b: Tuple[FrozenSet[str], FrozenSet[str]]) -> bool:
+    (numbers_a, names_a), (numbers_b, names_b) = a, b
+    if numbers_a != numbers_b:
+        return False
+    return not (names_a or names_b) or jaccard(names_a, names_b) >= NAME_OVERLAP
+
+
+def jaccard(a: Set, b: Set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """num_perm universal hash functions h(x) = (a*x + b) mod p, fixed by `seed`."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        digest = blake2b(str(seed).encode(), digest_size=64).digest()
+        params = []
+        while len(params) < 2 * num_perm:
+            digest = blake2b(digest, digest_size=64).digest()
+            params.extend(struct.unpack("<8Q", digest))
+        self._a = [p % (_MERSENNE_PRIME - 1) + 1 for p in params[:num_perm]]
+        self._b = [p % _MERSENNE_PRIME for p in params[num_perm:2 * num_perm]]
+
+    def signature(self, shingle_set: Set[int]) -> Tuple[int, ...]:
+        return tuple(
+            min(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for x in shingle_set)
+            for a, b in zip(self._a, self._b)
+        )
+
+
+class NearDuplicateIndex:
+    """
+    Small in-memory index of one quiz's questions. LSH bands (`bands` x
+    num_perm/bands rows) pick candidates whose estimated similarity is near
+    `threshold` or above; candidates are then confirmed on the exact Jaccard
+    similarity of their shingle sets and on their key tokens. Not
+    thread-safe on its own.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 32):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._hasher = MinHasher(num_perm)
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+        self._texts: List[str] = []
+        self._shingles: List[Set[int]] = []
+        self._keys: List[Tuple[FrozenSet[str], FrozenSet[str]]] = []
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _match(self, text: str, shingle_set: Set[int], signature: Tuple[int, ...]) -> Optional[Tuple[str, float]]:
+        candidates = set()
+        for band, key in self._bands(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        best = None
+        keys = key_tokens(text)
+        for i in candidates:
+            similarity = jaccard(shingle_set, self._shingles[i])
+            if similarity >= self.threshold and (best is None or similarity > best[1]) and keys_agree(keys, self._keys[i]):
+                best = (self._texts[i], similarity)
+        return best
+
+    def find(self, text: str) -> Optional[Tuple[str, float]]:
+        """(most similar indexed text, Jaccard similarity) if `text` is a near duplicate, else None."""
+        shingle_set = shingles(text)
+        return self._match(text, shingle_set, self._hasher.signature(shingle_set))
+
+    def add(self, text: str) -> None:
+        shingle_set = shingles(text)
+        self._insert(text, shingle_set, self._hasher.signature(shingle_set))
+
+    def add_if_new(self, text: str) -> bool:
+        """Indexes `text` and returns True, or returns False if it near-duplicates an indexed one."""
+        shingle_set = shingles(text)
+        signature = self._hasher.signature(shingle_set)
+        if self._match(text, shingle_set, signature) is not None:
+            return False
+        self._insert(text, shingle_set, signature)
+        return True
+
+    def _insert(self, text: str, shingle_set: Set[int], signature: Tuple[int, ...]) -> None:
+        i = len(self._texts)
+        self._texts.append(text)
+        self._shingles.append(shingle_set)
+        self._keys.append(key_tokens(text))
+        for band, key in self._bands(signature):
+            self._buckets[band].setdefault(key, []).append(i)
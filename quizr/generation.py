@@ -0,0 +1,178 @@
+# quizr/generation.py
+"""
+Quiz question generation: asks the LLM for a batch of multiple-choice
+questions about one chunk of text and validates each one against QuizItem.
+No Streamlit here, it runs in the prefetch worker threads.
+"""
+import logging
+import os
+from typing import List, Optional
+
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.utils.json import parse_json_markdown
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from llm_gateway import LLMGateway, estimate_tokens, prompt_key
+
+logger = logging.getLogger(__name__)
+
+class QuizItem(BaseModel):
+    question: str = Field(description="The quiz question.")
+    options: List[str] = Field(description="A list of 4 multiple choice options, or an empty list if no new question can be generated.")
+    answer: int = Field(description="The 0-indexed integer of the correct option in the 'options' list, or 0 if no new question can be generated.")
+    explanation: str = Field(
+        description="A brief, factual explanation of why the correct answer is correct, directly derived from the provided text. Avoid meta-references to the text itself (e.g., 'the document states', 'according to the text'). If no new question, this explains why."
+    )
+
+    @field_validator('options')
+    @classmethod
+    def check_options_length(cls, v: List[str], values) -> List[str]:
+        question_data = values.data.get('question')
+        if not isinstance(v, list):
+            raise ValueError("Options must be a list.")
+        if question_data == "NO_NEW_QUESTION":
+            if v:
+                raise ValueError("Options list must be empty when question is 'NO_NEW_QUESTION'.")
+            return v
+        if len(v) != 4:
+            raise ValueError("Options list must contain exactly 4 items for a regular question.")
+        if not all(isinstance(opt, str) for opt in v):
+            raise ValueError("All options must be strings.")
+        return v
+
+    @field_validator('answer')
+    @classmethod
+    def check_answer_index(cls, v: int, values) -> int:
+        options_data = values.data.get('options')
+        question_data = values.data.get('question')
+        if question_data == "NO_NEW_QUESTION":
+            if not options_data and v == 0:
+                return v
+            else:
+                raise ValueError("For 'NO_NEW_QUESTION', answer must be 0 and options empty.")
+        if options_data:
+            num_options = len(options_data)
+            if not (0 <= v < num_options):
+                raise ValueError(f"Answer index must be between 0 and {num_options - 1}.")
+        else:
+             raise ValueError("Options are missing for a regular question, cannot validate answer index.")
+        return v
+
+class QuizGenerationError(Exception):
+    def __init__(self, message: str, raw_output: Optional[str] = None):
+        super().__init__(message)
+        self.raw_output = raw_output
+
+QUIZ_PROMPT_TEMPLATE = """
+    You are an expert quiz generator. Based on the following text (an excerpt of a web page), generate {num_questions} new multiple-choice quiz questions.
+    Each question must be answerable SOLELY from the provided text, and the questions must all be different from each other.
+    Each question should have exactly 4 options.
+    Indicate the correct answer (as a 0-indexed integer).
+    Provide a brief, factual explanation for why the correct answer is correct, directly derived from the text.
+    The explanation must NOT include phrases like 'the text states', 'according to the document', 'as mentioned in the passage', etc. Just state the facts supporting the answer.
+
+    IMPORTANT: DO NOT generate any of the following questions, as they have already been asked about this text:
+    --- PREVIOUSLY ASKED QUESTIONS ---
+    {asked_questions_list_str}
+    --- END PREVIOUSLY ASKED QUESTIONS ---
+
+    If the text doesn't support {num_questions} new, unique questions (different from the list above), return as many as it does.
+    If it supports none, return an empty list: {{"questions": []}}
+
+    {format_instructions}
+
+    Here is the text to base the quiz on:
+    --- TEXT ---
+    {text_content}
+    --- END TEXT ---
+
+    Your response must be a single JSON object matching the Pydantic schema.
+    """
+
+# Questions asked for per LLM call; each quiz question then costs ~1/QUIZ_BATCH_SIZE of a call
+QUIZ_BATCH_SIZE = int(os.getenv("QUIZR_BATCH_SIZE", "5"))
+# Follow-up calls for the slots that came back invalid
+MAX_REPAIR_ROUNDS = 1
+# Rough output allowance per question for the gateway's tokens-per-minute budget
+COMPLETION_TOKENS_PER_QUESTION = 250
+
+class QuizBatch(BaseModel):
+    questions: List[QuizItem] = Field(description="The new quiz questions.")
+
+def _request_quiz_items(text_content: str, llm, gateway: LLMGateway, asked_questions_texts: List[str], num_questions: int):
+    """One LLM call for `num_questions` questions. Returns (raw output text, list of raw item dicts)."""
+    parser = PydanticOutputParser(pydantic_object=QuizBatch)
+    asked_questions_list_str = "\n".join([f"- {q}" for q in asked_questions_texts]) if asked_questions_texts else "N/A (these are the first questions)"
+    prompt = PromptTemplate(
+        template=QUIZ_PROMPT_TEMPLATE,
+        input_variables=["text_content", "asked_questions_list_str", "num_questions"],
+        partial_variables={"format_instructions": parser.get_format_instructions()}
+    )
+    chain = prompt | llm
+    inputs = {
+        "text_content": text_content,
+        "asked_questions_list_str": asked_questions_list_str,
+        "num_questions": num_questions
+    }
+    try:
+        # Sessions quizzing the same page from the same point share one LLM call
+        raw_output = gateway.call(
+            lambda: chain.invoke(inputs),
+            tokens=estimate_tokens(text_content + asked_questions_list_str, COMPLETION_TOKENS_PER_QUESTION * num_questions),
+            key=prompt_key(llm.model, text_content, asked_questions_list_str, num_questions)
+        )
+    except Exception as e:
+        raise QuizGenerationError(f"Error generating quiz: {e}") from e
+    raw_text = raw_output.content if hasattr(raw_output, 'content') else str(raw_output)
+    try:
+        # Only the envelope is parsed here; each item is validated on its own by the caller
+        data = parse_json_markdown(raw_text)
+    except Exception as e:
+        raise QuizGenerationError(f"Error parsing quiz: {e}", raw_output=raw_text) from e
+    items = data.get("questions") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise QuizGenerationError("Error parsing quiz: expected a list of questions", raw_output=raw_text)
+    return raw_text, items
+
+def generate_quizzes_from_text(
+    text_content: str,
+    llm,
+    gateway: LLMGateway,
+    asked_questions_texts: List[str],
+    num_questions: int = QUIZ_BATCH_SIZE
+) -> List[QuizItem]:
+    """
+    Up to `num_questions` questions from `text_content` in one structured call.
+    Each item is validated on its own against QuizItem: valid ones are kept and
+    only the invalid slots are asked for again (MAX_REPAIR_ROUNDS). An empty
+    list means the model finds nothing new to ask. Raises QuizGenerationError
+    (with the raw model output) when nothing usable came back.
+    Runs in prefetch worker threads, so no Streamlit calls here.
+    """
+    accepted: List[QuizItem] = []
+    errors: List[str] = []
+    first_raw_text = None
+    wanted = num_questions
+    for round_no in range(1 + MAX_REPAIR_ROUNDS):
+        raw_text, items = _request_quiz_items(
+            text_content, llm, gateway, asked_questions_texts + [q.question for q in accepted], wanted
+        )
+        first_raw_text = first_raw_text or raw_text
+        invalid = 0
+        for item in items[:wanted]:
+            try:
+                quiz_item = QuizItem.model_validate(item)
+            except ValidationError as e:
+                invalid += 1
+                errors.append(str(e))
+                continue
+            if quiz_item.question != "NO_NEW_QUESTION":
+                accepted.append(quiz_item)
+        if not invalid or round_no == MAX_REPAIR_ROUNDS:
+            break # fewer items than asked for means the text is used up, nothing to repair
+        logger.warning("%d of %d quiz items failed validation, re-requesting them", invalid, len(items[:wanted]))
+        wanted = invalid
+    if not accepted and errors:
+        raise QuizGenerationError(f"Error validating quiz: {errors[0]}", raw_output=first_raw_text)
+    return accepted
@@ -0,0 +1,164 @@
+# quizr/prefetch.py
+"""
+Generates the next few quiz questions in the background while the user is
+answering the current one, so "Next Question" usually doesn't wait for the LLM.
+"""
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Deque, List, Optional, Set
+
+from quizr.chunking import ChunkSampler
+from quizr.dedupe import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+# (chunk text, questions already asked from that chunk) -> validated quiz items,
+# empty when the chunk has nothing new to ask. Runs in a worker thread, so it
+# must not touch Streamlit.
+GenerateFn = Callable[[str, List[str]], List[Any]]
+
+# Chunks tried by one background job before it gives up (each try is one batched LLM call)
+MAX_CHUNK_ATTEMPTS = 3
+# Jobs in a row that came back empty before the page counts as used up
+MAX_EMPTY_JOBS = 3
+
+
+class QuestionPrefetcher:
+    """
+    Per quiz session queue of ready questions, kept `depth` deep by jobs on a
+    shared thread pool. Each job picks a chunk (ChunkSampler), generates up to
+    `batch_size` questions from it and drops those that repeat one already
+    asked or queued, paraphrases included (NearDuplicateIndex on
+    `dedupe_text(item)`; `asked_items` are indexed the same way).
+
+    cancel() (quiz stopped, new URL) drops the queue and tells running jobs to
+    stop before their next LLM call; a call already in flight can't be
+    interrupted, its result is discarded.
+    """
+
+    def __init__(
+        self,
+        chunks: List[str],
+        sampler: ChunkSampler,
+        generate: GenerateFn,
+        executor: Executor,
+        depth: int = 2,
+        batch_size: int = 1,
+        asked_items: Optional[List[Any]] = None,
+        dedupe_text: Callable[[Any], str] = lambda item: item.question
+    ):
+        self.chunks = chunks
+        self.sampler = sampler
+        self.generate = generate
+        self.executor = executor
+        self.depth = max(1, depth)
+        self.batch_size = max(1, batch_size)
+        self._ready: Deque[Any] = deque()
+        self._pending: Set[Future] = set()
+        self.dedupe_text = dedupe_text
+        self._seen = NearDuplicateIndex()
+        for item in asked_items or []:
+            self._seen.add(dedupe_text(item))
+        self.duplicates = 0 # generated questions dropped as (near) repeats
+        self._empty_jobs = 0
+        self._lock = threading.Lock() # sampler, queue and counters are shared with the worker threads
+        self._cancelled = threading.Event()
+        self.last_error: Optional[BaseException] = None
+        self.prefetched = 0 # questions generated
+        self.waited = 0 # next() calls that had to wait for the LLM
+
+    @property
+    def exhausted(self) -> bool:
+        with self._lock:
+            self._collect_locked()
+            return self._exhausted_locked() and not self._ready and not self._pending
+
+    def _exhausted_locked(self) -> bool:
+        return self._empty_jobs >= MAX_EMPTY_JOBS or len(self.sampler.exhausted) >= self.sampler.num_chunks
+
+    def has_ready(self) -> bool:
+        with self._lock:
+            self._collect_locked()
+            return bool(self._ready)
+
+    def fill(self) -> None:
+        """Starts jobs until ready + expected in-flight questions reach the prefetch depth."""
+        with self._lock:
+            self._collect_locked()
+            while (
+                not self._cancelled.is_set()
+                and not self._exhausted_locked()
+                and len(self._ready) + len(self._pending) * self.batch_size < self.depth
+            ):
+                self._pending.add(self.executor.submit(self._job))
+
+    def next(self) -> Optional[Any]:
+        """The next question, waiting for a job if none is ready; None once the page is used up."""
+        self.fill()
+        waited = False
+        while True:
+            with self._lock:
+                self._collect_locked()
+                if self._ready:
+                    item = self._ready.popleft()
+                    break
+                pending = list(self._pending)
+            if not pending:
+                return None
+            waited = True
+            wait(pending, return_when=FIRST_COMPLETED)
+            self.fill() # a job that came back empty leaves a slot to refill
+        self.waited += waited
+        self.fill()
+        return item
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        with self._lock:
+            for future in self._pending:
+                future.cancel() # only helps for jobs that haven't started
+            self._pending.clear()
+            self._ready.clear()
+
+    def _job(self) -> List[Any]:
+        for _ in range(MAX_CHUNK_ATTEMPTS):
+            if self._cancelled.is_set():
+                return []
+            with self._lock:
+                chunk_id = self.sampler.next_chunk()
+                if chunk_id is None:
+                    return []
+                fingerprint = self.sampler.fingerprint(chunk_id)
+            items = self.generate(self.chunks[chunk_id], fingerprint)
+            fresh = []
+            with self._lock:
+                if not items:
+                    self.sampler.mark_exhausted(chunk_id)
+                    continue
+                for item in items:
+                    self.sampler.record_question(chunk_id, item.question)
+                    if not self._seen.add_if_new(self.dedupe_text(item)):
+                        self.duplicates += 1 # asked before, maybe reworded, or twice in one batch
+                        continue
+                    fresh.append(item)
+            if fresh:
+                return fresh
+        return []
+
+    def _collect_locked(self) -> None:
+        """Moves finished jobs' questions to the ready queue, in completion order."""
+        for future in [f for f in self._pending if f.done()]:
+            self._pending.discard(future)
+            error = future.exception()
+            if error is not None:
+                logger.warning("Question prefetch failed: %s", error)
+                self.last_error = error
+                self._empty_jobs += 1
+            elif not future.result():
+                self._empty_jobs += 1
+            else:
+                self._empty_jobs = 0
+                self._ready.extend(future.result())
+                self.prefetched += len(future.result())
@@ -1,58 +1,17 @@
 # quiz.py
 import streamlit as st
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_core.output_parsers import PydanticOutputParser
 from dotenv import load_dotenv
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 
-# Pydantic Model for Structured Output
-from pydantic import BaseModel, Field, field_validator
-
-# ... (QuizItem class definition remains the same as before) ...
-class QuizItem(BaseModel):
-    question: str = Field(description="The quiz question.")
-    options: List[str] = Field(description="A list of 4 multiple choice options, or an empty list if no new question can be generated.")
-    answer: int = Field(description="The 0-indexed integer of the correct option in the 'options' list, or 0 if no new question can be generated.")
-    explanation: str = Field(
-        description="A brief, factual explanation of why the correct answer is correct, directly derived from the provided text. Avoid meta-references to the text itself (e.g., 'the document states', 'according to the text'). If no new question, this explains why."
-    )
-
-    @field_validator('options')
-    @classmethod
-    def check_options_length(cls, v: List[str], values) -> List[str]:
-        question_data = values.data.get('question')
-        if not isinstance(v, list):
-            raise ValueError("Options must be a list.")
-        if question_data == "NO_NEW_QUESTION":
-            if v:
-                raise ValueError("Options list must be empty when question is 'NO_NEW_QUESTION'.")
-            return v
-        if len(v) != 4:
-            raise ValueError("Options list must contain exactly 4 items for a regular question.")
-        if not all(isinstance(opt, str) for opt in v):
-            raise ValueError("All options must be strings.")
-        return v
-
-    @field_validator('answer')
-    @classmethod
-    def check_answer_index(cls, v: int, values) -> int:
-        options_data = values.data.get('options')
-        question_data = values.data.get('question')
-        if question_data == "NO_NEW_QUESTION":
-            if not options_data and v == 0:
-                return v
-            else:
-                raise ValueError("For 'NO_NEW_QUESTION', answer must be 0 and options empty.")
-        if options_data:
-            num_options = len(options_data)
-            if not (0 <= v < num_options):
-                raise ValueError(f"Answer index must be between 0 and {num_options - 1}.")
-        else:
-             raise ValueError("Options are missing for a regular question, cannot validate answer index.")
-        return v
+# Shared LLM gateway (rate limits, retries, coalescing); `pip install -e .` at the repository root
+from llm_gateway import LLMGateway
+from quizr.chunking import ChunkSampler, chunk_text
+from quizr.content_store import ContentStore
+from quizr.generation import QUIZ_BATCH_SIZE, QuizItem, generate_quizzes_from_text
+from quizr.prefetch import QuestionPrefetcher
 
 # Load environment variables
 load_dotenv()
@@ -65,93 +24,47 @@ def get_llm():
         st.error("GOOGLE_API_KEY not found. Please set it in your .env file or environment.")
         return None
     try:
-        llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest", temperature=0.2)
+        # max_retries=1: retries go through the gateway, which backs off across all sessions
+        llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest", temperature=0.2, max_retries=1)
         return llm
     except Exception as e:
         st.error(f"Error initializing LLM: {e}")
         return None
 
+@st.cache_resource
+def get_gateway() -> LLMGateway:
+    # One per server process, shared by every browser session. Limits via LLM_GATEWAY_RPM / _TPM etc.
+    return LLMGateway.from_env(name="quizr")
+
+@st.cache_resource
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    # Shared by all sessions; caps how many questions are being generated at once per server
+    return ThreadPoolExecutor(max_workers=int(os.getenv("QUIZR_PREFETCH_WORKERS", "8")), thread_name_prefix="quizr-prefetch")
+
+@st.cache_resource
+def get_content_store() -> ContentStore:
+    # Pages on disk (QUIZR_CONTENT_DIR), shared across restarts and by every process using the same directory
+    return ContentStore.from_env()
+
+# `url`, not `_url`: Streamlit leaves underscore-prefixed arguments out of the cache key
 @st.cache_data(ttl=3600)
-def fetch_website_content(_url: str):
-    st.info(f"Fetching content from: {_url}")
+def fetch_website_content(url: str):
+    st.info(f"Fetching content from: {url}")
     try:
-        headers = {"User-Agent": "QuizrApp/1.0 (StreamlitQuizBot/contact@example.com)"}
-        loader = WebBaseLoader(_url, requests_kwargs={"headers": headers})
-        docs = loader.load()
-        if not docs:
+        full_text = get_content_store().fetch(url)
+        if not full_text.strip():
             st.warning("Could not fetch any content from the URL.")
             return None
-        full_text = "\n\n".join([doc.page_content for doc in docs])
-        max_chars_for_quiz = 100000
-        if len(full_text) > max_chars_for_quiz:
-            st.info(f"Content is long ({len(full_text):,} chars). Using the first {max_chars_for_quiz:,} characters for quiz generation.")
-            return full_text[:max_chars_for_quiz]
         return full_text
     except Exception as e:
         st.error(f"Error fetching website content: {e}")
         return None
 
-# --- Quiz Generation Logic ---
-# ... (generate_quiz_from_text function remains the same) ...
-def generate_quiz_from_text(text_content: str, llm, asked_questions_texts: List[str]):
-    if not llm: return None
-    parser = PydanticOutputParser(pydantic_object=QuizItem)
-    asked_questions_list_str = "\n".join([f"- {q}" for q in asked_questions_texts]) if asked_questions_texts else "N/A (this is the first question)"
-    prompt_template_str = """
-    You are an expert quiz generator. Based on the following text, generate ONE new multiple-choice quiz question.
-    The question must be answerable SOLELY from the provided text.
-    The question should have exactly 4 options.
-    Indicate the correct answer (as a 0-indexed integer).
-    Provide a brief, factual explanation for why the correct answer is correct, directly derived from the text.
-    The explanation must NOT include phrases like 'the text states', 'according to the document', 'as mentioned in the passage', etc. Just state the facts supporting the answer.
-
-    IMPORTANT: DO NOT generate any of the following questions, as they have already been asked:
-    --- PREVIOUSLY ASKED QUESTIONS ---
-    {asked_questions_list_str}
-    --- END PREVIOUSLY ASKED QUESTIONS ---
-
-    If you ABSOLUTELY CANNOT generate a new, unique question (different from the list above) based on the provided text,
-    then and only then, respond with the following exact JSON structure:
-    {{"question": "NO_NEW_QUESTION", "options": [], "answer": 0, "explanation": "Could not generate a new unique question from the remaining text or based on the provided constraints."}}
-
-    {format_instructions}
-
-    Here is the text to base the quiz on:
-    --- TEXT ---
-    {text_content}
-    --- END TEXT ---
-
-    Your response must be a single JSON object matching the Pydantic schema.
-    """
-    prompt = PromptTemplate(
-        template=prompt_template_str,
-        input_variables=["text_content", "asked_questions_list_str"],
-        partial_variables={"format_instructions": parser.get_format_instructions()}
-    )
-    chain = prompt | llm | parser
-    try:
-        with st.spinner("Generating new quiz question..."):
-            quiz_item_result = chain.invoke({
-                "text_content": text_content,
-                "asked_questions_list_str": asked_questions_list_str
-            })
-        if quiz_item_result.question == "NO_NEW_QUESTION":
-            st.warning("Could not generate a new unique question. The content might be exhausted, or all relevant questions have been asked.")
-            return None
-        return quiz_item_result
-    except Exception as e:
-        st.error(f"Error generating or parsing quiz: {e}")
-        try:
-            raw_output_chain = prompt | llm
-            raw_output = raw_output_chain.invoke({
-                "text_content": text_content,
-                "asked_questions_list_str": asked_questions_list_str
-            })
-            st.warning("LLM raw output (if parsing failed):")
-            st.code(raw_output.content if hasattr(raw_output, 'content') else str(raw_output), language="json")
-        except Exception as raw_e:
-            st.error(f"Could not get raw output: {raw_e}")
-        return None
+@st.cache_data(ttl=3600)
+def chunk_page(text: str) -> List[str]:
+    # Chunked once per page; every question is then generated from a single chunk,
+    # so the prompt stays the same size however long the page is
+    return chunk_text(text)
 
 # --- Streamlit App UI & State Management ---
 st.set_page_config(page_title="Website Quizzer Deluxe", layout="wide")
@@ -170,8 +83,18 @@ if 'user_answer_index' not in st.session_state: st.session_state.user_answer_ind
 if 'submitted_answer' not in st.session_state: st.session_state.submitted_answer = False
 if 'quiz_history' not in st.session_state: st.session_state.quiz_history = []
 if 'asked_questions_texts' not in st.session_state: st.session_state.asked_questions_texts = []
+if 'asked_quiz_items' not in st.session_state: st.session_state.asked_quiz_items = [] # QuizItems, for the prefetcher's dedupe index
 if 'quiz_active' not in st.session_state: st.session_state.quiz_active = False
 if 'form_key_suffix' not in st.session_state: st.session_state.form_key_suffix = 0
+if 'prefetcher' not in st.session_state: st.session_state.prefetcher = None
+
+# Questions generated ahead while the current one is being answered
+prefetch_depth = st.sidebar.slider(
+    "Questions to prepare ahead", min_value=1, max_value=5,
+    value=int(os.getenv("QUIZR_PREFETCH_DEPTH", "2"))
+)
+if st.session_state.prefetcher:
+    st.session_state.prefetcher.depth = prefetch_depth
 
 # --- HELPER FUNCTIONS (Define display_history HERE) ---
 def display_history():
@@ -193,8 +116,32 @@ def reset_quiz_session():
     st.session_state.submitted_answer = False
     st.session_state.quiz_history = []
     st.session_state.asked_questions_texts = []
+    st.session_state.asked_quiz_items = []
     st.session_state.quiz_active = False
     st.session_state.form_key_suffix += 1
+    stop_prefetching()
+
+def stop_prefetching():
+    # Stops background generation for the old quiz (stopped, or a new URL)
+    if st.session_state.prefetcher:
+        st.session_state.prefetcher.cancel()
+    st.session_state.prefetcher = None
+
+def index_content(text: str):
+    chunks = chunk_page(text)
+    gateway = get_gateway()
+    st.session_state.prefetcher = QuestionPrefetcher(
+        chunks,
+        ChunkSampler(len(chunks)),
+        lambda chunk, asked: generate_quizzes_from_text(chunk, llm, gateway, asked),
+        get_prefetch_executor(),
+        depth=prefetch_depth,
+        batch_size=QUIZ_BATCH_SIZE,
+        asked_items=st.session_state.asked_quiz_items,
+        # The correct answer is part of the fingerprint: a reworded question about the same fact has the same answer
+        dedupe_text=lambda item: f"{item.question} {item.options[item.answer]}"
+    )
+    st.info(f"Indexed {len(text):,} characters as {len(chunks)} sections.")
 
 def add_to_history(quiz_item: QuizItem, user_idx: int, is_correct: bool):
     history_entry = {
@@ -209,20 +156,28 @@ def add_to_history(quiz_item: QuizItem, user_idx: int, is_correct: bool):
     st.session_state.quiz_history.append(history_entry)
     if quiz_item.question not in st.session_state.asked_questions_texts and quiz_item.question != "NO_NEW_QUESTION":
         st.session_state.asked_questions_texts.append(quiz_item.question)
+        st.session_state.asked_quiz_items.append(quiz_item)
 
 def load_new_question():
-    if st.session_state.web_content and llm:
-        st.session_state.quiz_item = generate_quiz_from_text(
-            st.session_state.web_content,
-            llm,
-            st.session_state.asked_questions_texts
-        )
+    prefetcher = st.session_state.prefetcher
+    if prefetcher and llm:
+        if prefetcher.has_ready():
+            st.session_state.quiz_item = prefetcher.next()
+        else:
+            with st.spinner("Generating new quiz question..."):
+                st.session_state.quiz_item = prefetcher.next()
         st.session_state.user_answer_index = None
         st.session_state.submitted_answer = False
         st.session_state.form_key_suffix += 1
         if st.session_state.quiz_item is None:
             st.session_state.quiz_active = False
             st.warning("No more unique questions could be generated for this content. Quiz ended.")
+            error = prefetcher.last_error
+            if error is not None:
+                st.error(str(error))
+                if getattr(error, "raw_output", None):
+                    st.warning("LLM raw output (parsing failed):")
+                    st.code(error.raw_output, language="json")
     else:
         st.session_state.quiz_active = False # Ensure quiz is not active if content is missing
 
@@ -243,6 +198,7 @@ with start_button_col:
                 st.session_state.current_url = url
                 st.session_state.web_content = fetch_website_content(url)
                 if st.session_state.web_content:
+                    index_content(st.session_state.web_content)
                     st.session_state.quiz_active = True
                     load_new_question()
                     st.rerun() # Rerun to show the first question immediately
@@ -308,6 +264,7 @@ if st.session_state.submitted_answer and st.session_state.quiz_item:
         if st.button("Stop Quiz", key="stop_quiz_after_answer", use_container_width=True):
             st.session_state.quiz_active = False
             st.session_state.submitted_answer = False
+            stop_prefetching()
             st.info("Quiz stopped.")
             st.rerun()
 
@@ -316,6 +273,7 @@ if st.session_state.submitted_answer and st.session_state.quiz_item:
 elif st.session_state.quiz_active and not st.session_state.submitted_answer and st.session_state.quiz_item:
     if st.button("Stop Quiz", key="stop_quiz_main", use_container_width=True):
         st.session_state.quiz_active = False
+        stop_prefetching()
         st.info("Quiz stopped.")
         st.rerun()
 
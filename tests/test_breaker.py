@@ -0,0 +1,63 @@
+# tests/test_breaker.py
+import pytest
+
+from llm_gateway.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from llm_gateway.errors import CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_opens_after_consecutive_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.on_failure()
+    breaker.before_call()
+    breaker.on_success() # resets the streak
+    for _ in range(3):
+        breaker.before_call()
+        breaker.on_failure()
+    assert breaker.state == OPEN and breaker.opened_total == 1
+    clock.now = 4
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_in == pytest.approx(6)
+
+
+def test_half_open_trial_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, half_open_max=1, clock=clock)
+    breaker.before_call()
+    breaker.on_failure()
+    clock.now = 10
+    breaker.before_call() # the trial call
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call() # only one trial at a time
+    breaker.on_failure()
+    assert breaker.state == OPEN and breaker.opened_total == 2
+
+    clock.now = 20
+    breaker.before_call()
+    breaker.on_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_released_trial_frees_its_slot():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1, clock=clock)
+    breaker.before_call()
+    breaker.on_failure()
+    clock.now = 1
+    breaker.before_call()
+    breaker.release_trial() # e.g. the trial was throttled: says nothing about the upstream's health
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
@@ -0,0 +1,123 @@
+# tests/test_content_store.py
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from quizr.content_store import ContentStore, PageEntry
+
+
+def parse(html: str) -> str:
+    return html.replace("<p>", "").replace("</p>", "")
+
+
+class Origin(BaseHTTPRequestHandler):
+    """Serves one page with an ETag; answers 304 to a matching If-None-Match, 503 while `down`."""
+    down = False
+    counts = {"200": 0, "304": 0}
+
+    def do_GET(self):
+        if Origin.down:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            Origin.counts["304"] += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        Origin.counts["200"] += 1
+        body = b"<p>page text</p>"
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    Origin.down, Origin.counts = False, {"200": 0, "304": 0}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Origin)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/page"
+    server.shutdown()
+
+
+def test_fresh_hit_then_revalidation_then_stale_if_error(tmp_path, url):
+    store = ContentStore(str(tmp_path), ttl=60)
+    assert store.fetch(url, parse=parse) == "page text"
+    # another process sharing the directory
+    other = ContentStore(str(tmp_path), ttl=60)
+    assert other.fetch(url, parse=parse) == "page text"
+    assert Origin.counts == {"200": 1, "304": 0}
+
+    other.ttl = 0
+    assert other.fetch(url, parse=parse) == "page text"
+    assert Origin.counts == {"200": 1, "304": 1}
+
+    Origin.down = True
+    assert other.fetch(url, parse=parse) == "page text"
+    assert other.stats["stale_served"] == 1
+
+
+def test_304_without_a_cached_copy_is_an_error(tmp_path, url):
+    with pytest.raises(requests.HTTPError):
+        ContentStore(str(tmp_path)).fetch(url, parse=parse, headers={"If-None-Match": '"v1"'})
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = ContentStore(str(tmp_path), max_bytes=10**9)
+    for i in range(4):
+        store.put(PageEntry(url=f"u{i}", text=os.urandom(500).hex(), fetched_at=time.time()))
+        time.sleep(0.01)
+    store.get("u0") # recently used again
+    store.max_bytes = int(store.size() * 0.6) # room for two of the four
+    assert store.evict() == 2
+    assert store.get("u0") is not None and store.get("u3") is not None
+    assert store.get("u1") is None and store.get("u2") is None
+
+
+def test_puts_scan_only_when_over_budget(tmp_path, monkeypatch):
+    store = ContentStore(str(tmp_path), max_bytes=10**9)
+    scans = []
+    scan = store._scan
+    monkeypatch.setattr(store, "_scan", lambda: scans.append(1) or scan())
+    for i in range(100):
+        store.put(PageEntry(url=f"u{i}", text="x", fetched_at=time.time()))
+    assert len(scans) <= 3 # the first put, then every EVICT_CHECK_EVERY puts
+
+
+def test_evict_sweeps_abandoned_temp_files(tmp_path):
+    store = ContentStore(str(tmp_path))
+    shard = tmp_path / "ab"
+    shard.mkdir()
+    abandoned, in_progress = shard / "dead.tmp", shard / "live.tmp"
+    abandoned.write_text("x")
+    in_progress.write_text("x")
+    os.utime(abandoned, (0, 0))
+    store.evict()
+    assert not abandoned.exists() and in_progress.exists()
+
+
+def test_evict_tolerates_entries_removed_meanwhile(tmp_path, monkeypatch):
+    store = ContentStore(str(tmp_path), max_bytes=0)
+    store.put(PageEntry(url="u", text="x", fetched_at=time.time()))
+    list_dir = store._scandir
+
+    def list_then_delete(path):
+        entries = list_dir(path)
+        for entry in entries:
+            if entry.is_file():
+                os.remove(entry.path) # another process evicts it between listing and stat
+        return entries
+
+    monkeypatch.setattr(store, "_scandir", list_then_delete)
+    assert store.evict() == 0
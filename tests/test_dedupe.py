@@ -0,0 +1,82 @@
+# tests/test_dedupe.py
+import pytest
+
+from quizr.dedupe import NearDuplicateIndex, key_tokens
+
+# Quiz items as the prefetcher indexes them: "question answer" (quiz.py dedupe_text)
+PARAPHRASES = [
+    ("In which year was the Eiffel Tower completed? 1889", "When was the Eiffel Tower completed? 1889"),
+    ("Who wrote the novel Pride and Prejudice? Jane Austen", "Pride and Prejudice was written by which author? Jane Austen"),
+    ("What is the capital city of Australia? Canberra", "Which city is the capital of Australia? Canberra"),
+    ("Which planet is known as the Red Planet? Mars", "What planet is called the Red Planet? Mars"),
+    ("How many bones are in the adult human body? 206", "How many bones does an adult human body have? 206"),
+    ("Which element has the chemical symbol Fe? Iron", "The chemical symbol Fe stands for which element? Iron"),
+    ("Who painted the Mona Lisa? Leonardo da Vinci", "The Mona Lisa was painted by whom? Leonardo da Vinci"),
+    ("What is the largest ocean on Earth? Pacific Ocean", "Which ocean is the largest on Earth? Pacific Ocean"),
+    ("In what year did the Berlin Wall fall? 1989", "When did the Berlin Wall fall? 1989"),
+    ("What is the boiling point of water at sea level in Celsius? 100", "At sea level, water boils at how many degrees Celsius? 100"),
+    ("Which company developed the Python programming language? Python Software Foundation", "Which organization develops the Python programming language? Python Software Foundation"),
+    ("What gas do plants absorb during photosynthesis? Carbon dioxide", "During photosynthesis, which gas do plants absorb? Carbon dioxide"),
+    ("Who was the first person to walk on the Moon? Neil Armstrong", "Who was the first man to walk on the Moon? Neil Armstrong"),
+    ("Which country hosted the 2016 Summer Olympics? Brazil", "The 2016 Summer Olympics were hosted by which country? Brazil"),
+    ("What is the longest river in Africa? Nile", "Which river is the longest in Africa? Nile"),
+]
+
+# Same template, different fact: asking these back to back is not a repeat
+DIFFERENT_QUESTIONS = [
+    ("Which country won the 1998 World Cup? France", "Which country won the 2018 World Cup? France"),
+    ("Which river flows through Paris? Seine", "Which river flows through London? Thames"),
+    ("What is the capital city of Australia? Canberra", "What is the capital city of Austria? Vienna"),
+    ("In which year was the Eiffel Tower completed? 1889", "In which year was the Statue of Liberty completed? 1886"),
+    ("How many bones are in the adult human body? 206", "How many teeth are in the adult human mouth? 32"),
+    ("Who wrote the novel Pride and Prejudice? Jane Austen", "Who wrote the novel Great Expectations? Charles Dickens"),
+    ("Which planet is known as the Red Planet? Mars", "Which planet is known for its prominent rings? Saturn"),
+    ("What is the largest ocean on Earth? Pacific Ocean", "What is the smallest ocean on Earth? Arctic Ocean"),
+    ("In what year did the Berlin Wall fall? 1989", "In what year was the Berlin Wall built? 1961"),
+    ("Which element has the chemical symbol Fe? Iron", "Which element has the chemical symbol Au? Gold"),
+    ("Who was the first person to walk on the Moon? Neil Armstrong", "Who was the second person to walk on the Moon? Buzz Aldrin"),
+    ("Which country hosted the 2016 Summer Olympics? Brazil", "Which country hosted the 2012 Summer Olympics? United Kingdom"),
+    ("What is the longest river in Africa? Nile", "What is the longest river in South America? Amazon"),
+    ("What is the boiling point of water at sea level in Celsius? 100", "What is the freezing point of water at sea level in Celsius? 0"),
+    ("Who painted the Mona Lisa? Leonardo da Vinci", "Who painted The Starry Night? Vincent van Gogh"),
+    ("What does HTTP stand for? Hypertext Transfer Protocol", "What does FTP stand for? File Transfer Protocol"),
+    ("Which gas makes up most of Earth's atmosphere? Nitrogen", "Which gas makes up most of the Sun? Hydrogen"),
+]
+
+
+def is_duplicate(first: str, second: str) -> bool:
+    index = NearDuplicateIndex()
+    index.add(first)
+    return index.find(second) is not None
+
+
+def test_no_false_positives_on_labelled_pairs():
+    false_positives = [pair for pair in DIFFERENT_QUESTIONS if is_duplicate(*pair)]
+    assert false_positives == []
+
+
+def test_catches_most_paraphrases():
+    caught = sum(is_duplicate(a, b) for a, b in PARAPHRASES)
+    assert caught / len(PARAPHRASES) >= 0.7
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Which country won the 1998 World Cup? France", "Which country won the 2018 World Cup? France"),
+    ("Which river flows through Paris? Seine", "Which river flows through London? Thames"),
+])
+def test_different_numbers_or_names_are_not_duplicates(first, second):
+    assert not is_duplicate(first, second)
+    assert not is_duplicate(second, first)
+
+
+def test_exact_repeat_is_duplicate():
+    index = NearDuplicateIndex()
+    assert index.add_if_new("What is the capital city of Australia? Canberra")
+    assert not index.add_if_new("What is the capital city of Australia? Canberra")
+    assert len(index) == 1
+
+
+def test_key_tokens_skip_the_first_word_and_stopwords():
+    numbers, names = key_tokens("Which country won the 1998 World Cup? France")
+    assert numbers == {"1998"}
+    assert names == {"world", "cup", "france"}
@@ -0,0 +1,45 @@
+# tests/test_fake_server.py
+# The `python -m llm_gateway.fake_server` comparison, as a test: the same burst
+# fails against the throttling upstream when sent raw, and gets through the gateway.
+import pytest
+
+from llm_gateway import LLMGateway, estimate_tokens, prompt_key
+from llm_gateway.fake_server import FakeLLMClient, FakeLLMServer, burst
+
+RPS = 20.0
+CALLS = 40
+
+
+@pytest.fixture
+def server():
+    server = FakeLLMServer(rps=RPS, latency=0.02).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_raw_burst_is_throttled(server):
+    client = FakeLLMClient(server.url)
+    failures = burst(client.generate, [f"question {i}" for i in range(CALLS)])
+    assert failures > 0
+    assert server.throttled == failures
+
+
+def test_gateway_gets_the_whole_burst_through(server):
+    client = FakeLLMClient(server.url)
+    # Configured at 4x what the upstream accepts: the limiter has to adapt on the 429s
+    gateway = LLMGateway.from_limits(requests_per_minute=RPS * 60 * 4, max_attempts=8, base_delay=0.05, max_delay=2.0)
+    prompts = [f"question {i}" for i in range(CALLS)]
+    failures = burst(lambda p: gateway.call(lambda: client.generate(p), tokens=estimate_tokens(p)), prompts)
+    assert failures == 0
+    assert server.served == CALLS
+
+
+def test_identical_prompts_share_upstream_calls(server):
+    client = FakeLLMClient(server.url)
+    gateway = LLMGateway.from_limits(requests_per_minute=RPS * 60, max_attempts=8, base_delay=0.05, max_delay=2.0)
+    prompt = "what is a token bucket?"
+    failures = burst(lambda p: gateway.call(lambda: client.generate(p), key=prompt_key("fake", p)), [prompt] * CALLS)
+    assert failures == 0
+    assert server.served < CALLS / 4
+    assert gateway.singleflight.coalesced >= CALLS - server.served
@@ -0,0 +1,79 @@
+# tests/test_generation.py
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from llm_gateway import LLMGateway
+from quizr.generation import QuizGenerationError, generate_quizzes_from_text
+
+
+class ScriptedLLM:
+    """Stands in for the chat model: returns the scripted replies in turn and keeps the prompts."""
+
+    model = "scripted"
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def __call__(self, prompt_value):
+        self.prompts.append(prompt_value.to_string())
+        return AIMessage(content=self.replies.pop(0))
+
+
+def item(n: int, **overrides) -> dict:
+    return {"question": f"Question {n}?", "options": ["a", "b", "c", "d"], "answer": n % 4, "explanation": "Because.", **overrides}
+
+
+def reply(*items) -> str:
+    return "```json\n" + json.dumps({"questions": list(items)}) + "\n```"
+
+
+@pytest.fixture
+def gateway():
+    return LLMGateway(coalesce=False)
+
+
+def test_one_call_returns_the_whole_batch(gateway):
+    llm = ScriptedLLM(reply(*(item(n) for n in range(5))))
+    quiz = generate_quizzes_from_text("some text", llm, gateway, [], num_questions=5)
+    assert [q.question for q in quiz] == [f"Question {n}?" for n in range(5)]
+    assert len(llm.prompts) == 1 and "generate 5 new" in llm.prompts[0]
+
+
+def test_only_the_invalid_slots_are_asked_for_again(gateway):
+    llm = ScriptedLLM(
+        reply(item(0), item(1, options=["a", "b"]), item(2), item(3, answer=7)),
+        reply(item(4), item(5)),
+    )
+    quiz = generate_quizzes_from_text("some text", llm, gateway, ["Asked before?"], num_questions=4)
+
+    assert [q.question for q in quiz] == ["Question 0?", "Question 2?", "Question 4?", "Question 5?"]
+    assert len(llm.prompts) == 2
+    assert "generate 2 new" in llm.prompts[1]
+    # The repair call is told about everything already accepted, not only the history
+    assert "- Asked before?" in llm.prompts[1] and "- Question 2?" in llm.prompts[1]
+
+
+def test_a_short_batch_is_not_repaired(gateway):
+    llm = ScriptedLLM(reply(item(0)))
+    assert len(generate_quizzes_from_text("some text", llm, gateway, [], num_questions=5)) == 1
+    assert len(llm.prompts) == 1
+
+
+def test_nothing_valid_raises_with_the_first_raw_output(gateway):
+    first = reply(item(0, options=[]))
+    llm = ScriptedLLM(first, reply(item(1, answer=9)))
+    with pytest.raises(QuizGenerationError) as error:
+        generate_quizzes_from_text("some text", llm, gateway, [], num_questions=1)
+    assert error.value.raw_output == first
+    assert len(llm.prompts) == 2 # no extra call just to capture the raw output
+
+
+def test_unparseable_output_is_reported_with_the_raw_text(gateway):
+    llm = ScriptedLLM("Sorry, I can't help with that.")
+    with pytest.raises(QuizGenerationError) as error:
+        generate_quizzes_from_text("some text", llm, gateway, [])
+    assert error.value.raw_output == "Sorry, I can't help with that."
+    assert len(llm.prompts) == 1
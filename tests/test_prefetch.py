@@ -0,0 +1,133 @@
+# tests/test_prefetch.py
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from quizr.chunking import ChunkSampler
+from quizr.prefetch import QuestionPrefetcher
+
+Item = namedtuple("Item", "question options answer")
+
+
+def dedupe_text(item):
+    return f"{item.question} {item.options[item.answer]}" # as quiz.py indexes them
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+def prefetcher(executor, batches, **kwargs):
+    """A prefetcher over one chunk whose generate() returns `batches` in turn, then nothing."""
+    batches = list(batches)
+    return QuestionPrefetcher(
+        chunks=["text"], sampler=ChunkSampler(1, seed=0),
+        generate=lambda chunk, asked: batches.pop(0) if batches else [],
+        executor=executor, dedupe_text=dedupe_text, **kwargs
+    )
+
+
+def test_asked_items_are_seeded_with_the_question_and_answer(executor):
+    asked = Item("In which year was the Eiffel Tower completed?", ["1887", "1889"], 1)
+    reworded = Item("When was the Eiffel Tower completed?", ["1889", "1901"], 0)
+    other = Item("Who designed the Eiffel Tower?", ["Gustave Eiffel", "Le Corbusier"], 0)
+    quiz = prefetcher(executor, [[reworded, other]], batch_size=2, asked_items=[asked])
+
+    assert quiz.next() == other
+    assert quiz.duplicates == 1
+
+
+def test_same_question_with_a_different_answer_is_kept(executor):
+    asked = Item("Which river flows through the city?", ["Seine", "Thames"], 0)
+    elsewhere = Item("Which river flows through the city?", ["Seine", "Thames"], 1)
+    quiz = prefetcher(executor, [[elsewhere]], asked_items=[asked])
+
+    assert quiz.next() == elsewhere
+    assert quiz.duplicates == 0
+
+
+FACTS = [
+    Item("Which river flows through Paris?", ["Seine", "Thames"], 0),
+    Item("Who painted the Mona Lisa?", ["Leonardo da Vinci", "Raphael"], 0),
+    Item("What is the largest ocean on Earth?", ["Atlantic", "Pacific"], 1),
+    Item("Which planet is known as the Red Planet?", ["Venus", "Mars"], 1),
+    Item("How many bones are in the adult human body?", ["206", "312"], 0),
+    Item("Which element has the chemical symbol Fe?", ["Iron", "Lead"], 0),
+]
+
+
+class Generator:
+    """generate() over several chunks: the next fact on every call, optionally held until released."""
+
+    def __init__(self, hold: bool = False):
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.released = threading.Event()
+        if not hold:
+            self.released.set()
+
+    def __call__(self, chunk, asked):
+        with self._lock:
+            n = self.calls
+            self.calls += 1
+        self.released.wait(5)
+        return [FACTS[n % len(FACTS)]]
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_next_question_is_ready_before_it_is_asked_for(executor):
+    generate = Generator()
+    quiz = QuestionPrefetcher(["a", "b", "c"], ChunkSampler(3, seed=0), generate, executor, depth=2, dedupe_text=dedupe_text)
+    quiz.fill()
+    wait_until(quiz.has_ready)
+
+    assert quiz.next() in FACTS[:2] # jobs run in parallel, questions queue in completion order
+    assert quiz.waited == 0
+    assert generate.calls <= 3 # depth 2, plus the job started to refill after next()
+
+
+def test_twice_in_one_batch_is_queued_once(executor):
+    quiz = prefetcher(executor, [[FACTS[0], FACTS[0], FACTS[1]]], batch_size=3)
+    assert [quiz.next(), quiz.next(), quiz.next()] == [FACTS[0], FACTS[1], None]
+    assert quiz.duplicates == 1
+
+
+def test_cancel_discards_questions_still_being_generated(executor):
+    generate = Generator(hold=True)
+    quiz = QuestionPrefetcher(["a", "b", "c"], ChunkSampler(3, seed=0), generate, executor, depth=1, dedupe_text=dedupe_text)
+    quiz.fill()
+    wait_until(lambda: generate.calls == 1)
+
+    quiz.cancel()
+    generate.released.set()
+    assert quiz.next() is None
+    quiz.fill()
+    assert generate.calls == 1
+
+
+def test_quiz_ends_when_no_chunk_has_anything_new(executor):
+    quiz = QuestionPrefetcher(["a", "b", "c"], ChunkSampler(3, seed=0), lambda chunk, asked: [], executor, dedupe_text=dedupe_text)
+    assert quiz.next() is None
+    assert quiz.exhausted
+
+
+def test_generation_errors_end_the_quiz_and_are_kept(executor):
+    error = RuntimeError("quota exceeded")
+
+    def failing(chunk, asked):
+        raise error
+
+    quiz = QuestionPrefetcher(["a"], ChunkSampler(1, seed=0), failing, executor, dedupe_text=dedupe_text)
+    assert quiz.next() is None
+    assert quiz.last_error is error
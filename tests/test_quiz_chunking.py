@@ -0,0 +1,41 @@
+# tests/test_quiz_chunking.py
+from quizr.chunking import ChunkSampler, chunk_text
+
+
+def test_drops_boilerplate_sized_chunks():
+    article = "\n\n".join(f"Section {i}. " + "facts " * 150 for i in range(6))
+    chunks = chunk_text("Home | About | Login\n\n" + article, chunk_size=1200, overlap=100, min_chars=300)
+    assert all(len(chunk) >= 300 for chunk in chunks)
+    assert not any(chunk.startswith("Home |") and len(chunk) < 300 for chunk in chunks)
+
+
+def test_short_page_is_kept_whole():
+    assert chunk_text("Only a short page.", min_chars=300) == ["Only a short page."]
+
+
+def test_sampler_spreads_over_the_page_before_repeating():
+    sampler = ChunkSampler(10, seed=3)
+    first_round = [sampler.next_chunk() for _ in range(10)]
+    assert sorted(first_round) == list(range(10))
+    # the second pick is as far from the first as the page allows
+    assert abs(first_round[1] - first_round[0]) >= 5
+    assert sampler.coverage == 1.0
+
+
+def test_sampler_skips_exhausted_chunks():
+    sampler = ChunkSampler(3, seed=0)
+    sampler.mark_exhausted(0)
+    sampler.mark_exhausted(2)
+    assert {sampler.next_chunk() for _ in range(5)} == {1}
+    sampler.mark_exhausted(1)
+    assert sampler.next_chunk() is None
+
+
+def test_fingerprint_is_bounded():
+    sampler = ChunkSampler(1)
+    for i in range(15):
+        sampler.record_question(0, f"Question {i}? " + "x" * 200)
+    fingerprint = sampler.fingerprint(0, max_questions=10, max_chars=120)
+    assert len(fingerprint) == 10
+    assert fingerprint[0].startswith("Question 5?")
+    assert all(len(q) <= 120 for q in fingerprint)
@@ -0,0 +1,63 @@
+# tests/test_rate_limit.py
+import pytest
+
+from llm_gateway.errors import RateLimitTimeout
+from llm_gateway.rate_limit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_token_bucket_bursts_then_refills():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=4, clock=clock)
+    for _ in range(4):
+        assert bucket.wait_time(1) == 0.0
+        bucket.take(1)
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    clock.sleep(0.5)
+    assert bucket.wait_time(1) == 0.0
+    assert bucket.wait_time(100) == pytest.approx(1.5) # capped at capacity, never waits forever
+
+
+def test_reserve_takes_nothing_when_it_would_wait():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600, clock=clock)
+    assert limiter.reserve(tokens=500) == 0.0
+    assert limiter.reserve(tokens=500) == pytest.approx(40.0) # 400 more tokens at 10/s
+    assert limiter.reserve(tokens=50) == 0.0 # the refused reservation took nothing
+
+
+def test_throttling_halves_the_rate_and_pauses(monkeypatch):
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=120, clock=clock)
+    limiter.on_throttled(retry_after=3)
+    assert limiter.scale == 0.5
+    assert limiter.reserve() == pytest.approx(3.0) # paused for Retry-After, burst drained
+    clock.sleep(3)
+    while limiter.reserve() == 0.0: # what refilled during the pause
+        pass
+    assert limiter.reserve() == pytest.approx(1.0) # then paced at 60/min
+    for _ in range(10):
+        limiter.on_throttled()
+    assert limiter.scale == limiter.min_fraction
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.scale == 1.0
+
+
+def test_acquire_gives_up_past_its_timeout():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=1, clock=clock)
+    limiter.acquire()
+    with pytest.raises(RateLimitTimeout) as error:
+        limiter.acquire(timeout=5, name="test")
+    assert error.value.wait == pytest.approx(60.0)
@@ -0,0 +1,87 @@
+# tests/test_singleflight.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from llm_gateway.singleflight import SingleFlight
+
+
+def test_async_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "reply"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.ado("prompt", call) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["reply"] * 5
+    assert len(calls) == 1 and flight.coalesced == 4
+
+
+def test_one_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "reply"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.ado("prompt", call))
+        second = asyncio.ensure_future(flight.ado("prompt", call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "reply"
+
+
+def test_nothing_is_cached_after_the_call():
+    flight = SingleFlight()
+    results = iter(["first", "second"])
+
+    async def call():
+        return next(results)
+
+    async def scenario():
+        return [await flight.ado("prompt", call), await flight.ado("prompt", call)]
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+
+
+def test_threads_share_one_call_and_its_error():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream failed")
+
+    errors = []
+
+    def caller():
+        try:
+            flight.do("prompt", call)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+    assert len(calls) == 1
+    assert errors == ["upstream failed"] * 4
+    with pytest.raises(RuntimeError):
+        flight.do("prompt", call) # a new call once the first has finished